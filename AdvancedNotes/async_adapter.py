@@ -0,0 +1,149 @@
+"""
+Adapter which exposes an AsyncDataBase implementation through the synchronous DataBase interface.
+Coroutines run in an event loop of a background thread, so the App call sites stay unchanged
+"""
+
+import asyncio
+import threading
+
+from datetime import datetime
+from typing import Iterator
+
+from databases.idatabase import DataBase
+from databases.iasyncdatabase import AsyncDataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+
+
+class AsyncDataBaseAdapter(DataBase):
+    database: AsyncDataBase = None
+    __loop: asyncio.AbstractEventLoop = None
+
+    @staticmethod
+    def adapt(database: AsyncDataBase) -> DataBase:
+        """ Starts the event loop thread (once) and puts the adapter in front of the given implementation """
+        if AsyncDataBaseAdapter.__loop is None:
+            AsyncDataBaseAdapter.__loop = asyncio.new_event_loop()
+            threading.Thread(target=AsyncDataBaseAdapter.__loop.run_forever, name="async-database",
+                             daemon=True).start()
+        AsyncDataBaseAdapter.database = database
+        return AsyncDataBaseAdapter()
+
+    @staticmethod
+    def run(coroutine):
+        """ Blocks until the coroutine is finished in the event loop thread """
+        return asyncio.run_coroutine_threadsafe(coroutine, AsyncDataBaseAdapter.__loop).result()
+
+    @staticmethod
+    def run_concurrently(*coroutines) -> list:
+        """ Overlaps round trips of independent lookups, results keep the order of the coroutines """
+        async def gather():
+            return await asyncio.gather(*coroutines)
+
+        return AsyncDataBaseAdapter.run(gather())
+
+    @staticmethod
+    def get_grouped_notes() -> list[str]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_grouped_notes())
+
+    @staticmethod
+    def get_attached_group_notes(group_title: str) -> list[str]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_attached_group_notes(group_title))
+
+    @staticmethod
+    def get_all_groups() -> list[str]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_all_groups())
+
+    @staticmethod
+    def get_groups_page(key: str | None, page_size: int, backward: bool) -> list[str]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_groups_page(key, page_size, backward))
+
+    @staticmethod
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int,
+                               backward: bool) -> list[tuple[str, str | None]]:
+        return AsyncDataBaseAdapter.run(
+            AsyncDataBaseAdapter.database.get_grouped_notes_page(key, page_size, backward)
+        )
+
+    @staticmethod
+    def get_all_notes() -> list[str]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_all_notes())
+
+    @staticmethod
+    def get_all_notes_dates() -> list[tuple[str, str | None, datetime]]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_all_notes_dates())
+
+    @staticmethod
+    def check_group(group_title: str) -> int | None:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.check_group(group_title))
+
+    @staticmethod
+    def check_note(note_title: str) -> Note | None:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.check_note(note_title))
+
+    @staticmethod
+    def check_notes(note_titles: list[str]) -> list[Note | None]:
+        # Every lookup acquires its own pooled connection, so they are sent concurrently
+        return AsyncDataBaseAdapter.run_concurrently(
+            *(AsyncDataBaseAdapter.database.check_note(note_title) for note_title in note_titles)
+        )
+
+    @staticmethod
+    def get_note_info(note_title: str) -> NoteInfo | None:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_note_info(note_title))
+
+    @staticmethod
+    def get_note_text(note_title: str) -> str | None:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_note_text(note_title))
+
+    @staticmethod
+    def create_group(group_title: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.create_group(group_title))
+
+    @staticmethod
+    def update_group(group_title: str, new_group_title: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.update_group(group_title, new_group_title))
+
+    @staticmethod
+    def delete_group(group_title: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.delete_group(group_title))
+
+    @staticmethod
+    def create_note(group_title: str, note_title: str, note_text: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.create_note(group_title, note_title, note_text))
+
+    @staticmethod
+    def update_note(note_title: str, text: str, option: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.update_note(note_title, text, option))
+
+    @staticmethod
+    def delete_note(note_title: str) -> None:
+        AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.delete_note(note_title))
+
+    @staticmethod
+    def get_note_history(note_title: str) -> list[NoteRevision]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_note_history(note_title))
+
+    @staticmethod
+    def get_note_revision(note_title: str, revision: int) -> str | None:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.get_note_revision(note_title, revision))
+
+    @staticmethod
+    def search_notes(query: str, limit: int) -> list[SearchResult]:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.search_notes(query, limit))
+
+    @staticmethod
+    def import_notes(notes: list[NoteRecord], on_conflict: str) -> int:
+        return AsyncDataBaseAdapter.run(AsyncDataBaseAdapter.database.import_notes(notes, on_conflict))
+
+    @staticmethod
+    def export_notes(batch_size: int) -> Iterator[NoteRecord]:
+        """ Pulls rows of the async generator one by one through the event loop thread """
+        notes = AsyncDataBaseAdapter.database.export_notes(batch_size)
+        try:
+            while True:
+                try:
+                    yield AsyncDataBaseAdapter.run(notes.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            AsyncDataBaseAdapter.run(notes.aclose())
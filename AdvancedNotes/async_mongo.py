@@ -0,0 +1,289 @@
+"""
+Asyncio MongoDB database implementation via motor
+"""
+
+from datetime import datetime
+from typing import AsyncIterator
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase, \
+    AsyncIOMotorClientSession
+from pymongo.errors import PyMongoError
+
+from view import View
+from databases.iasyncdatabase import AsyncDataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.mongodb_impl.pipelines import Pipelines
+from databases.mongodb_impl.documents import Documents, SEARCH_PROJECTION, SEARCH_SORT, CHAIN_PROJECTION
+from databases.mongodb_impl.config import MongoDB_HOST, MongoDB_PORT
+from databases.mongodb_impl.connection import MongoDBConnection
+
+
+class AsyncDataBaseMongoImp(AsyncDataBase):
+    connection: AsyncIOMotorDatabase = None
+    transactions: bool = False
+
+    @staticmethod
+    def _get_groups_collection(function):
+        async def wrapper(*args):
+            collection = AsyncDataBaseMongoImp.connection["groups"]
+            return await function(*args, collection)
+
+        return wrapper
+
+    @staticmethod
+    def _get_notes_collection(function):
+        async def wrapper(*args):
+            collection = AsyncDataBaseMongoImp.connection["notes"]
+            return await function(*args, collection)
+
+        return wrapper
+
+    @staticmethod
+    def _get_revisions_collection(function):
+        async def wrapper(*args):
+            collection = AsyncDataBaseMongoImp.connection["note_revisions"]
+            return await function(*args, collection)
+
+        return wrapper
+
+    @staticmethod
+    def _make_transaction(function):
+        """ Async counterpart of the DataBaseMongoImp._make_transaction decorator """
+        async def wrapper(*args):
+            if not AsyncDataBaseMongoImp.transactions:
+                return await function(*args, None)
+            async with await AsyncDataBaseMongoImp.connection.client.start_session() as session:
+                return await session.with_transaction(
+                    lambda transaction_session: function(*args, transaction_session)
+                )
+
+        return wrapper
+
+    @staticmethod
+    async def connect() -> None:
+        """ Motor client has to be created inside of the event loop it will be used in """
+        client = AsyncIOMotorClient(MongoDB_HOST, int(MongoDB_PORT), **MongoDBConnection.client_options())
+        AsyncDataBaseMongoImp.connection = client["mynotes"]
+        # Topology of the server is discovered by the first command
+        await AsyncDataBaseMongoImp.connection.command("ping")
+        AsyncDataBaseMongoImp.transactions = MongoDBConnection.supports_transactions(client)
+
+    @staticmethod
+    @_get_groups_collection
+    async def get_grouped_notes(collection: AsyncIOMotorCollection) -> list[str]:
+        grouped_notes = await collection.aggregate(Pipelines.grouped_notes()).to_list(None)
+        return AsyncDataBaseMongoImp.paint_grouped_notes(
+            [(group["_id"], group["notes"]) for group in grouped_notes]
+        )
+
+    @staticmethod
+    @_get_notes_collection
+    async def get_attached_group_notes(group_title: str, collection: AsyncIOMotorCollection) -> list[str]:
+        return await collection.distinct("title", {"group_id": group_title})
+
+    @staticmethod
+    @_get_groups_collection
+    async def get_all_groups(collection: AsyncIOMotorCollection) -> list[str]:
+        return await collection.distinct("title")
+
+    @staticmethod
+    @_get_groups_collection
+    async def get_groups_page(key: str | None, page_size: int, backward: bool,
+                              collection: AsyncIOMotorCollection) -> list[str]:
+        if backward and key is None:
+            return []
+        groups = collection.find(
+            {"title": {"$lt" if backward else "$gt": key or ""}}, {"_id": 0, "title": 1}
+        ).sort("title", -1 if backward else 1).limit(page_size)
+        titles = [group["title"] for group in await groups.to_list(None)]
+        return titles[::-1] if backward else titles
+
+    @staticmethod
+    @_get_groups_collection
+    async def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool,
+                                     collection: AsyncIOMotorCollection) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        pipeline = Pipelines.grouped_notes_page(key, page_size, backward)
+        rows = [(row["group"], row["note"] or None) for row in await collection.aggregate(pipeline).to_list(None)]
+        return rows[::-1] if backward else rows
+
+    @staticmethod
+    @_get_notes_collection
+    async def get_all_notes(collection: AsyncIOMotorCollection) -> list[str]:
+        return await collection.distinct("title")
+
+    @staticmethod
+    @_get_notes_collection
+    async def get_all_notes_dates(collection: AsyncIOMotorCollection) -> list[tuple[str, str | None, datetime]]:
+        found = collection.find({}, {"_id": 0, "title": 1, "group_id": 1, "last_change_date": 1})
+        return [
+            (note_data["title"], note_data.get("group_id"), note_data["last_change_date"])
+            for note_data in await found.to_list(None)
+        ]
+
+    @staticmethod
+    @_get_groups_collection
+    async def check_group(group_title: str, collection: AsyncIOMotorCollection) -> int | None:
+        if await collection.find_one({"id": group_title}):
+            return 1
+
+    @staticmethod
+    @_get_notes_collection
+    async def check_note(note_title: str, collection: AsyncIOMotorCollection) -> Note | None:
+        if note_data := await collection.find_one({"id": note_title}):
+            return Documents.to_note(note_title, note_data)
+
+    @staticmethod
+    @_get_notes_collection
+    async def get_note_info(note_title: str, collection: AsyncIOMotorCollection) -> NoteInfo | None:
+        if found := await collection.aggregate(Pipelines.note_info(note_title)).to_list(1):
+            return Documents.to_note_info(note_title, found[0])
+
+    @staticmethod
+    @_get_notes_collection
+    async def get_note_text(note_title: str, collection: AsyncIOMotorCollection) -> str | None:
+        if note_data := await collection.find_one({"id": note_title}, {"_id": 0, "text": 1}):
+            return note_data.get("text", "")
+
+    @staticmethod
+    @_get_groups_collection
+    async def create_group(group_title: str, collection: AsyncIOMotorCollection) -> None:
+        await collection.insert_one({"id": group_title, "title": group_title})
+
+    @staticmethod
+    @_get_groups_collection
+    @_get_notes_collection
+    @_make_transaction
+    async def update_group(group_title: str, new_group_title: str, groups: AsyncIOMotorCollection,
+                           notes: AsyncIOMotorCollection, session: AsyncIOMotorClientSession | None) -> None:
+        await groups.update_one({"id": group_title}, {"$set": {"title": new_group_title, "id": new_group_title}},
+                                session=session)
+        await notes.update_many({"group_id": group_title}, {"$set": {"group_id": new_group_title}}, session=session)
+
+    @staticmethod
+    @_get_groups_collection
+    @_get_notes_collection
+    @_get_revisions_collection
+    @_make_transaction
+    async def delete_group(group_title: str, groups: AsyncIOMotorCollection, notes: AsyncIOMotorCollection,
+                           revisions: AsyncIOMotorCollection, session: AsyncIOMotorClientSession | None) -> None:
+        note_ids = await notes.distinct("id", {"group_id": group_title}, session=session)
+        await groups.delete_one({"id": group_title}, session=session)
+        await notes.delete_many({"group_id": group_title}, session=session)
+        await revisions.delete_many({"note_id": {"$in": note_ids}}, session=session)
+
+    @staticmethod
+    @_get_notes_collection
+    async def create_note(group_title: str, note_title: str, note_text: str,
+                          collection: AsyncIOMotorCollection) -> None:
+        await collection.insert_one(Documents.note(group_title, note_title, note_text))
+
+    @staticmethod
+    @_get_notes_collection
+    @_get_revisions_collection
+    @_make_transaction
+    async def update_note(note_title: str, text: str, option: str, notes: AsyncIOMotorCollection,
+                          revisions: AsyncIOMotorCollection, session: AsyncIOMotorClientSession | None) -> None:
+        if option == "title":
+            await notes.update_one({"id": note_title}, {"$set": {"title": text, "id": text}}, session=session)
+            await revisions.update_many({"note_id": note_title}, {"$set": {"note_id": text}}, session=session)
+        else:
+            await AsyncDataBaseMongoImp.__save_revision(note_title, text, notes, revisions, session)
+            await notes.update_one({"id": note_title}, {"$set": {"text": text, "last_change_date": datetime.now()}},
+                                   session=session)
+
+    @staticmethod
+    async def __rebuild_revision(note_id: str, revision: int, revisions: AsyncIOMotorCollection,
+                                 session: AsyncIOMotorClientSession | None = None) -> str | None:
+        snapshot = await revisions.find_one(Documents.snapshot_filter(note_id, revision), {"_id": 0, "revision": 1},
+                                            sort=[("revision", -1)], session=session)
+        if not snapshot:
+            return None
+        chain = revisions.find(Documents.chain_filter(note_id, snapshot["revision"], revision), CHAIN_PROJECTION,
+                               session=session).sort("revision", 1)
+        return Documents.revision_text(await chain.to_list(None), revision)
+
+    @staticmethod
+    async def __save_revision(note_title: str, new_text: str, notes: AsyncIOMotorCollection,
+                              revisions: AsyncIOMotorCollection, session: AsyncIOMotorClientSession | None) -> None:
+        """ Async counterpart of DataBaseMongoImp.__save_revision, revisions are assembled by :class:`Documents` """
+        documents = []
+        last = await revisions.find_one({"note_id": note_title}, {"_id": 0, "revision": 1}, sort=[("revision", -1)],
+                                        session=session)
+        if last is None:
+            note_data = await notes.find_one({"id": note_title}, {"_id": 0, "text": 1, "last_change_date": 1},
+                                             session=session)
+            if not note_data:
+                return
+            documents.append(first := Documents.first_revision(note_title, note_data))
+            last_revision, old_text = first["revision"], first["data"]
+        else:
+            last_revision = last["revision"]
+            old_text = await AsyncDataBaseMongoImp.__rebuild_revision(note_title, last_revision, revisions, session)
+
+        if revision := Documents.next_revision(note_title, last_revision, old_text, new_text):
+            documents.append(revision)
+        if documents:
+            await revisions.insert_many(documents, ordered=True, session=session)
+
+    @staticmethod
+    @_get_notes_collection
+    @_get_revisions_collection
+    @_make_transaction
+    async def delete_note(note_title: str, notes: AsyncIOMotorCollection, revisions: AsyncIOMotorCollection,
+                          session: AsyncIOMotorClientSession | None) -> None:
+        await notes.delete_one({"id": note_title}, session=session)
+        await revisions.delete_many({"note_id": note_title}, session=session)
+
+    @staticmethod
+    @_get_revisions_collection
+    async def get_note_history(note_title: str, collection: AsyncIOMotorCollection) -> list[NoteRevision]:
+        return Documents.to_note_revisions(await collection.aggregate(Pipelines.note_history(note_title)).to_list(None))
+
+    @staticmethod
+    @_get_revisions_collection
+    async def get_note_revision(note_title: str, revision: int, collection: AsyncIOMotorCollection) -> str | None:
+        return await AsyncDataBaseMongoImp.__rebuild_revision(note_title, revision, collection)
+
+    @staticmethod
+    @_get_notes_collection
+    async def search_notes(query: str, limit: int, collection: AsyncIOMotorCollection) -> list[SearchResult]:
+        found = collection.find({"$text": {"$search": query}}, SEARCH_PROJECTION).sort(SEARCH_SORT).limit(limit)
+        return Documents.to_search_results(await found.to_list(None), query)
+
+    @staticmethod
+    @_get_notes_collection
+    async def import_notes(notes: list[NoteRecord], on_conflict: str, collection: AsyncIOMotorCollection) -> int:
+        """
+        Loads the batch with a single ordered insert_many or bulk_write call.
+        Errors are printed like the other backends do, so the importer stops at the failed batch
+        """
+        try:
+            if on_conflict == "overwrite":
+                if not (requests := Documents.upserts(notes)):
+                    return 0
+                result = await collection.bulk_write(requests, ordered=True)
+                return result.matched_count + result.upserted_count
+
+            # Title inserted by a concurrent writer after the check fails the insert on the unique id index
+            existing = set(await collection.distinct("id", {"id": {"$in": [note.title for note in notes]}}))
+            if documents := Documents.new_notes(notes, existing):
+                await collection.insert_many(documents, ordered=True)
+            return len(documents)
+        except PyMongoError as error:
+            view.print_error_message(str(error))
+            return None
+
+    @staticmethod
+    def export_notes(batch_size: int) -> AsyncIterator[NoteRecord]:
+        # Collection decorators await the wrapped function, so the generator gets the collection itself
+        return AsyncDataBaseMongoImp.__export_notes(AsyncDataBaseMongoImp.connection["notes"], batch_size)
+
+    @staticmethod
+    async def __export_notes(collection: AsyncIOMotorCollection, batch_size: int) -> AsyncIterator[NoteRecord]:
+        async for note_data in collection.find({}, {"_id": 0}, batch_size=batch_size):
+            yield Documents.to_note_record(note_data)
+
+
+view = View()
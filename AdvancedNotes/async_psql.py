@@ -0,0 +1,245 @@
+"""
+Asyncio PostgreSQL database implementation via asyncpg
+current psql version - 15.0
+"""
+
+from datetime import datetime
+from typing import AsyncIterator
+
+import asyncpg
+
+from view import View
+from databases.iasyncdatabase import AsyncDataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.metrics import Metrics
+from databases.psql_impl.config import PSQL_HOST, PSQL_PORT, PSQL_USER, PSQL_PASSWORD, PSQL_DATA_BASE_NAME, \
+    PSQL_POOL_MIN_SIZE, PSQL_POOL_MAX_SIZE, PSQL_POOL_TIMEOUT
+from databases.psql_impl.queries import QUERIES, IMPORT_TABLE, IMPORT_COLUMNS, EXPORT_NOTES, HEADLINE_OPTIONS
+from databases.psql_impl.rows import Rows
+
+
+class AsyncDataBasePSQLImp(AsyncDataBase):
+    pool: asyncpg.Pool = None
+
+    @staticmethod
+    def _make_transaction(function):
+        """ Decorator for the safety transactions. Every call acquires its own pooled connection """
+
+        async def wrapper(*args):
+            try:
+                async with AsyncDataBasePSQLImp.pool.acquire(timeout=PSQL_POOL_TIMEOUT) as connection:
+                    async with connection.transaction():
+                        return await function(*args, connection)
+            except Exception as error:
+                view.print_error_message(str(error))
+        return wrapper
+
+    @staticmethod
+    def _stream_transaction(function):
+        """ Async generator counterpart of _make_transaction, holds the connection until rows are consumed """
+
+        async def wrapper(*args):
+            async with AsyncDataBasePSQLImp.pool.acquire(timeout=PSQL_POOL_TIMEOUT) as connection:
+                async with connection.transaction():
+                    async for row in function(*args, connection):
+                        yield row
+        return wrapper
+
+    @staticmethod
+    async def create_pool() -> None:
+        AsyncDataBasePSQLImp.pool = await asyncpg.create_pool(
+            host=PSQL_HOST,
+            port=int(PSQL_PORT),
+            user=PSQL_USER,
+            password=PSQL_PASSWORD,
+            database=PSQL_DATA_BASE_NAME,
+            min_size=PSQL_POOL_MIN_SIZE,
+            max_size=PSQL_POOL_MAX_SIZE,
+            init=AsyncDataBasePSQLImp.__init_connection
+        )
+
+    @staticmethod
+    async def __init_connection(connection: asyncpg.Connection) -> None:
+        # Every query sent to the server is reported to the metrics
+        connection.add_query_logger(lambda _: Metrics.round_trip())
+
+    @staticmethod
+    async def __fetch(connection, name: str, *parameters) -> list:
+        """ Runs a query of the QUERIES registry, asyncpg prepares and caches its statement per connection """
+        return await connection.fetch(QUERIES[name].statement, *parameters)
+
+    @staticmethod
+    async def __execute(connection, name: str, *parameters) -> str:
+        """ :return: Status of the command, like 'INSERT 0 <number of rows>' """
+        return await connection.execute(QUERIES[name].statement, *parameters)
+
+    @staticmethod
+    @_make_transaction
+    async def get_grouped_notes(connection) -> list[str]:
+        rows = await AsyncDataBasePSQLImp.__fetch(connection, "get_grouped_notes")
+        return AsyncDataBasePSQLImp.paint_grouped_notes([(row[0], row[1]) for row in rows])
+
+    @staticmethod
+    @_make_transaction
+    async def get_attached_group_notes(group_title: str, connection) -> list[str]:
+        if note_titles := await AsyncDataBasePSQLImp.__fetch(connection, "get_attached_group_notes", group_title):
+            return [title[0] for title in note_titles]
+
+    @staticmethod
+    @_make_transaction
+    async def get_all_groups(connection) -> list[str]:
+        return [title[0] for title in await AsyncDataBasePSQLImp.__fetch(connection, "get_all_groups")]
+
+    @staticmethod
+    @_make_transaction
+    async def get_groups_page(key: str | None, page_size: int, backward: bool, connection) -> list[str]:
+        if backward and key is None:
+            return []
+        titles = [title[0] for title in await AsyncDataBasePSQLImp.__fetch(
+            connection, "get_groups_page_backward" if backward else "get_groups_page", key or "", page_size
+        )]
+        return titles[::-1] if backward else titles
+
+    @staticmethod
+    @_make_transaction
+    async def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool,
+                                     connection) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        group_title, note_title = key or ("", "")
+        rows = [(row[0], row[1]) for row in await AsyncDataBasePSQLImp.__fetch(
+            connection, "get_grouped_notes_page_backward" if backward else "get_grouped_notes_page",
+            group_title, note_title or "", page_size
+        )]
+        return rows[::-1] if backward else rows
+
+    @staticmethod
+    @_make_transaction
+    async def get_all_notes(connection) -> list[str]:
+        return [title[0] for title in await AsyncDataBasePSQLImp.__fetch(connection, "get_all_notes")]
+
+    @staticmethod
+    @_make_transaction
+    async def get_all_notes_dates(connection) -> list[tuple[str, str | None, datetime]]:
+        return [tuple(row) for row in await AsyncDataBasePSQLImp.__fetch(connection, "get_all_notes_dates")]
+
+    @staticmethod
+    @_make_transaction
+    async def check_group(group_title: str, connection) -> int | None:
+        if await connection.fetchval(QUERIES["check_group"].statement, group_title):
+            return 1
+
+    @staticmethod
+    @_make_transaction
+    async def check_note(note_title: str, connection) -> Note | None:
+        if note_data := await connection.fetchrow(QUERIES["check_note"].statement, note_title):
+            return Rows.to_note(note_title, note_data)
+
+    @staticmethod
+    @_make_transaction
+    async def get_note_info(note_title: str, connection) -> NoteInfo | None:
+        if note_data := await connection.fetchrow(QUERIES["get_note_info"].statement, note_title):
+            return Rows.to_note_info(note_title, note_data)
+
+    @staticmethod
+    @_make_transaction
+    async def get_note_text(note_title: str, connection) -> str | None:
+        if note_data := await connection.fetchrow(QUERIES["get_note_text"].statement, note_title):
+            return note_data[0] or ""
+
+    @staticmethod
+    @_make_transaction
+    async def create_group(group_title: str, connection) -> None:
+        await AsyncDataBasePSQLImp.__execute(connection, "create_group", group_title)
+
+    @staticmethod
+    @_make_transaction
+    async def update_group(group_title: str, new_group_title: str, connection) -> None:
+        # groups_notes rows follow the new id via ON UPDATE CASCADE
+        await AsyncDataBasePSQLImp.__execute(connection, "update_group", new_group_title, group_title)
+
+    @staticmethod
+    @_make_transaction
+    async def delete_group(group_title: str, connection) -> None:
+        # groups_notes rows are removed via ON DELETE CASCADE
+        await AsyncDataBasePSQLImp.__execute(connection, "delete_group_notes", group_title)
+        await AsyncDataBasePSQLImp.__execute(connection, "delete_group", group_title)
+
+    @staticmethod
+    @_make_transaction
+    async def create_note(group_title: str, note_title: str, note_text: str, connection) -> None:
+        await AsyncDataBasePSQLImp.__execute(connection, "create_note", note_title, note_text, datetime.now())
+        await AsyncDataBasePSQLImp.__execute(connection, "attach_note", group_title, note_title)
+
+    @staticmethod
+    @_make_transaction
+    async def update_note(note_title: str, text: str, option: str, connection) -> None:
+        if option == "title":
+            await AsyncDataBasePSQLImp.__execute(connection, "update_note_title", text, datetime.now(), note_title)
+        else:
+            await AsyncDataBasePSQLImp.__save_revision(note_title, text, connection)
+            await AsyncDataBasePSQLImp.__execute(connection, "update_note_text", text, datetime.now(), note_title)
+
+    @staticmethod
+    async def __rebuild_revision(note_id: str, revision: int, connection) -> str | None:
+        chain = await AsyncDataBasePSQLImp.__fetch(connection, "get_revision_chain", note_id, revision)
+        return Rows.revision_text(chain, revision)
+
+    @staticmethod
+    async def __save_revision(note_title: str, new_text: str, connection) -> None:
+        """ Records the new text as the next revision, the first update records the current text as well """
+        if not (note_data := await connection.fetchrow(QUERIES["lock_note_revisions"].statement, note_title)):
+            return
+        note_id, last_change_date, last_revision = note_data
+
+        if last_revision is None:
+            old_text = await connection.fetchval(QUERIES["get_note_text"].statement, note_title) or ""
+            last_revision = 1
+            await AsyncDataBasePSQLImp.__execute(connection, "create_note_revision",
+                                                 *Rows.first_revision(note_id, last_change_date, old_text))
+        else:
+            old_text = await AsyncDataBasePSQLImp.__rebuild_revision(note_id, last_revision, connection)
+
+        if revision := Rows.next_revision(note_id, last_revision, old_text, new_text):
+            await AsyncDataBasePSQLImp.__execute(connection, "create_note_revision", *revision)
+
+    @staticmethod
+    @_make_transaction
+    async def delete_note(note_title: str, connection) -> None:
+        await AsyncDataBasePSQLImp.__execute(connection, "delete_note", note_title)
+
+    @staticmethod
+    @_make_transaction
+    async def get_note_history(note_title: str, connection) -> list[NoteRevision]:
+        return Rows.to_note_revisions(await AsyncDataBasePSQLImp.__fetch(connection, "get_note_history", note_title))
+
+    @staticmethod
+    @_make_transaction
+    async def get_note_revision(note_title: str, revision: int, connection) -> str | None:
+        return await AsyncDataBasePSQLImp.__rebuild_revision(note_title, revision, connection)
+
+    @staticmethod
+    @_make_transaction
+    async def search_notes(query: str, limit: int, connection) -> list[SearchResult]:
+        return Rows.to_search_results(
+            await AsyncDataBasePSQLImp.__fetch(connection, "search_notes", query, limit, HEADLINE_OPTIONS)
+        )
+
+    @staticmethod
+    @_make_transaction
+    async def import_notes(notes: list[NoteRecord], on_conflict: str, connection) -> int:
+        """ Streams the batch into a temporary table via COPY, then moves it with a single statement """
+        await connection.execute(IMPORT_TABLE)
+        await connection.copy_records_to_table("import_notes", records=Rows.import_records(notes),
+                                               columns=IMPORT_COLUMNS)
+        status = await AsyncDataBasePSQLImp.__execute(connection, f"import_notes_{on_conflict}")
+        return int(status.split()[-1])
+
+    @staticmethod
+    @_stream_transaction
+    async def export_notes(batch_size: int, connection) -> AsyncIterator[NoteRecord]:
+        async for row in connection.cursor(EXPORT_NOTES, prefetch=batch_size):
+            yield Rows.to_note_record(row)
+
+
+view = View()
@@ -0,0 +1,116 @@
+"""
+Non-interactive input of the batch mode.
+Commands are read line by line from the files, stdin ('-') and the command line arguments.
+Commands which open the text editor take their text from the following lines:
+titles from a single line, note texts from the lines up to a line with a single '.' ('..' stands for a '.' line).
+Deletions are confirmed without asking, empty lines and lines starting with '#' between the commands are skipped
+"""
+
+import sys
+
+from typing import Iterable, Iterator
+
+from settings.config import TEXT_LINE_LIMIT, TITLE_LIMIT
+
+# Exit codes of the program
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_NO_DATABASE = 3
+
+TEXT_END = "."
+
+
+class BatchError(Exception):
+    """ Raised when a command of the batch fails, it rolls back the batch transaction of the transactional databases """
+
+
+def read_lines(paths: list[str], commands: list[str]) -> Iterator[str]:
+    """ :return: Lines of the files (lazily, '-' stands for stdin) followed by the lines of the commands """
+    for path in paths:
+        if path == "-":
+            yield from (line.rstrip("\r\n") for line in sys.stdin)
+            continue
+        with open(path, encoding="utf-8") as file:
+            yield from (line.rstrip("\r\n") for line in file)
+    for command in commands:
+        yield from command.splitlines()
+
+
+class BatchInput:
+    """ Input of the :class:`App` in the batch mode, completed titles aren't kept """
+    __lines: Iterator[str] = iter(())
+    line_number = 0
+
+    @staticmethod
+    def set_lines(lines: Iterable[str]) -> None:
+        BatchInput.__lines = iter(lines)
+        BatchInput.line_number = 0
+
+    @staticmethod
+    def __next_line() -> str | None:
+        if (line := next(BatchInput.__lines, None)) is not None:
+            BatchInput.line_number += 1
+        return line
+
+    @staticmethod
+    def commands() -> Iterator[str]:
+        """ :return: Commands, the text lines of the editor commands are taken by text_editor() in between """
+        while (line := BatchInput.__next_line()) is not None:
+            if (command := line.strip()) and not command.startswith("#"):
+                yield command
+
+    @staticmethod
+    def text_editor(buffered_text="", multiline=True) -> str:
+        """
+        :param buffered_text: Isn't used, the new text replaces it
+        :param multiline: bool (True for the note text input, False for the note/group of notes title input)
+
+        :return: Text of the following lines trimmed the same way as the interactive editor does
+        """
+        if not multiline:
+            return (BatchInput.__next_line() or "").strip()[:TITLE_LIMIT]
+        lines = []
+        while (line := BatchInput.__next_line()) is not None and line != TEXT_END:
+            lines.append(line[1:] if line == TEXT_END * 2 else line)
+        return "\n".join(line[:TEXT_LINE_LIMIT] for line in lines)
+
+    @staticmethod
+    def confirmation_input(_: str) -> str:
+        return "y"
+
+    @staticmethod
+    def set_titles(groups: list[str], notes: list) -> None:
+        pass
+
+    @staticmethod
+    def set_attached_group(group_title: str | None) -> None:
+        pass
+
+    @staticmethod
+    def add_group(group_title: str) -> None:
+        pass
+
+    @staticmethod
+    def rename_group(group_title: str, new_group_title: str) -> None:
+        pass
+
+    @staticmethod
+    def remove_group(group_title: str) -> None:
+        pass
+
+    @staticmethod
+    def add_note(note_title: str, group_title: str) -> None:
+        pass
+
+    @staticmethod
+    def touch_note(note_title: str) -> None:
+        pass
+
+    @staticmethod
+    def rename_note(note_title: str, new_note_title: str) -> None:
+        pass
+
+    @staticmethod
+    def remove_note(note_title: str) -> None:
+        pass
@@ -0,0 +1,363 @@
+"""
+Benchmarks of every DataBase method at realistic data sizes.
+The database is seeded with the given number of notes spread over the groups, then every method is timed separately.
+Throughput and p50/p95/p99 latencies are reported as JSON, so runs can be compared across commits
+
+Usage: python benchmark.py --backend memory sqlite psql mongo --notes 1000 10000 100000 --groups 100 --output results.json
+
+'memory' backend runs in the process and needs no server, 'sqlite' one uses a temporary database file.
+Postgres benchmarks use the separate 'mynotes_benchmark' schema of the configured database,
+MongoDB ones use the separate 'mynotes_benchmark' database, both are dropped afterwards,
+so the timings don't depend on the user's notes
+"""
+
+import os
+import json
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from datetime import datetime, timedelta
+from math import ceil
+from time import perf_counter
+from typing import Callable
+
+from databases.idatabase import DataBase
+from databases.note import NoteRecord
+
+from settings.config import PAGE_SIZE, SEARCH_LIMIT, EXPORT_BATCH_SIZE, IMPORT_BATCH_SIZE
+
+BACKENDS = ("memory", "sqlite", "psql", "mongo")
+MONGO_BENCHMARK_DATA_BASE_NAME = "mynotes_benchmark"
+# Connections of the benchmark select the schema by the search_path, so the queries stay unqualified
+PSQL_BENCHMARK_SCHEMA = "mynotes_benchmark"
+SQLITE_BENCHMARK_PATH = os.path.join(tempfile.gettempdir(), "mynotes_benchmark.db")
+# Every benchmark title starts with it, so the seeded data can be told apart from the user's notes
+TITLE_PREFIX = "bench"
+PERCENTILES = (50, 95, 99)
+
+
+class BenchmarkBackends:
+    """ Backends are imported lazily, the server configurations are checked only for the chosen ones """
+
+    @staticmethod
+    def create(backend: str) -> DataBase | None:
+        return {
+            "memory": BenchmarkBackends.memory,
+            "sqlite": BenchmarkBackends.sqlite,
+            "psql": BenchmarkBackends.psql,
+            "mongo": BenchmarkBackends.mongo
+        }[backend]()
+
+    @staticmethod
+    def memory() -> DataBase:
+        from memory import DataBaseMemoryImp
+
+        DataBaseMemoryImp.reset()
+        return DataBaseMemoryImp()
+
+    @staticmethod
+    def sqlite() -> DataBase | None:
+        from sqlite import DataBaseSQLiteImp
+        from databases.sqlite_impl.connection import SQLiteConnection
+
+        BenchmarkBackends.remove_sqlite_files()
+        if not (connection := SQLiteConnection.check_connection(SQLITE_BENCHMARK_PATH)):
+            return None
+        database = DataBaseSQLiteImp()
+        database.set_connection(connection, SQLITE_BENCHMARK_PATH)
+        return database
+
+    @staticmethod
+    def remove_sqlite_files() -> None:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(f"{SQLITE_BENCHMARK_PATH}{suffix}"):
+                os.remove(f"{SQLITE_BENCHMARK_PATH}{suffix}")
+
+    @staticmethod
+    def psql() -> DataBase | None:
+        from psycopg2 import Error
+        from psql import DataBasePSQLImp
+        from databases.psql_impl.connection import PSQLConnection
+        from databases.psql_impl.queries import PreparedConnection
+
+        try:
+            BenchmarkBackends.psql_execute(
+                f"DROP SCHEMA IF EXISTS {PSQL_BENCHMARK_SCHEMA} CASCADE; CREATE SCHEMA {PSQL_BENCHMARK_SCHEMA}"
+            )
+        # Creating the schema needs the CREATE privilege on the database
+        except Error as error:
+            print(f"Benchmark schema '{PSQL_BENCHMARK_SCHEMA}' can't be created: {error}")
+            return None
+        # Tables of the empty schema are created by the migrations
+        if not (pool := PSQLConnection().check_pool(True, connection_factory=PreparedConnection,
+                                                     options=f"-c search_path={PSQL_BENCHMARK_SCHEMA}")):
+            return None
+        database = DataBasePSQLImp()
+        database.set_pool(pool)
+        return database
+
+    @staticmethod
+    def psql_execute(statement: str) -> None:
+        """ Runs the statement outside the benchmark schema, on a connection to the configured database """
+        import psycopg2
+        from databases.psql_impl.config import PSQL_HOST, PSQL_PORT, PSQL_USER, PSQL_PASSWORD, PSQL_DATA_BASE_NAME
+
+        connection = psycopg2.connect(host=PSQL_HOST, port=PSQL_PORT, user=PSQL_USER, password=PSQL_PASSWORD,
+                                      database=PSQL_DATA_BASE_NAME)
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(statement)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def mongo() -> DataBase | None:
+        from mongo import DataBaseMongoImp
+        from databases.mongodb_impl.connection import MongoDBConnection
+
+        if MongoDBConnection.check_connection() is None:
+            return None
+        MongoDBConnection.client.drop_database(MONGO_BENCHMARK_DATA_BASE_NAME)
+        connection = MongoDBConnection.client[MONGO_BENCHMARK_DATA_BASE_NAME]
+        MongoDBConnection.ensure_indexes(connection)
+        database = DataBaseMongoImp()
+        database.set_connection(connection)
+        return database
+
+    @staticmethod
+    def close(backend: str) -> None:
+        if backend == "mongo":
+            from databases.mongodb_impl.connection import MongoDBConnection
+
+            MongoDBConnection.client.drop_database(MONGO_BENCHMARK_DATA_BASE_NAME)
+        elif backend == "psql":
+            from psql import DataBasePSQLImp
+
+            DataBasePSQLImp.pool.closeall()
+            BenchmarkBackends.psql_execute(f"DROP SCHEMA IF EXISTS {PSQL_BENCHMARK_SCHEMA} CASCADE")
+        elif backend == "sqlite":
+            from sqlite import DataBaseSQLiteImp
+
+            DataBaseSQLiteImp.connection().close()
+            BenchmarkBackends.remove_sqlite_files()
+
+
+class DataBaseBenchmark:
+    """
+    Seeds the database and times every DataBase method.
+    Methods reading the whole database are repeated scan_repeat times, the other ones repeat times
+    """
+
+    def __init__(self, database: DataBase, notes: int, groups: int, repeat: int, scan_repeat: int,
+                 text_lines: int, seed: int):
+        self.database = database
+        self.notes = notes
+        self.groups = groups
+        self.repeat = repeat
+        self.scan_repeat = scan_repeat
+        self.text_lines = text_lines
+        self.random = random.Random(seed)
+        self.words = [
+            "".join(self.random.choices("abcdefghijklmnopqrstuvwxyz", k=self.random.randint(3, 10)))
+            for _ in range(2000)
+        ]
+        self.group_titles = [f"{TITLE_PREFIX} group {index}" for index in range(groups)]
+        self.note_titles = [f"{TITLE_PREFIX} note {index}" for index in range(notes)]
+
+    def text(self) -> str:
+        return "\n".join(" ".join(self.random.choices(self.words, k=8)) for _ in range(self.text_lines))
+
+    def records(self, titles: list[str]) -> list[NoteRecord]:
+        now = datetime.now()
+        return [
+            NoteRecord(
+                group_title=self.group_titles[index % self.groups],
+                title=title,
+                text=self.text(),
+                creation_date=now - timedelta(minutes=index),
+                last_change_date=now - timedelta(minutes=index)
+            ) for index, title in enumerate(titles)
+        ]
+
+    def cleanup(self) -> None:
+        """ Removes the benchmark groups along with their notes, left by this or by an interrupted run """
+        for group_title in self.database.get_all_groups() or []:
+            if group_title.startswith(TITLE_PREFIX):
+                self.database.delete_group(group_title)
+
+    def seed(self) -> float:
+        """ :return: Seconds spent on seeding """
+        self.cleanup()
+        start = perf_counter()
+        for group_title in self.group_titles:
+            self.database.create_group(group_title)
+        for offset in range(0, self.notes, IMPORT_BATCH_SIZE):
+            self.database.import_notes(self.records(self.note_titles[offset:offset + IMPORT_BATCH_SIZE]), "skip")
+        return perf_counter() - start
+
+    def cases(self) -> list[tuple[str, int, Callable[[int], object]]]:
+        """
+        :return: (name, number of calls, call) of every case in the running order.
+        Calls get the iteration number, cases working with the new notes rely on the previous ones
+        """
+        database = self.database
+        group_titles, note_titles = self.group_titles, self.note_titles
+        new_group = lambda index: f"{TITLE_PREFIX} new group {index}"
+        new_note = lambda index: f"{TITLE_PREFIX} new note {index}"
+        renamed_note = lambda index: f"{TITLE_PREFIX} renamed note {index}"
+        random_group = lambda _: self.random.choice(group_titles)
+        random_note = lambda _: self.random.choice(note_titles)
+        import_titles = lambda index: [f"{TITLE_PREFIX} imported {index}-{number}" for number in range(100)]
+
+        def rename_group(index: int) -> None:
+            # Toggled suffix keeps the titles short, so the groups can be renamed any number of times
+            position = index % len(group_titles)
+            title = group_titles[position]
+            group_titles[position] = title[:-1] if title.endswith("~") else f"{title}~"
+            database.update_group(title, group_titles[position])
+
+        def export_notes(_) -> int:
+            return sum(1 for _ in database.export_notes(EXPORT_BATCH_SIZE))
+
+        repeat, scan_repeat = self.repeat, self.scan_repeat
+        return [
+            ("get_grouped_notes", scan_repeat, lambda _: database.get_grouped_notes()),
+            ("get_all_groups", scan_repeat, lambda _: database.get_all_groups()),
+            ("get_all_notes", scan_repeat, lambda _: database.get_all_notes()),
+            ("get_all_notes_dates", scan_repeat, lambda _: database.get_all_notes_dates()),
+            ("export_notes", scan_repeat, export_notes),
+            ("get_attached_group_notes", repeat, lambda index: database.get_attached_group_notes(random_group(index))),
+            ("get_groups_page", repeat, lambda index: database.get_groups_page(random_group(index), PAGE_SIZE, False)),
+            ("get_groups_page backward", repeat,
+             lambda index: database.get_groups_page(random_group(index), PAGE_SIZE, True)),
+            ("get_grouped_notes_page", repeat,
+             lambda index: database.get_grouped_notes_page((random_group(index), ""), PAGE_SIZE, False)),
+            ("get_grouped_notes_page backward", repeat,
+             lambda index: database.get_grouped_notes_page((random_group(index), ""), PAGE_SIZE, True)),
+            ("check_group", repeat, lambda index: database.check_group(random_group(index))),
+            ("check_note", repeat, lambda index: database.check_note(random_note(index))),
+            ("check_notes", repeat, lambda index: database.check_notes([random_note(index) for _ in range(100)])),
+            ("get_note_info", repeat, lambda index: database.get_note_info(random_note(index))),
+            ("get_note_text", repeat, lambda index: database.get_note_text(random_note(index))),
+            ("search_notes", repeat,
+             lambda index: database.search_notes(self.random.choice(self.words), SEARCH_LIMIT)),
+            ("create_group", repeat, lambda index: database.create_group(new_group(index))),
+            ("create_note", repeat,
+             lambda index: database.create_note(random_group(index), new_note(index), self.text())),
+            ("update_note text", repeat,
+             lambda index: database.update_note(new_note(index), f"{self.text()}\n{self.text()}", "text")),
+            ("get_note_history", repeat, lambda index: database.get_note_history(new_note(index))),
+            ("get_note_revision", repeat, lambda index: database.get_note_revision(new_note(index), 1)),
+            ("update_note title", repeat,
+             lambda index: database.update_note(new_note(index), renamed_note(index), "title")),
+            ("delete_note", repeat, lambda index: database.delete_note(renamed_note(index))),
+            ("import_notes", repeat,
+             lambda index: database.import_notes(self.records(import_titles(index)), "skip")),
+            ("update_group", repeat, rename_group),
+            ("delete_group", min(repeat, len(group_titles)), lambda index: database.delete_group(group_titles[index]))
+        ]
+
+    @staticmethod
+    def statistics(latencies: list[float]) -> dict:
+        """ :return: Throughput in calls per second and latencies in milliseconds """
+        latencies = sorted(latencies)
+        total = sum(latencies)
+        result = {
+            "calls": len(latencies),
+            "total_s": round(total, 6),
+            "throughput": round(len(latencies) / total, 2) if total else None,
+            "mean_ms": round(total / len(latencies) * 1000, 4),
+            "min_ms": round(latencies[0] * 1000, 4),
+            "max_ms": round(latencies[-1] * 1000, 4)
+        }
+        for percent in PERCENTILES:
+            # Nearest-rank percentile
+            result[f"p{percent}_ms"] = round(latencies[max(ceil(percent / 100 * len(latencies)) - 1, 0)] * 1000, 4)
+        return result
+
+    def run(self, progress: Callable[[str], None] | None = None) -> dict:
+        seed_time = self.seed()
+        results = {}
+        try:
+            for name, calls, call in self.cases():
+                if progress:
+                    progress(name)
+                latencies = []
+                for index in range(calls):
+                    start = perf_counter()
+                    call(index)
+                    latencies.append(perf_counter() - start)
+                if latencies:
+                    results[name] = DataBaseBenchmark.statistics(latencies)
+        finally:
+            self.cleanup()
+        return {"seed_s": round(seed_time, 3), "results": results}
+
+
+def commit_hash() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks every DataBase method at the given data sizes")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=["memory"])
+    parser.add_argument("--notes", nargs="+", type=int, default=[1000, 10000, 100000],
+                        help="numbers of seeded notes, every number is a separate run")
+    parser.add_argument("--groups", type=int, default=100, help="number of groups the notes are spread over")
+    parser.add_argument("--repeat", type=int, default=100, help="calls of every method")
+    parser.add_argument("--scan-repeat", type=int, default=5, help="calls of the methods reading the whole database")
+    parser.add_argument("--text-lines", type=int, default=10, help="lines of every seeded note text")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated titles, texts and calls")
+    parser.add_argument("--cached", action="store_true", help="put the client-side cache in front of the backend")
+    parser.add_argument("--output", help="JSON file for the results, they are printed otherwise")
+    arguments = parser.parse_args()
+
+    report = {
+        "commit": commit_hash(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "runs": []
+    }
+    for backend in arguments.backend:
+        for notes in arguments.notes:
+            if (database := BenchmarkBackends.create(backend)) is None:
+                print(f"Skipping '{backend}' backend, it isn't available")
+                break
+            if arguments.cached:
+                from cache import DataBaseCache
+
+                DataBaseCache.clear()
+                database = DataBaseCache.cached(database)
+            print(f"Benchmarking '{backend}' backend with {notes} notes in {arguments.groups} groups")
+            benchmark = DataBaseBenchmark(database, notes, arguments.groups, arguments.repeat, arguments.scan_repeat,
+                                          arguments.text_lines, arguments.seed)
+            try:
+                run = benchmark.run(progress=lambda name: print(f"  {name}"))
+            finally:
+                BenchmarkBackends.close(backend)
+            report["runs"].append({
+                "backend": backend,
+                "cached": arguments.cached,
+                "notes": notes,
+                "groups": arguments.groups,
+                **run
+            })
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results are written to '{arguments.output}'")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Write-through client-side cache for any DataBase implementation.
+Keeps group titles, per-group note titles and hydrated notes in memory,
+so the idle prompt doesn't make any round trips to the database server
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from databases.idatabase import DataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+
+from settings.config import CACHE_SIZE
+
+
+class LRUCache:
+    """ Bounded mapping which evicts the least recently used key """
+    def __init__(self, max_size: int):
+        self.__max_size = max_size
+        self.__items = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self.__items
+
+    def get(self, key):
+        self.__items.move_to_end(key)
+        return self.__items[key]
+
+    def set(self, key, value) -> None:
+        self.__items[key] = value
+        self.__items.move_to_end(key)
+        if len(self.__items) > self.__max_size:
+            self.__items.popitem(last=False)
+
+    def pop(self, key) -> None:
+        self.__items.pop(key, None)
+
+    def items(self) -> list[tuple]:
+        """ Snapshot of the cached items, doesn't change the eviction order """
+        return list(self.__items.items())
+
+    def clear(self) -> None:
+        self.__items.clear()
+
+
+class DataBaseCache(DataBase):
+    """
+    Wraps a DataBase implementation. Reads are served from memory after the first query,
+    writes go straight to the wrapped database and invalidate affected entries
+    """
+    database: DataBase = None
+
+    # None means that the list wasn't loaded yet
+    __groups: list[str] | None = None
+    __notes: list[str] | None = None
+    __grouped_notes: list[str] | None = None
+
+    __group_notes = LRUCache(CACHE_SIZE)
+    __hydrated_notes = LRUCache(CACHE_SIZE)
+    # Metadata of the selected notes, texts are loaded on demand and never cached
+    __note_infos = LRUCache(CACHE_SIZE)
+
+    @staticmethod
+    def set_database(database: DataBase) -> None:
+        DataBaseCache.database = database
+        DataBaseCache.clear()
+
+    @staticmethod
+    def cached(database: DataBase) -> DataBase:
+        """ Puts the cache in front of the given database implementation """
+        DataBaseCache.set_database(database)
+        return DataBaseCache()
+
+    @staticmethod
+    def clear() -> None:
+        DataBaseCache.__groups = None
+        DataBaseCache.__notes = None
+        DataBaseCache.__grouped_notes = None
+        DataBaseCache.__group_notes.clear()
+        DataBaseCache.__hydrated_notes.clear()
+        DataBaseCache.__note_infos.clear()
+
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[None]:
+        with DataBaseCache.database.transaction():
+            try:
+                yield
+            except BaseException:
+                # Entries written or loaded inside the transaction may be rolled back
+                DataBaseCache.clear()
+                raise
+
+    @staticmethod
+    def is_transactional() -> bool:
+        return DataBaseCache.database.is_transactional()
+
+    @staticmethod
+    def __invalidate_listings() -> None:
+        DataBaseCache.__notes = None
+        DataBaseCache.__grouped_notes = None
+
+    @staticmethod
+    def __invalidate_note(note_title: str) -> None:
+        """ Drops the note and every cached group listing which contains it """
+        DataBaseCache.__hydrated_notes.pop(note_title)
+        DataBaseCache.__note_infos.pop(note_title)
+        for group_title, note_titles in DataBaseCache.__group_notes.items():
+            if note_title in (note_titles or []):
+                DataBaseCache.__group_notes.pop(group_title)
+        DataBaseCache.__invalidate_listings()
+
+    @staticmethod
+    def get_grouped_notes() -> list[str]:
+        if DataBaseCache.__grouped_notes is None:
+            DataBaseCache.__grouped_notes = DataBaseCache.database.get_grouped_notes()
+        return DataBaseCache.__grouped_notes
+
+    @staticmethod
+    def get_attached_group_notes(group_title: str) -> list[str]:
+        if group_title not in DataBaseCache.__group_notes:
+            DataBaseCache.__group_notes.set(group_title, DataBaseCache.database.get_attached_group_notes(group_title))
+        return DataBaseCache.__group_notes.get(group_title)
+
+    @staticmethod
+    def get_all_groups() -> list[str]:
+        if DataBaseCache.__groups is None:
+            DataBaseCache.__groups = DataBaseCache.database.get_all_groups()
+        return DataBaseCache.__groups
+
+    @staticmethod
+    def get_groups_page(key: str | None, page_size: int, backward: bool) -> list[str]:
+        # Pages are requested explicitly by the user, so they are always fresh
+        return DataBaseCache.database.get_groups_page(key, page_size, backward)
+
+    @staticmethod
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int,
+                               backward: bool) -> list[tuple[str, str | None]]:
+        return DataBaseCache.database.get_grouped_notes_page(key, page_size, backward)
+
+    @staticmethod
+    def get_all_notes() -> list[str]:
+        if DataBaseCache.__notes is None:
+            DataBaseCache.__notes = DataBaseCache.database.get_all_notes()
+        return DataBaseCache.__notes
+
+    @staticmethod
+    def get_all_notes_dates() -> list[tuple[str, str | None, datetime]]:
+        # Loaded once by the autocompletion index, which follows the changes by itself
+        return DataBaseCache.database.get_all_notes_dates()
+
+    @staticmethod
+    def check_group(group_title: str) -> int | None:
+        # Group id is the same as its title, so the cached list of titles is enough
+        if DataBaseCache.__groups is not None:
+            return 1 if group_title in DataBaseCache.__groups else None
+        return DataBaseCache.database.check_group(group_title)
+
+    @staticmethod
+    def check_note(note_title: str) -> Note | None:
+        if note_title in DataBaseCache.__hydrated_notes:
+            return DataBaseCache.__hydrated_notes.get(note_title)
+        # Misses aren't cached: the title may be created right after the check
+        if note := DataBaseCache.database.check_note(note_title):
+            DataBaseCache.__hydrated_notes.set(note_title, note)
+        return note
+
+    @staticmethod
+    def check_notes(note_titles: list[str]) -> list[Note | None]:
+        # Misses are checked by a single bulk call, bulk results aren't cached so they don't evict selected notes
+        missing = [note_title for note_title in note_titles if note_title not in DataBaseCache.__hydrated_notes]
+        found = dict(zip(missing, DataBaseCache.database.check_notes(missing) or [])) if missing else {}
+        return [
+            DataBaseCache.__hydrated_notes.get(note_title) if note_title in DataBaseCache.__hydrated_notes
+            else found.get(note_title)
+            for note_title in note_titles
+        ]
+
+    @staticmethod
+    def get_note_info(note_title: str) -> NoteInfo | None:
+        if note_title in DataBaseCache.__note_infos:
+            return DataBaseCache.__note_infos.get(note_title)
+        if note_info := DataBaseCache.database.get_note_info(note_title):
+            DataBaseCache.__note_infos.set(note_title, note_info)
+        return note_info
+
+    @staticmethod
+    def get_note_text(note_title: str) -> str | None:
+        return DataBaseCache.database.get_note_text(note_title)
+
+    @staticmethod
+    def create_group(group_title: str) -> None:
+        DataBaseCache.database.create_group(group_title)
+        DataBaseCache.__groups = None
+        DataBaseCache.__grouped_notes = None
+        DataBaseCache.__group_notes.pop(group_title)
+
+    @staticmethod
+    def update_group(group_title: str, new_group_title: str) -> None:
+        DataBaseCache.database.update_group(group_title, new_group_title)
+        DataBaseCache.__groups = None
+        DataBaseCache.__grouped_notes = None
+        DataBaseCache.__group_notes.pop(group_title)
+        DataBaseCache.__group_notes.pop(new_group_title)
+
+    @staticmethod
+    def delete_group(group_title: str) -> None:
+        DataBaseCache.database.delete_group(group_title)
+        DataBaseCache.__groups = None
+        DataBaseCache.__group_notes.pop(group_title)
+        # Notes of the deleted group are gone as well, but they may be not listed in the cache
+        DataBaseCache.__hydrated_notes.clear()
+        DataBaseCache.__note_infos.clear()
+        DataBaseCache.__invalidate_listings()
+
+    @staticmethod
+    def create_note(group_title: str, note_title: str, note_text: str) -> None:
+        DataBaseCache.database.create_note(group_title, note_title, note_text)
+        DataBaseCache.__group_notes.pop(group_title)
+        DataBaseCache.__invalidate_note(note_title)
+
+    @staticmethod
+    def update_note(note_title: str, text: str, option: str) -> None:
+        DataBaseCache.database.update_note(note_title, text, option)
+        DataBaseCache.__invalidate_note(note_title)
+        if option == "title":
+            DataBaseCache.__invalidate_note(text)
+
+    @staticmethod
+    def delete_note(note_title: str) -> None:
+        DataBaseCache.database.delete_note(note_title)
+        DataBaseCache.__invalidate_note(note_title)
+
+    @staticmethod
+    def get_note_history(note_title: str) -> list[NoteRevision]:
+        # History is requested explicitly and grows with every edit, so it isn't cached
+        return DataBaseCache.database.get_note_history(note_title)
+
+    @staticmethod
+    def get_note_revision(note_title: str, revision: int) -> str | None:
+        return DataBaseCache.database.get_note_revision(note_title, revision)
+
+    @staticmethod
+    def search_notes(query: str, limit: int) -> list[SearchResult]:
+        return DataBaseCache.database.search_notes(query, limit)
+
+    @staticmethod
+    def import_notes(notes: list[NoteRecord], on_conflict: str) -> int:
+        imported = DataBaseCache.database.import_notes(notes, on_conflict)
+        DataBaseCache.clear()
+        return imported
+
+    @staticmethod
+    def export_notes(batch_size: int) -> Iterator[NoteRecord]:
+        # Exported rows aren't cached, the whole point is to not hold them in memory
+        return DataBaseCache.database.export_notes(batch_size)
@@ -0,0 +1,313 @@
+"""
+Persistent autocompletion indexes of the group and note titles.
+Titles are kept in a prefix tree and in a trigram index, which are updated along with the database changes,
+so the prompt doesn't rebuild any completion data before it opens
+"""
+
+import heapq
+
+from datetime import datetime
+from itertools import islice
+from math import ceil
+from typing import Callable, Iterable, Iterator
+
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.document import Document
+
+
+class TitleTrie:
+    """ Prefix tree of titles. Adding and removing a title costs only its length, regardless of the tree size """
+
+    # Key of the title end marker, children are keyed by single characters, so it can't clash with them
+    __END = ""
+
+    def __init__(self, titles: Iterable[str] = ()):
+        self.__root = {}
+        self.__size = 0
+        self.reset(titles)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __contains__(self, title: str) -> bool:
+        node = self.__find(title)
+        return node is not None and TitleTrie.__END in node
+
+    def __find(self, prefix: str) -> dict | None:
+        node = self.__root
+        for character in prefix:
+            if (node := node.get(character)) is None:
+                return None
+        return node
+
+    def reset(self, titles: Iterable[str]) -> None:
+        self.__root = {}
+        self.__size = 0
+        for title in titles:
+            self.add(title)
+
+    def add(self, title: str) -> None:
+        node = self.__root
+        for character in title:
+            node = node.setdefault(character, {})
+        if TitleTrie.__END not in node:
+            node[TitleTrie.__END] = True
+            self.__size += 1
+
+    def remove(self, title: str) -> None:
+        path = [self.__root]
+        for character in title:
+            if (node := path[-1].get(character)) is None:
+                return
+            path.append(node)
+        if TitleTrie.__END not in path[-1]:
+            return
+        del path[-1][TitleTrie.__END]
+        self.__size -= 1
+
+        # Drops the branch nodes which don't lead to any other title
+        for depth in range(len(title), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][title[depth - 1]]
+
+    def rename(self, title: str, new_title: str) -> None:
+        self.remove(title)
+        self.add(new_title)
+
+    def starting_with(self, prefix: str) -> Iterator[str]:
+        """ :return: Titles with the given prefix in the alphabetical order """
+        if (node := self.__find(prefix)) is None:
+            return
+        stack = [(prefix, node)]
+        while stack:
+            title, node = stack.pop()
+            if TitleTrie.__END in node:
+                yield title
+            # Reversed order on the stack makes the smallest child popped first
+            for character in sorted(node, reverse=True):
+                if character != TitleTrie.__END:
+                    stack.append((title + character, node[character]))
+
+
+class TrieCompleter(Completer):
+    """ Completes the whole rest of the input, so titles with spaces are completed as well """
+
+    def __init__(self, trie: TitleTrie, limit: int):
+        self.trie = trie
+        self.limit = limit
+
+    def get_completions(self, document: Document, complete_event) -> Iterator[Completion]:
+        prefix = document.text_before_cursor
+        for title in islice(self.trie.starting_with(prefix), self.limit):
+            yield Completion(title, start_position=-len(prefix))
+
+
+class FuzzyMatch:
+    def __init__(self, title: str, group_title: str | None, score: float):
+        self.title = title
+        # None for the matched groups
+        self.group_title = group_title
+        self.score = score
+
+
+class FuzzyIndex:
+    """
+    Trigram index of the group and note titles of all groups.
+    A title matches when it contains at least MATCH_RATIO of the query trigrams, so typos are tolerated.
+    Matches are ranked by the share of the matched trigrams, exact substring and prefix bonuses
+    and recency of the note changes
+    """
+    MATCH_RATIO = 0.5
+    SUBSTRING_BONUS = 0.5
+    PREFIX_BONUS = 0.25
+    EXACT_BONUS = 0.25
+    RECENCY_WEIGHT = 0.25
+    # Recency of the note changed this number of days ago is halved
+    RECENCY_HALF_LIFE = 30
+    # Maximum number of scored titles, bounds the time of the queries matching a lot of titles
+    CANDIDATES_LIMIT = 1000
+    # Maximum number of titles checked for the exact query substring before the candidates are limited
+    SUBSTRING_SCAN_LIMIT = 10000
+
+    def __init__(self):
+        self.__next_id = 0
+        # id -> (lowercase title, title, group title (None for groups), last change timestamp)
+        self.__entries: dict[int, tuple[str, str, str | None, float]] = {}
+        self.__group_ids: dict[str, int] = {}
+        self.__note_ids: dict[str, int] = {}
+        # Ids of every group notes, used by the group renaming/deletion and filtered searches
+        self.__group_notes: dict[str, set[int]] = {}
+        self.__postings: dict[str, set[int]] = {}
+
+    @staticmethod
+    def grams(title: str) -> set[str]:
+        """ Trigrams of the title and two-character starts of its words, used by the short queries """
+        text = f" {title.lower()}"
+        grams = {text[index:index + 3] for index in range(len(text) - 2)}
+        grams.update(text[index:index + 2] for index in range(len(text) - 1) if text[index] == " ")
+        return grams
+
+    @staticmethod
+    def query_grams(query: str) -> set[str]:
+        """ Queries shorter than a trigram match the starts of the title words """
+        if len(query) < 3:
+            return {f" {query}"}
+        return {query[index:index + 3] for index in range(len(query) - 2)}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __add(self, title: str, group_title: str | None, timestamp: float) -> int:
+        entry_id = self.__next_id
+        self.__next_id += 1
+        self.__entries[entry_id] = (title.lower(), title, group_title, timestamp)
+        for gram in FuzzyIndex.grams(title):
+            self.__postings.setdefault(gram, set()).add(entry_id)
+        return entry_id
+
+    def __remove(self, entry_id: int) -> tuple[str, str, str | None, float]:
+        entry = self.__entries.pop(entry_id)
+        for gram in FuzzyIndex.grams(entry[1]):
+            posting = self.__postings[gram]
+            posting.discard(entry_id)
+            if not posting:
+                del self.__postings[gram]
+        return entry
+
+    def reset(self, groups: Iterable[str], notes: Iterable[tuple[str, str | None, datetime]]) -> None:
+        """ :param notes: (title, group title, last change date) of every note """
+        self.__init__()
+        for group_title in groups:
+            self.add_group(group_title)
+        # Ids are given in the order of the changes, see search()
+        for note_title, group_title, last_change_date in sorted(notes, key=lambda note: note[2]):
+            self.add_note(note_title, group_title, last_change_date)
+
+    def add_group(self, group_title: str) -> None:
+        if group_title not in self.__group_ids:
+            self.__group_ids[group_title] = self.__add(group_title, None, 0)
+
+    def rename_group(self, group_title: str, new_group_title: str) -> None:
+        if (group_id := self.__group_ids.pop(group_title, None)) is None:
+            return
+        self.__remove(group_id)
+        self.add_group(new_group_title)
+        note_ids = self.__group_notes.pop(group_title, set())
+        self.__group_notes[new_group_title] = note_ids
+        for note_id in note_ids:
+            lowercase_title, title, _, timestamp = self.__entries[note_id]
+            self.__entries[note_id] = (lowercase_title, title, new_group_title, timestamp)
+
+    def remove_group(self, group_title: str) -> None:
+        """ Removes the group together with its notes """
+        if (group_id := self.__group_ids.pop(group_title, None)) is not None:
+            self.__remove(group_id)
+        for note_id in self.__group_notes.pop(group_title, set()):
+            del self.__note_ids[self.__remove(note_id)[1]]
+
+    def add_note(self, note_title: str, group_title: str | None, last_change_date: datetime) -> None:
+        self.remove_note(note_title)
+        self.__note_ids[note_title] = note_id = self.__add(note_title, group_title, last_change_date.timestamp())
+        self.__group_notes.setdefault(group_title, set()).add(note_id)
+
+    def rename_note(self, note_title: str, new_note_title: str, last_change_date: datetime) -> None:
+        if (note_id := self.__note_ids.get(note_title)) is not None:
+            group_title = self.__entries[note_id][2]
+            self.remove_note(note_title)
+            self.add_note(new_note_title, group_title, last_change_date)
+
+    def touch_note(self, note_title: str, last_change_date: datetime) -> None:
+        """ Updates recency of the changed note, the note is added again to get the newest id """
+        if (note_id := self.__note_ids.get(note_title)) is not None:
+            self.add_note(note_title, self.__entries[note_id][2], last_change_date)
+
+    def remove_note(self, note_title: str) -> None:
+        if (note_id := self.__note_ids.pop(note_title, None)) is not None:
+            self.__group_notes[self.__remove(note_id)[2]].discard(note_id)
+
+    def group_of(self, note_title: str) -> str | None:
+        if (note_id := self.__note_ids.get(note_title)) is not None:
+            return self.__entries[note_id][2]
+
+    def search(self, query: str, limit: int, group_title: str | None = None) -> list[FuzzyMatch]:
+        """
+        :param query: Part of the title with possible typos
+        :param limit: Maximum number of matches
+        :param group_title: Search only notes of this group, otherwise every group and note is searched
+
+        :return: Best matches in the descending score order
+        """
+        query = query.lower()
+        group_notes = self.__group_notes.get(group_title, set()) if group_title is not None else None
+        if not query.strip():
+            # Without a query the most recently changed notes of the group are suggested
+            candidates, postings, required, few_full_matches = group_notes or set(), [], 0, set()
+        else:
+            postings = [self.__postings.get(gram, set()) for gram in FuzzyIndex.query_grams(query)]
+            if group_notes is not None:
+                postings = [posting & group_notes for posting in postings]
+            postings.sort(key=len)
+            required = max(1, ceil(len(postings) * FuzzyIndex.MATCH_RATIO))
+
+            full_matches = set()
+            if len(postings[0]) > FuzzyIndex.CANDIDATES_LIMIT:
+                # Even the rarest trigram is common, so titles with typos can't outrank the ones containing all of them
+                full_matches = postings[0].intersection(*postings[1:])
+            if len(full_matches) >= limit:
+                candidates, few_full_matches = full_matches, set()
+            else:
+                # Every title with enough matched trigrams contains at least one of the rarest ones
+                candidates, few_full_matches = set().union(*postings[:len(postings) - required + 1]), full_matches
+
+            if FuzzyIndex.CANDIDATES_LIMIT < len(candidates) <= FuzzyIndex.SUBSTRING_SCAN_LIMIT and len(postings) > 1:
+                # Trigrams of the longer queries may be scattered over the title, exact substrings go first
+                substring_matches = {entry_id for entry_id in candidates if query in self.__entries[entry_id][0]}
+                if len(substring_matches) >= limit:
+                    candidates = substring_matches
+        if len(candidates) > FuzzyIndex.CANDIDATES_LIMIT:
+            # Ids grow with every change, so the most recently changed candidates are kept with the full matches
+            candidates = few_full_matches.union(sorted(candidates)[-FuzzyIndex.CANDIDATES_LIMIT:])
+
+        now = datetime.now().timestamp()
+        scored = []
+        for entry_id in candidates:
+            matched = sum(entry_id in posting for posting in postings)
+            if matched < required:
+                continue
+            lowercase_title, title, entry_group_title, timestamp = self.__entries[entry_id]
+            score = matched / len(postings) if postings else 0
+            if postings and (position := lowercase_title.find(query)) >= 0:
+                score += FuzzyIndex.SUBSTRING_BONUS + (FuzzyIndex.PREFIX_BONUS if not position else 0)
+                if lowercase_title == query:
+                    score += FuzzyIndex.EXACT_BONUS
+            if timestamp:
+                age_days = max(now - timestamp, 0) / 86400
+                score += FuzzyIndex.RECENCY_WEIGHT * 0.5 ** (age_days / FuzzyIndex.RECENCY_HALF_LIFE)
+            scored.append((score, entry_id, title, entry_group_title))
+        return [
+            FuzzyMatch(title, entry_group_title, score)
+            for score, _, title, entry_group_title in heapq.nlargest(limit, scored)
+        ]
+
+
+class FuzzyCompleter(Completer):
+    """ Completes titles with the best fuzzy matches, note matches show their group """
+
+    def __init__(self, index: FuzzyIndex, limit: int, group_title: Callable[[], str | None] | None = None):
+        """ :param group_title: Returns the group to search notes in, every group and note is searched without it """
+        self.index = index
+        self.limit = limit
+        self.group_title = group_title
+
+    def get_completions(self, document: Document, complete_event) -> Iterator[Completion]:
+        query = document.text_before_cursor
+        group_title = self.group_title() if self.group_title else None
+        if self.group_title and group_title is None:
+            return
+        for match in self.index.search(query, self.limit, group_title):
+            yield Completion(
+                match.title,
+                start_position=-len(query),
+                display_meta="group" if match.group_title is None else f"note in {match.group_title}"
+            )
@@ -4,11 +4,18 @@ Includes realization of text editor and commands auto-completion
 """
 
 import prompt_toolkit
-from prompt_toolkit.completion import NestedCompleter
+from prompt_toolkit.completion import NestedCompleter, DynamicCompleter
 from prompt_toolkit.clipboard.pyperclip import PyperclipClipboard
 
+from datetime import datetime
+
+from view import View
+from screen import Screen
+from completion import TitleTrie, TrieCompleter, FuzzyIndex, FuzzyCompleter
+
+from settings.colors import TEXT_COLOR
 # Constants for enabling/disabling text editor features:
-from settings.config import AUTO_COMPLETION, TOOLBAR, LINE_SYMBOL
+from settings.config import AUTO_COMPLETION, TOOLBAR, LINE_SYMBOL, COMPLETION_LIMIT, TEXT_LINE_LIMIT, TITLE_LIMIT
 
 
 class CustomInput:
@@ -16,38 +23,77 @@ class CustomInput:
     # System clipboard
     clipboard = PyperclipClipboard()
 
-    # List of groups and notes for the autocompletion
-    __groups = []
-    __notes = []
+    # Group titles for the prefix autocompletion and every group and note title for the fuzzy one.
+    # App keeps them in sync with the database changes, so the completer is built only once after they are loaded
+    __groups = TitleTrie()
+    __titles = FuzzyIndex()
+    # Notes of the attached group are suggested by the 'note select' command
+    __attached_group = None
+    __completer = None
 
     @staticmethod
-    def __set_groups(groups: list[str]) -> None:
-        CustomInput.__groups = groups
+    def set_titles(groups: list[str], notes: list[tuple[str, str | None, datetime]]) -> None:
+        """
+        Titles are loaded in a background thread while the prompt is shown, so the new indexes are filled first
+        and then replace the old ones along with the completer using them
+
+        :param groups: Titles of all groups
+        :param notes: (title, group title, last change date) of all notes
+        """
+        titles_trie, titles_index = TitleTrie(), FuzzyIndex()
+        titles_trie.reset(groups or [])
+        titles_index.reset(groups or [], notes or [])
+        CustomInput.__groups, CustomInput.__titles = titles_trie, titles_index
+        CustomInput.__completer = None
 
     @staticmethod
-    def __get_groups() -> dict[str: None]:
-        return {group_name: None for group_name in CustomInput.__groups}
+    def set_attached_group(group_title: str | None) -> None:
+        CustomInput.__attached_group = group_title
 
     @staticmethod
-    def __set_notes(notes: list[str]) -> None:
-        CustomInput.__notes = notes if notes else []
+    def add_group(group_title: str) -> None:
+        CustomInput.__groups.add(group_title)
+        CustomInput.__titles.add_group(group_title)
 
     @staticmethod
-    def __get_notes() -> dict[str: None]:
-        return {note_name: None for note_name in CustomInput.__notes}
+    def rename_group(group_title: str, new_group_title: str) -> None:
+        CustomInput.__groups.rename(group_title, new_group_title)
+        CustomInput.__titles.rename_group(group_title, new_group_title)
 
     @staticmethod
-    def command_input(groups: list[str], notes: list[str]) -> str:
-        """
-        :param groups: List of the groups from the database
-        :param notes: List of the attached group notes
+    def remove_group(group_title: str) -> None:
+        CustomInput.__groups.remove(group_title)
+        CustomInput.__titles.remove_group(group_title)
 
-        :return: text of user's command
-        """
-        CustomInput.__set_groups(groups)
-        CustomInput.__set_notes(notes)
-        return prompt_toolkit.prompt(LINE_SYMBOL,
-                                     completer=NestedCompleter.from_nested_dict(CustomInput.__autocompletion_keys()))
+    @staticmethod
+    def add_note(note_title: str, group_title: str) -> None:
+        CustomInput.__titles.add_note(note_title, group_title, datetime.now())
+
+    @staticmethod
+    def touch_note(note_title: str) -> None:
+        """ Moves the changed note up in the fuzzy autocompletion """
+        CustomInput.__titles.touch_note(note_title, datetime.now())
+
+    @staticmethod
+    def rename_note(note_title: str, new_note_title: str) -> None:
+        CustomInput.__titles.rename_note(note_title, new_note_title, datetime.now())
+
+    @staticmethod
+    def remove_note(note_title: str) -> None:
+        CustomInput.__titles.remove_note(note_title)
+
+    @staticmethod
+    def command_input() -> str:
+        """ :return: text of user's command """
+        Screen.flush()
+        # Prompt shown before the titles are loaded picks up the new completer
+        return prompt_toolkit.prompt(LINE_SYMBOL, completer=DynamicCompleter(CustomInput.get_completer))
+
+    @staticmethod
+    def get_completer() -> NestedCompleter:
+        if CustomInput.__completer is None:
+            CustomInput.__completer = NestedCompleter.from_nested_dict(CustomInput.__autocompletion_keys())
+        return CustomInput.__completer
 
     @staticmethod
     def text_editor(buffered_text="", multiline=True) -> str:
@@ -60,6 +106,7 @@ class CustomInput:
         When launching text editor, buffered_text will be automatically inserted the buffer of text editor and
         system clipboard
         """
+        Screen.flush()
         CustomInput.clipboard.set_text(buffered_text)
         text = prompt_toolkit.prompt(
             LINE_SYMBOL,
@@ -67,10 +114,18 @@ class CustomInput:
             clipboard=CustomInput.clipboard,
             multiline=multiline,
             bottom_toolbar=CustomInput.__toolbar(multiline) if TOOLBAR else False,
-            rprompt='100 character per string limit!' if multiline else '30 character limit!',
+            rprompt=f'{TEXT_LINE_LIMIT} character per string limit!' if multiline else f'{TITLE_LIMIT} character limit!',
             default=buffered_text
         )
-        return "\n".join([row[:100] for row in text.replace("\r", "").split("\n")]) if multiline else text[:30]
+        return "\n".join([row[:TEXT_LINE_LIMIT] for row in text.replace("\r", "").split("\n")]) if multiline \
+            else text[:TITLE_LIMIT]
+
+    @staticmethod
+    def confirmation_input(question: str) -> str:
+        """ :return: User's answer to the question """
+        View.print_error_message(f"{question}{TEXT_COLOR}")
+        Screen.flush()
+        return input(LINE_SYMBOL)
 
     @staticmethod
     def __toolbar(multiline: bool) -> str:
@@ -89,10 +144,14 @@ class CustomInput:
     @staticmethod
     def __autocompletion_keys() -> dict:
         """
-        :return: Dictionary with autocompletion tips. Notes and group titles change after corresponding database changes
+        :return: Dictionary with autocompletion tips. Titles are completed from the trie and the fuzzy index,
+        which change after corresponding database changes
 
         Can be disabled with the 'AUTO_COMPLETION' constant
         """
+        groups = TrieCompleter(CustomInput.__groups, COMPLETION_LIMIT)
+        attached_group_notes = FuzzyCompleter(CustomInput.__titles, COMPLETION_LIMIT,
+                                              lambda: CustomInput.__attached_group)
         return {
                 "help": {
                     "groups": None,
@@ -100,12 +159,22 @@ class CustomInput:
                 },
                 "cls": None,
                 "quit": None,
-                "groups": None,
-                "notes": None,
+                "stats": {
+                    "dump": None,
+                    "reset": None,
+                },
+                "groups": {
+                    "next": None,
+                    "prev": None,
+                },
+                "notes": {
+                    "next": None,
+                    "prev": None,
+                },
                 "group": {
                     "create": None,
-                    "delete": CustomInput.__get_groups(),
-                    "select": CustomInput.__get_groups(),
+                    "delete": groups,
+                    "select": groups,
                     "edit": {
                         "title": None
                     }
@@ -115,11 +184,27 @@ class CustomInput:
                     "info": None,
                     "delete": None,
                     "copy": None,
+                    "history": None,
+                    "diff": None,
+                    "restore": None,
+                    "search": None,
                     "create": None,
                     "edit": {
                         "text": None,
                         "title": None,
                     },
-                    "select": CustomInput.__get_notes(),
-                    }
+                    "select": attached_group_notes,
+                    },
+                "jump": FuzzyCompleter(CustomInput.__titles, COMPLETION_LIMIT),
+                "import": {
+                    "skip": None,
+                    "overwrite": None,
+                    "rename": None,
+                },
+                "export": {
+                    "jsonl": None,
+                    "markdown": None,
+                    "tar.gz": None,
+                    "tar.zst": None,
+                }
             } if AUTO_COMPLETION else {}
@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator
+from .note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from .idatabase import DataBase
+
+
+class AsyncDataBase(ABC):
+    """ Asyncio counterpart of the :class:`DataBase` interface """
+    paint_grouped_notes = staticmethod(DataBase.paint_grouped_notes)
+
+    @staticmethod
+    @abstractmethod
+    async def get_grouped_notes() -> list[str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_attached_group_notes(group_title: str) -> list[str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_all_groups() -> list[str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_all_notes() -> list[str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_all_notes_dates() -> list[tuple[str, str | None, datetime]]:
+        """ :return: (title, group title, last change date) of every note """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def check_group(group_title) -> int | None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def check_note(note_title: str) -> Note | None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def create_group(group_title: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def update_group(group_title: str, new_group_title: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def delete_group(group_title: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def create_note(group_title: str, note_title: str, note_text: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def update_note(note_title: str, text: str, option: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def delete_note(note_title: str) -> None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def import_notes(notes: list[NoteRecord], on_conflict: str) -> int:
+        """
+        :param notes: Batch of the notes, groups of the notes should already exist
+        :param on_conflict: 'skip' keeps existing notes, 'overwrite' replaces their text and group
+
+        :return: Number of the imported notes
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def export_notes(batch_size: int) -> AsyncIterator[NoteRecord]:
+        """
+        Streams every note with its group. Rows are fetched from the server in batches,
+        so memory usage doesn't depend on the number of notes
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def search_notes(query: str, limit: int) -> list[SearchResult]:
+        """
+        Full-text search over the note titles and texts
+
+        :return: Up to limit notes ordered by relevance, headlines include HIGHLIGHT_START/HIGHLIGHT_STOP markers
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_groups_page(key: str | None, page_size: int, backward: bool) -> list[str]:
+        """
+        Keyset pagination of the group titles
+
+        :param key: Last title of the previous page (first title of the next page if backward), None for the start
+        :param page_size: Maximum number of titles
+        :param backward: Fetch the page before the key
+
+        :return: Titles in the ascending order
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int,
+                                     backward: bool) -> list[tuple[str, str | None]]:
+        """
+        Keyset pagination of the notes grouped by their groups
+
+        :param key: (group title, note title) of the last/first row of the neighbouring page, None for the start
+
+        :return: (group title, note title) rows ordered by both titles, empty groups have a None note title
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_note_info(note_title: str) -> NoteInfo | None:
+        """ Metadata of the note, its text isn't sent over the network """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_note_text(note_title: str) -> str | None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_note_history(note_title: str) -> list[NoteRevision]:
+        """
+        Revisions are recorded by every text update, the first one keeps the text before the first update
+
+        :return: Revisions of the note ordered by their numbers
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    async def get_note_revision(note_title: str, revision: int) -> str | None:
+        """ :return: Text of the note revision rebuilt from the nearest snapshot, None if it doesn't exist """
+        pass
@@ -1,9 +1,49 @@
 from abc import ABC, abstractmethod
-from .note import Note
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+from .note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+
+from settings.colors import GROUP_COLOR, TEXT_COLOR, ERROR_COLOR
 
 
 class DataBase(ABC):
     """ Database Interface """
+    @staticmethod
+    def paint_grouped_notes(grouped_notes: list[tuple[str, list[str]]]) -> list[str]:
+        """
+        :param grouped_notes: Pairs of the group title and titles of its notes
+
+        :return: Column of painted group titles followed by the numbered note titles
+        """
+        column = []
+        for group_title, note_titles in grouped_notes:
+            # Painting group name
+            column.append(f"{GROUP_COLOR}Group: {group_title}{TEXT_COLOR}")
+            # if group is empty
+            if note_titles:
+                for index, title in enumerate(note_titles, start=1):
+                    column.append(f"{index}. {title}")
+            else:
+                column.append(ERROR_COLOR + "empty group" + TEXT_COLOR)
+            column.append("")
+        return column[:-1]
+
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[None]:
+        """
+        Runs every call made inside it in a single transaction, which is committed at the end
+        and rolled back when an exception leaves it.
+        Implementations without it run every call in its own transaction
+        """
+        yield
+
+    @staticmethod
+    def is_transactional() -> bool:
+        """ :return: Whether transaction() rolls back the calls made inside it, the default one doesn't """
+        return False
+
     @staticmethod
     @abstractmethod
     def get_grouped_notes() -> list[str]:
@@ -24,6 +64,12 @@ class DataBase(ABC):
     def get_all_notes() -> list[str]:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def get_all_notes_dates() -> list[tuple[str, str | None, datetime]]:
+        """ :return: (title, group title, last change date) of every note """
+        pass
+
     @staticmethod
     @abstractmethod
     def check_group(group_title) -> int | None:
@@ -34,6 +80,16 @@ class DataBase(ABC):
     def check_note(note_title: str) -> Note | None:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def check_notes(note_titles: list[str]) -> list[Note | None]:
+        """
+        Bulk version of check_note(), implementations may send the lookups concurrently
+
+        :return: Notes in the order of the titles, None for the missing ones
+        """
+        pass
+
     @staticmethod
     @abstractmethod
     def create_group(group_title: str) -> None:
@@ -64,3 +120,86 @@ class DataBase(ABC):
     def delete_note(note_title: str) -> None:
         pass
 
+    @staticmethod
+    @abstractmethod
+    def import_notes(notes: list[NoteRecord], on_conflict: str) -> int:
+        """
+        :param notes: Batch of the notes, groups of the notes should already exist
+        :param on_conflict: 'skip' keeps existing notes, 'overwrite' replaces their text and group
+
+        :return: Number of the imported notes
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def export_notes(batch_size: int) -> Iterator[NoteRecord]:
+        """
+        Streams every note with its group. Rows are fetched from the server in batches,
+        so memory usage doesn't depend on the number of notes
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def search_notes(query: str, limit: int) -> list[SearchResult]:
+        """
+        Full-text search over the note titles and texts
+
+        :return: Up to limit notes ordered by relevance, headlines include HIGHLIGHT_START/HIGHLIGHT_STOP markers
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_groups_page(key: str | None, page_size: int, backward: bool) -> list[str]:
+        """
+        Keyset pagination of the group titles
+
+        :param key: Last title of the previous page (first title of the next page if backward), None for the start
+        :param page_size: Maximum number of titles
+        :param backward: Fetch the page before the key
+
+        :return: Titles in the ascending order
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int,
+                               backward: bool) -> list[tuple[str, str | None]]:
+        """
+        Keyset pagination of the notes grouped by their groups
+
+        :param key: (group title, note title) of the last/first row of the neighbouring page, None for the start
+
+        :return: (group title, note title) rows ordered by both titles, empty groups have a None note title
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_note_info(note_title: str) -> NoteInfo | None:
+        """ Metadata of the note, its text isn't sent over the network """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_note_text(note_title: str) -> str | None:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_note_history(note_title: str) -> list[NoteRevision]:
+        """
+        Revisions are recorded by every text update, the first one keeps the text before the first update
+
+        :return: Revisions of the note ordered by their numbers
+        """
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_note_revision(note_title: str, revision: int) -> str | None:
+        """ :return: Text of the note revision rebuilt from the nearest snapshot, None if it doesn't exist """
+        pass
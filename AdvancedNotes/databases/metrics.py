@@ -0,0 +1,247 @@
+"""
+Instrumentation of the database calls.
+Counts calls, round trips to the database, returned rows and bytes and keeps latency histograms
+per DataBase method and per user command.
+Round trips are reported by the backends through their driver hooks, see Metrics.round_trip(),
+errors printed instead of being raised are reported by the View, see Metrics.error()
+"""
+
+import json
+import threading
+
+from contextvars import ContextVar
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+from typing import Callable, Iterator
+
+from .idatabase import DataBase
+
+# Upper bounds of the latency histogram buckets in milliseconds, the last bucket is unbounded
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, percent: float) -> float:
+        """ :return: Upper bound of the bucket with the percentile, so it's never underestimated """
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0,
+            **{f"p{percent}_ms": round(self.percentile(percent), 3) for percent in PERCENTILES},
+            "max_ms": round(self.max, 3),
+            "buckets": {
+                f"<={bound}" if index < len(LATENCY_BUCKETS) else f">{LATENCY_BUCKETS[-1]}": count
+                for index, (bound, count) in enumerate(zip((*LATENCY_BUCKETS, None), self.counts)) if count
+            }
+        }
+
+
+class CallStats:
+    """ Totals of the database method calls, or of the user commands along with their database calls """
+    def __init__(self):
+        self.calls = 0
+        self.database_calls = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def add(self, milliseconds: float, database_calls: int, round_trips: int, rows: int, size: int,
+            failed: bool) -> None:
+        self.calls += 1
+        self.database_calls += database_calls
+        self.round_trips += round_trips
+        self.rows += rows
+        self.bytes += size
+        self.errors += failed
+        self.latency.add(milliseconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "database_calls": self.database_calls,
+            "round_trips": self.round_trips,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            **self.latency.to_dict()
+        }
+
+
+class Totals:
+    """ Running totals of a thread, calls and commands take the difference between their start and end """
+    def __init__(self):
+        self.database_calls = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def values(self) -> tuple[int, int, int, int, int]:
+        return self.database_calls, self.round_trips, self.rows, self.bytes, self.errors
+
+
+class Metrics:
+    methods: dict[str, CallStats] = {}
+    commands: dict[str, CallStats] = {}
+    started = datetime.now()
+
+    __lock = threading.Lock()
+    # Every thread has its own totals, so the background threads aren't charged to the foreground command.
+    # Coroutines run by the async engine get a copy of the context of the waiting thread along with its totals
+    __totals: ContextVar[Totals] = ContextVar("totals")
+
+    @staticmethod
+    def totals() -> Totals:
+        if (totals := Metrics.__totals.get(None)) is None:
+            totals = Totals()
+            Metrics.__totals.set(totals)
+        return totals
+
+    @staticmethod
+    def round_trip(count: int = 1) -> None:
+        """ Called by the driver hooks of the backends for every statement or command sent to the database """
+        Metrics.totals().round_trips += count
+
+    @staticmethod
+    def error() -> None:
+        """ Called for every shown error message, backends show their errors instead of raising them """
+        Metrics.totals().errors += 1
+
+    @staticmethod
+    def size(value) -> int:
+        """ :return: Approximate number of bytes of the returned value, texts are counted in UTF-8 """
+        if value is None:
+            return 0
+        if isinstance(value, str):
+            return len(value.encode())
+        if isinstance(value, (list, tuple, set)):
+            return sum(Metrics.size(item) for item in value)
+        if isinstance(value, dict):
+            return sum(Metrics.size(item) for item in value.values())
+        if hasattr(value, "__dict__"):
+            return sum(Metrics.size(item) for item in vars(value).values())
+        return 8
+
+    @staticmethod
+    def rows(value) -> int:
+        if isinstance(value, (list, tuple)):
+            return len(value)
+        return int(value is not None)
+
+    @staticmethod
+    def __record(name: str, start: float, begin: tuple[int, ...], rows: int, size: int, failed: bool) -> None:
+        """ :param begin: Totals.values() at the start of the call """
+        milliseconds = (perf_counter() - start) * 1000
+        totals = Metrics.totals()
+        round_trips = totals.round_trips - begin[1]
+        failed = failed or totals.errors > begin[4]
+        totals.database_calls += 1
+        totals.rows += rows
+        totals.bytes += size
+        with Metrics.__lock:
+            Metrics.methods.setdefault(name, CallStats()).add(milliseconds, 1, round_trips, rows, size, failed)
+
+    @staticmethod
+    def measured(name: str, method: Callable) -> Callable:
+        """ Wraps the database method, iterators are measured until they are exhausted """
+
+        def stream(iterator: Iterator, start: float, begin: tuple[int, ...]) -> Iterator:
+            rows, size, failed = 0, 0, True
+            try:
+                for item in iterator:
+                    rows += 1
+                    size += Metrics.size(item)
+                    yield item
+                failed = False
+            finally:
+                Metrics.__record(name, start, begin, rows, size, failed)
+
+        def wrapper(*args):
+            start, begin = perf_counter(), Metrics.totals().values()
+            try:
+                result = method(*args)
+            except Exception:
+                Metrics.__record(name, start, begin, 0, 0, True)
+                raise
+            if isinstance(result, Iterator):
+                return stream(result, start, begin)
+            Metrics.__record(name, start, begin, Metrics.rows(result), Metrics.size(result), False)
+            return result
+        return wrapper
+
+    @staticmethod
+    def instrumented(database: DataBase) -> DataBase:
+        """ :return: DataBase implementation which measures every method of the given one """
+        methods = {
+            name: staticmethod(Metrics.measured(name, getattr(database, name)))
+            for name in DataBase.__abstractmethods__
+        }
+        # Calls made inside the transaction are measured one by one
+        methods["transaction"] = staticmethod(database.transaction)
+        methods["is_transactional"] = staticmethod(database.is_transactional)
+        return type(f"Measured{type(database).__name__}", (DataBase,), methods)()
+
+    @staticmethod
+    @contextmanager
+    def command(name: str):
+        """ Measures the user command along with the database calls made by it """
+        start, totals, failed = perf_counter(), Metrics.totals().values(), True
+        try:
+            yield
+            failed = False
+        finally:
+            milliseconds = (perf_counter() - start) * 1000
+            database_calls, round_trips, rows, size, errors = (
+                end - begin for end, begin in zip(Metrics.totals().values(), totals)
+            )
+            with Metrics.__lock:
+                Metrics.commands.setdefault(name, CallStats()).add(
+                    milliseconds, database_calls, round_trips, rows, size, failed or errors > 0
+                )
+
+    @staticmethod
+    def reset() -> None:
+        with Metrics.__lock:
+            Metrics.methods = {}
+            Metrics.commands = {}
+            Metrics.started = datetime.now()
+
+    @staticmethod
+    def to_dict() -> dict:
+        with Metrics.__lock:
+            return {
+                "started": Metrics.started.isoformat(timespec="seconds"),
+                "dumped": datetime.now().isoformat(timespec="seconds"),
+                "methods": {name: stats.to_dict() for name, stats in sorted(Metrics.methods.items())},
+                "commands": {name: stats.to_dict() for name, stats in sorted(Metrics.commands.items())}
+            }
+
+    @staticmethod
+    def dump(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(Metrics.to_dict(), file, indent=2)
@@ -9,3 +9,10 @@ load_dotenv()
 # Database constants
 MongoDB_HOST = os.environ.get("MongoDB_HOST")[::]
 MongoDB_PORT = os.environ.get("MongoDB_PORT")[::]
+
+# Write concern of the writes and the transactions, which wait for it once at their commit:
+# number of the acknowledging nodes or "majority" (transactions need at least 1), journal acknowledgement
+# ("true"/"false", server default when it isn't set) and the acknowledgement timeout in milliseconds
+MongoDB_WRITE_CONCERN = os.environ.get("MongoDB_WRITE_CONCERN", "majority")
+MongoDB_JOURNAL = os.environ.get("MongoDB_JOURNAL")
+MongoDB_WRITE_TIMEOUT = os.environ.get("MongoDB_WRITE_TIMEOUT")
@@ -1,16 +1,85 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, TEXT, monitoring
+from pymongo.errors import ServerSelectionTimeoutError, OperationFailure
 from colorama import Fore
 
-from .config import MongoDB_HOST, MongoDB_PORT
+from screen import Screen
+
+from .config import MongoDB_HOST, MongoDB_PORT, MongoDB_WRITE_CONCERN, MongoDB_JOURNAL, MongoDB_WRITE_TIMEOUT
+from ..metrics import Metrics
+
+
+class CommandCounter(monitoring.CommandListener):
+    """ Reports every command sent to the server (including getMore of the cursors) to the :class:`Metrics` """
+    def started(self, event) -> None:
+        Metrics.round_trip()
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+# Listeners registered globally apply to every client created afterwards, including the motor ones
+monitoring.register(CommandCounter())
+
+# Only replica sets and sharded clusters support multi-document transactions, standalone servers don't
+TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
 
 
 class MongoDBConnection:
+    # One client per process, MongoClient is thread-safe and keeps its own connection pool
+    client: MongoClient = None
+
     @staticmethod
     def check_connection():
         try:
-            client = MongoClient(MongoDB_HOST, int(MongoDB_PORT))["mynotes"]
-            client["groups"].find_one({"title": "Home"})
-        except TypeError:
-            print(f"\n{Fore.LIGHTYELLOW_EX}Invalid connection parameters or database doesn't exists")
+            if MongoDBConnection.client is None:
+                MongoDBConnection.client = MongoClient(MongoDB_HOST, int(MongoDB_PORT),
+                                                       **MongoDBConnection.client_options())
+            database = MongoDBConnection.client["mynotes"]
+            database.command("ping")
+            MongoDBConnection.ensure_indexes(database)
+        except (TypeError, ServerSelectionTimeoutError):
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Invalid connection parameters or database doesn't exists")
         else:
-            return client
+            return database
+
+    @staticmethod
+    def client_options() -> dict:
+        """ :return: Write concern options of the sync and async clients """
+        options = {"w": int(MongoDB_WRITE_CONCERN) if MongoDB_WRITE_CONCERN.isdigit() else MongoDB_WRITE_CONCERN}
+        if MongoDB_JOURNAL is not None:
+            options["journal"] = MongoDB_JOURNAL.lower() == "true"
+        if MongoDB_WRITE_TIMEOUT:
+            options["wTimeoutMS"] = int(MongoDB_WRITE_TIMEOUT)
+        return options
+
+    @staticmethod
+    def supports_transactions(client) -> bool:
+        """ Topology is known after the first command sent by the client """
+        return client.topology_description.topology_type_name in TRANSACTION_TOPOLOGIES
+
+    @staticmethod
+    def ensure_indexes(database) -> None:
+        """
+        Creates indexes for the fields every DataBaseMongoImp method filters on.
+        create_index() is a no-op for existing indexes, so it's safe to call on every launch
+        """
+        try:
+            database["groups"].create_index([("id", ASCENDING)], unique=True)
+            database["groups"].create_index([("title", ASCENDING)])
+            database["notes"].create_index([("id", ASCENDING)], unique=True)
+            database["notes"].create_index([("group_id", ASCENDING), ("title", ASCENDING)])
+            database["notes"].create_index([("title", ASCENDING)])
+            # Collection can have only one text index, so titles and texts share it
+            database["notes"].create_index(
+                [("title", TEXT), ("text", TEXT)],
+                weights={"title": 10, "text": 1},
+                default_language="none",
+                name="notes_text_idx"
+            )
+            database["note_revisions"].create_index([("note_id", ASCENDING), ("revision", ASCENDING)], unique=True)
+        except OperationFailure as error:
+            # Existing duplicated ids can't be covered by a unique index
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Couldn't create indexes: {error}")
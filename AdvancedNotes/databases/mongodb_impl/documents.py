@@ -0,0 +1,155 @@
+"""
+Documents of the MongoDB collections shared by the pymongo and motor implementations,
+so both engines differ only in the way they call the driver
+"""
+
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from ..note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from ..revisions import Revisions
+from ..search import Headline
+
+# Projection of the search, the text is used to build the headlines
+SEARCH_PROJECTION = {"_id": 0, "title": 1, "group_id": 1, "text": 1, "score": {"$meta": "textScore"}}
+SEARCH_SORT = [("score", {"$meta": "textScore"})]
+CHAIN_PROJECTION = {"_id": 0, "revision": 1, "snapshot": 1, "data": 1}
+
+
+class Documents:
+    @staticmethod
+    def note(group_title: str, note_title: str, note_text: str) -> dict:
+        now = datetime.now()
+        return {
+            "id": note_title,
+            "group_id": group_title,
+            "title": note_title,
+            "text": note_text,
+            "creation_date": now,
+            "last_change_date": now
+        }
+
+    @staticmethod
+    def to_note(note_title: str, note_data: dict) -> Note:
+        return Note(
+            note_id=note_title,
+            title=note_title,
+            text=note_data["text"],
+            creation_date=note_data["creation_date"],
+            last_change_date=note_data["last_change_date"]
+        )
+
+    @staticmethod
+    def to_note_info(note_title: str, note_data: dict) -> NoteInfo:
+        """ :param note_data: Document of the Pipelines.note_info() pipeline """
+        return NoteInfo(
+            note_id=note_data["id"],
+            title=note_title,
+            group_title=note_data.get("group_id"),
+            creation_date=note_data["creation_date"],
+            last_change_date=note_data["last_change_date"],
+            length=note_data["length"],
+            lines=note_data["lines"]
+        )
+
+    @staticmethod
+    def to_note_record(note_data: dict) -> NoteRecord:
+        return NoteRecord(
+            group_title=note_data["group_id"],
+            title=note_data["title"],
+            text=note_data["text"],
+            creation_date=note_data["creation_date"],
+            last_change_date=note_data["last_change_date"]
+        )
+
+    @staticmethod
+    def to_note_revisions(found: list[dict]) -> list[NoteRevision]:
+        """ :param found: Documents of the Pipelines.note_history() pipeline """
+        return [NoteRevision(**revision_data) for revision_data in found]
+
+    @staticmethod
+    def to_search_results(found: list[dict], query: str) -> list[SearchResult]:
+        return [
+            SearchResult(
+                title=note_data["title"],
+                group_title=note_data.get("group_id"),
+                rank=note_data["score"],
+                headline=Headline.build(note_data["text"], query)
+            ) for note_data in found
+        ]
+
+    @staticmethod
+    def revision(note_id: str, revision: int, creation_date: datetime, snapshot: bool, text: str,
+                 data: str) -> dict:
+        return {
+            "note_id": note_id,
+            "revision": revision,
+            "creation_date": creation_date,
+            "snapshot": snapshot,
+            "length": len(text),
+            "data": data
+        }
+
+    @staticmethod
+    def first_revision(note_id: str, note_data: dict) -> dict:
+        """ Snapshot of the current text, it's recorded by the first update of the note """
+        old_text = note_data.get("text") or ""
+        return Documents.revision(note_id, 1, note_data["last_change_date"], True, old_text, old_text)
+
+    @staticmethod
+    def next_revision(note_id: str, last_revision: int, old_text: str, new_text: str) -> dict | None:
+        """ :return: Revision with the new text, None when the text hasn't changed """
+        if new_text == old_text:
+            return None
+        snapshot, data = Revisions.encode(last_revision + 1, old_text, new_text)
+        return Documents.revision(note_id, last_revision + 1, datetime.now(), snapshot, new_text, data)
+
+    @staticmethod
+    def snapshot_filter(note_id: str, revision: int) -> dict:
+        """ Filter of the snapshots the revision can be rebuilt from, the nearest one is the last by number """
+        return {"note_id": note_id, "revision": {"$lte": revision}, "snapshot": True}
+
+    @staticmethod
+    def chain_filter(note_id: str, snapshot: int, revision: int) -> dict:
+        return {"note_id": note_id, "revision": {"$gte": snapshot, "$lte": revision}}
+
+    @staticmethod
+    def revision_text(chain: list[dict], revision: int) -> str | None:
+        """ :param chain: Revisions from the nearest snapshot up to the revision, ordered by their numbers """
+        if chain and chain[-1]["revision"] == revision:
+            return Revisions.rebuild([(row["snapshot"], row["data"]) for row in chain])
+
+    @staticmethod
+    def upserts(notes: list[NoteRecord]) -> list[UpdateOne]:
+        """ :return: Bulk write of the 'overwrite' import, the last duplicate in the batch wins """
+        return [
+            UpdateOne(
+                {"id": note.title},
+                {
+                    "$set": {
+                        "group_id": note.group_title,
+                        "text": note.text,
+                        "last_change_date": note.last_change_date
+                    },
+                    "$setOnInsert": {"title": note.title, "creation_date": note.creation_date}
+                },
+                upsert=True
+            ) for note in {note.title: note for note in notes}.values()
+        ]
+
+    @staticmethod
+    def new_notes(notes: list[NoteRecord], existing: set[str]) -> list[dict]:
+        """ :return: Documents of the 'skip' import, the first duplicate in the batch wins """
+        documents = {}
+        for note in notes:
+            if note.title not in existing and note.title not in documents:
+                documents[note.title] = {
+                    "id": note.title,
+                    "group_id": note.group_title,
+                    "title": note.title,
+                    "text": note.text,
+                    "creation_date": note.creation_date,
+                    "last_change_date": note.last_change_date
+                }
+        return list(documents.values())
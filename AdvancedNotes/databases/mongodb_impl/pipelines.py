@@ -0,0 +1,83 @@
+"""
+Aggregation pipelines shared by the MongoDB implementations.
+Notes are joined by localField/foreignField, so servers older than 5.0 use the group_id index for the lookup
+as well ($expr in a lookup sub-pipeline can use it since 5.0 only)
+"""
+
+
+class Pipelines:
+    @staticmethod
+    def grouped_notes() -> list[dict]:
+        """
+        Joins notes to the groups in a single aggregation pipeline.
+        Titles are deduplicated and sorted the same way as distinct() does
+        """
+        return [
+            {"$group": {"_id": "$title", "id": {"$first": "$id"}}},
+            {"$lookup": {"from": "notes", "localField": "id", "foreignField": "group_id", "as": "notes"}},
+            {"$project": {"notes": {"$setUnion": ["$notes.title", []]}}},
+            {"$unwind": {"path": "$notes", "preserveNullAndEmptyArrays": True}},
+            {"$sort": {"_id": 1, "notes": 1}},
+            # $push keeps the sorted order, empty groups don't push anything
+            {"$group": {"_id": "$_id", "notes": {"$push": "$notes"}}},
+            {"$sort": {"_id": 1}}
+        ]
+
+    @staticmethod
+    def grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool) -> list[dict]:
+        """
+        Keyset page of (group, note) rows. Groups are read in the title index order starting from the key group.
+        Every group gives at least one row, so notes of at most page_size groups after the key group are joined
+        """
+        group_title, note_title = key or ("", "")
+        order = -1 if backward else 1
+        compare = "$lt" if backward else "$gt"
+        return [
+            {"$match": {"title": {"$lte" if backward else "$gte": group_title}}} if key else {"$match": {}},
+            {"$sort": {"title": order}},
+            # Notes of the key group may all be before the key
+            {"$limit": page_size + 1},
+            {"$lookup": {"from": "notes", "localField": "id", "foreignField": "group_id", "as": "notes"}},
+            {"$project": {"_id": 0, "title": 1, "notes": "$notes.title"}},
+            {"$unwind": {"path": "$notes", "preserveNullAndEmptyArrays": True}},
+            # Empty groups are sorted as a note with an empty title
+            {"$project": {"group": "$title", "note": {"$ifNull": ["$notes", ""]}}},
+            {"$match": {"$expr": {"$or": [
+                {compare: ["$group", group_title]},
+                {"$and": [{"$eq": ["$group", group_title]}, {compare: ["$note", note_title or ""]}]}
+            ]}}},
+            {"$sort": {"group": order, "note": order}},
+            {"$limit": page_size}
+        ]
+
+    @staticmethod
+    def note_info(note_title: str) -> list[dict]:
+        """ Length and number of lines are counted on the server side, so the text never leaves it """
+        return [
+            {"$match": {"id": note_title}},
+            {"$limit": 1},
+            {"$project": {
+                "_id": 0,
+                "id": 1,
+                "group_id": 1,
+                "creation_date": 1,
+                "last_change_date": 1,
+                "length": {"$strLenCP": {"$ifNull": ["$text", ""]}},
+                "lines": {"$size": {"$split": [{"$ifNull": ["$text", ""]}, "\n"]}}
+            }}
+        ]
+
+    @staticmethod
+    def note_history(note_title: str) -> list[dict]:
+        return [
+            {"$match": {"note_id": note_title}},
+            {"$sort": {"revision": 1}},
+            {"$project": {
+                "_id": 0,
+                "revision": 1,
+                "creation_date": 1,
+                "snapshot": 1,
+                "length": 1,
+                "size": {"$strLenCP": "$data"}
+            }}
+        ]
@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 from datetime import datetime
 
+# Markers of the matched words in the search headlines, View replaces them with colors
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
 
 class Note(BaseModel):
     note_id: str
@@ -8,3 +12,40 @@ class Note(BaseModel):
     last_change_date: datetime
     title: str
     text: str
+
+
+class NoteInfo(BaseModel):
+    """ Note metadata, the text itself is loaded only when it's needed """
+    note_id: str
+    group_title: str | None
+    creation_date: datetime
+    last_change_date: datetime
+    title: str
+    length: int
+    lines: int
+
+
+class NoteRecord(BaseModel):
+    """ Note together with its group, used by the bulk import and export """
+    group_title: str
+    title: str
+    text: str
+    creation_date: datetime
+    last_change_date: datetime
+
+
+class SearchResult(BaseModel):
+    group_title: str | None
+    title: str
+    rank: float
+    headline: str
+
+
+class NoteRevision(BaseModel):
+    """ Stored revision of the note text """
+    revision: int
+    creation_date: datetime
+    snapshot: bool
+    # Length of the revision text and of the data actually stored for it
+    length: int
+    size: int
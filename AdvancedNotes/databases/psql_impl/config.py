@@ -13,3 +13,20 @@ PSQL_USER = os.environ.get("PSQL_USER")[::]
 PSQL_PASSWORD = os.environ.get("PSQL_PASSWORD")[::]
 PSQL_DATA_BASE_NAME = os.environ.get("PSQL_DATA_BASE_NAME")[::]
 
+# Connection pool constants (optional)
+PSQL_POOL_MIN_SIZE = int(os.environ.get("PSQL_POOL_MIN_SIZE", 1))
+PSQL_POOL_MAX_SIZE = int(os.environ.get("PSQL_POOL_MAX_SIZE", 10))
+# Seconds to wait for a free connection
+PSQL_POOL_TIMEOUT = float(os.environ.get("PSQL_POOL_TIMEOUT", 30))
+# Idle connections older than this number of seconds are pinged before the checkout
+PSQL_POOL_HEALTH_CHECK_INTERVAL = float(os.environ.get("PSQL_POOL_HEALTH_CHECK_INTERVAL", 60))
+
+# Slow query log constants (optional), the log is written only when its file is set
+PSQL_SLOW_QUERY_LOG = os.environ.get("PSQL_SLOW_QUERY_LOG")
+# Queries running this number of milliseconds or longer are logged
+PSQL_SLOW_QUERY_THRESHOLD = float(os.environ.get("PSQL_SLOW_QUERY_THRESHOLD", 100))
+# Logged queries are run again with EXPLAIN (ANALYZE, BUFFERS) to capture their plans, writes are only planned
+PSQL_SLOW_QUERY_EXPLAIN = os.environ.get("PSQL_SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+# Size of the log file in bytes before it's rotated and the number of kept rotated files
+PSQL_SLOW_QUERY_LOG_SIZE = int(os.environ.get("PSQL_SLOW_QUERY_LOG_SIZE", 10 * 1024 * 1024))
+PSQL_SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("PSQL_SLOW_QUERY_LOG_BACKUPS", 5))
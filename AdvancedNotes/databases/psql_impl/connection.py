@@ -2,85 +2,110 @@
 
 import psycopg2
 
-from psycopg2.errors import UndefinedTable, OperationalError
-from colorama import Fore, Style
+from psycopg2 import DatabaseError
+from psycopg2.errors import OperationalError
+from colorama import Fore
 
-from .psql_exceptions import TablesDoesNotExists
+from screen import Screen
+
+from .pool import PSQLConnectionPool
+from .psql_exceptions import TablesDoesNotExists, UnsupportedSchemaVersion
+from .migrations import PSQLMigrator, LATEST_VERSION, REQUIRED_COLUMNS
 from .config import PSQL_HOST, PSQL_PORT, PSQL_USER, PSQL_PASSWORD, PSQL_DATA_BASE_NAME
 
 
 class PSQLConnection:
-    def check_connection(self):
+    def check_connection(self, connection=None, create_schema: bool = False):
+        """
+        Never asks anything, so it can run in a background thread
+
+        :param connection: Connection to check, a new one is opened when it isn't given
+        :param create_schema: Create the missing tables instead of raising TablesDoesNotExists
+        :raise TablesDoesNotExists: When the tables don't exist or are damaged, the caller asks to create them
+        """
+        checked = connection
         try:
-            connection = psycopg2.connect(
+            checked = connection or psycopg2.connect(
                 host=PSQL_HOST,
                 port=PSQL_PORT,
                 user=PSQL_USER,
                 password=PSQL_PASSWORD,
                 database=PSQL_DATA_BASE_NAME
             )
-            self.tables_checker(connection)
+            try:
+                self.tables_checker(checked)
+            except TablesDoesNotExists:
+                if not create_schema:
+                    raise
+            PSQLMigrator.upgrade(checked)
         except OperationalError:
-            print(f"\n{Fore.LIGHTYELLOW_EX}Invalid connection parameters or database doesn't exists")
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Invalid connection parameters or database doesn't exists")
+        except DatabaseError as error:
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Schema check or migration failed: {error}")
+        except UnsupportedSchemaVersion as error:
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Database schema version {error} is newer than supported "
+                         f"version {LATEST_VERSION}, update the program")
         except TablesDoesNotExists:
-
-            print(f"\n{Fore.LIGHTYELLOW_EX}DataBase tables do not exists or damaged"
-                  f"\nCould I initialize new tables in it to start work [Y/N]?"
-                  f"\nAttention! Existing tables will be overwritten:{Style.RESET_ALL}")
-
-            match input("\n>>> ").lower():
-                case "y":
-                    self.create_tables(connection)
-                    print("\nTables was successfully created! You should reboot the program")
-                case "n":
-                    pass
+            if connection is None:
+                checked.close()
+            raise
         else:
-            return connection
+            return checked
 
-    @staticmethod
-    def tables_checker(connection) -> None:
+    def check_pool(self, create_schema: bool = False, **connection_parameters) -> PSQLConnectionPool | None:
         """
-        Makes multiple queries against tables in the database to check their existence
+        :return: Pool whose own connection was checked, so the check doesn't open a separate one
+        :raise TablesDoesNotExists: The same way as check_connection()
         """
-        with connection.cursor() as cursor:
-            try:
-                cursor.execute("SELECT * FROM notes")
-                cursor.execute("SELECT * FROM groups")
-                cursor.execute("SELECT * FROM groups_notes")
-            except UndefinedTable:
-                connection.rollback()
-                raise TablesDoesNotExists
+        try:
+            pool = PSQLConnectionPool(**connection_parameters)
+        except OperationalError:
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Invalid connection parameters or database doesn't exists")
+            return None
+        try:
+            with pool.connection() as connection:
+                checked = self.check_connection(connection, create_schema)
+        except TablesDoesNotExists:
+            pool.closeall()
+            raise
+        if checked is None:
+            pool.closeall()
+            return None
+        return pool
 
     @staticmethod
-    def create_tables(connection) -> None:
+    def tables_checker(connection) -> None:
         """
-        Creates tables via following patterns. Also fill 'groups' table with a default group 'Home'
+        Checks existence of the tables, their columns and the schema version via the system catalog,
+        so the check doesn't depend on the amount of stored notes
         """
         with connection.cursor() as cursor:
             cursor.execute(
-                "CREATE TABLE groups("
-                "id varchar(30) primary key, "
-                "title varchar(30)"
-                ")"
-            )
-            cursor.execute(
-                "CREATE TABLE notes("
-                "id varchar(30) primary key,"
-                "title varchar(30),"
-                "text text,"
-                "creation_date timestamp,"
-                "last_change_date timestamp"
-                ")"
-            )
-            cursor.execute(
-                "CREATE TABLE groups_notes("
-                "group_id varchar(30) references groups(id),"
-                "note_id varchar(30) references notes(id)"
-                ")"
+                "SELECT c.relname, a.attname FROM pg_catalog.pg_attribute a "
+                "JOIN pg_catalog.pg_class c ON c.oid = a.attrelid "
+                "WHERE c.relnamespace = current_schema()::regnamespace AND c.relkind = 'r' "
+                "AND c.relname = ANY(%s) AND a.attnum > 0 AND NOT a.attisdropped",
+                ([*REQUIRED_COLUMNS, "schema_version"],)
             )
+            columns = {}
+            for table, column in cursor.fetchall():
+                columns.setdefault(table, set()).add(column)
 
-            cursor.execute("INSERT INTO groups(id, title) VALUES('Home', 'Home')")
+            if any(not required <= columns.get(table, set()) for table, required in REQUIRED_COLUMNS.items()):
+                connection.rollback()
+                raise TablesDoesNotExists
 
+            # Databases created before the migrations subsystem don't have the version table
+            if "schema_version" in columns:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                if (version := cursor.fetchone()[0]) > LATEST_VERSION:
+                    connection.rollback()
+                    raise UnsupportedSchemaVersion(version)
             connection.commit()
 
-
+    @staticmethod
+    def create_tables(connection) -> None:
+        """
+        Creates tables by applying every schema migration. Also fill 'groups' table with a default group 'Home'
+        """
+        PSQLMigrator.upgrade(connection)
@@ -0,0 +1,139 @@
+""" Versioned schema migrations for the PostgreSQL database """
+
+from colorama import Fore
+
+from screen import Screen
+
+
+class Migration:
+    def __init__(self, version: int, description: str, statements: list[str]):
+        self.version = version
+        self.description = description
+        self.statements = statements
+
+
+# Ordered migration steps. Applied migrations must never be changed, append a new one instead.
+# Every statement should be idempotent: databases created before the migrations subsystem
+# already contain the initial tables, but don't have the version table yet
+MIGRATIONS = [
+    Migration(1, "Initial tables", [
+        "CREATE TABLE IF NOT EXISTS groups("
+        "id varchar(30) primary key, "
+        "title varchar(30)"
+        ")",
+        "CREATE TABLE IF NOT EXISTS notes("
+        "id varchar(30) primary key,"
+        "title varchar(30),"
+        "text text,"
+        "creation_date timestamp,"
+        "last_change_date timestamp"
+        ")",
+        "CREATE TABLE IF NOT EXISTS groups_notes("
+        "group_id varchar(30) references groups(id),"
+        "note_id varchar(30) references notes(id)"
+        ")",
+        "INSERT INTO groups(id, title) VALUES('Home', 'Home') ON CONFLICT DO NOTHING",
+    ]),
+    Migration(2, "Indexes for the notes title and groups_notes lookups", [
+        "CREATE INDEX IF NOT EXISTS notes_title_idx ON notes(title)",
+        "CREATE INDEX IF NOT EXISTS groups_notes_group_id_idx ON groups_notes(group_id)",
+        "CREATE INDEX IF NOT EXISTS groups_notes_note_id_idx ON groups_notes(note_id)",
+    ]),
+    Migration(3, "Cascading foreign keys for the groups_notes table", [
+        "ALTER TABLE groups_notes DROP CONSTRAINT IF EXISTS groups_notes_group_id_fkey",
+        "ALTER TABLE groups_notes DROP CONSTRAINT IF EXISTS groups_notes_note_id_fkey",
+        # Rows left dangling by the old drop/re-add writes would fail the validation
+        "DELETE FROM groups_notes WHERE group_id NOT IN (SELECT id FROM groups) "
+        "OR note_id NOT IN (SELECT id FROM notes)",
+        "ALTER TABLE groups_notes ADD CONSTRAINT groups_notes_group_id_fkey FOREIGN KEY (group_id) "
+        "REFERENCES groups(id) ON UPDATE CASCADE ON DELETE CASCADE",
+        "ALTER TABLE groups_notes ADD CONSTRAINT groups_notes_note_id_fkey FOREIGN KEY (note_id) "
+        "REFERENCES notes(id) ON UPDATE CASCADE ON DELETE CASCADE",
+    ]),
+    Migration(4, "Full-text search vector of the notes", [
+        "ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        # Title matches are weighted higher than the text ones
+        "CREATE OR REPLACE FUNCTION notes_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN "
+        "NEW.search_vector := "
+        "setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(NEW.text, '')), 'B'); "
+        "RETURN NEW; "
+        "END "
+        "$$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS notes_search_vector_trigger ON notes",
+        "CREATE TRIGGER notes_search_vector_trigger BEFORE INSERT OR UPDATE OF title, text ON notes "
+        "FOR EACH ROW EXECUTE FUNCTION notes_search_vector_update()",
+        # Fires the trigger for the existing notes
+        "UPDATE notes SET title = title",
+        "CREATE INDEX IF NOT EXISTS notes_search_vector_idx ON notes USING GIN (search_vector)",
+    ]),
+    Migration(5, "Index for the keyset pagination of groups", [
+        "CREATE INDEX IF NOT EXISTS groups_title_idx ON groups(title)",
+    ]),
+    Migration(6, "Delta-compressed revisions of the notes", [
+        "CREATE TABLE IF NOT EXISTS note_revisions("
+        "note_id varchar(30) references notes(id) ON UPDATE CASCADE ON DELETE CASCADE,"
+        "revision integer,"
+        "creation_date timestamp,"
+        "snapshot boolean,"
+        "length integer,"
+        "data text,"
+        "primary key (note_id, revision)"
+        ")",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# Columns the application can't work without. Later migrations are applied on connect, so their columns aren't required
+REQUIRED_COLUMNS = {
+    "groups": {"id", "title"},
+    "notes": {"id", "title", "text", "creation_date", "last_change_date"},
+    "groups_notes": {"group_id", "note_id"},
+}
+
+
+class PSQLMigrator:
+    @staticmethod
+    def create_version_table(cursor) -> None:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version("
+            "version integer primary key,"
+            "description text,"
+            "applied_at timestamp DEFAULT now()"
+            ")"
+        )
+
+    @staticmethod
+    def current_version(cursor) -> int:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def upgrade(connection) -> None:
+        """
+        Applies every pending migration in its own transaction,
+        so a failed step leaves the database at the previous version
+        """
+        with connection.cursor() as cursor:
+            PSQLMigrator.create_version_table(cursor)
+            connection.commit()
+
+            for migration in MIGRATIONS:
+                if migration.version <= PSQLMigrator.current_version(cursor):
+                    continue
+                try:
+                    for statement in migration.statements:
+                        cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO schema_version(version, description) VALUES(%s, %s)",
+                        (migration.version, migration.description)
+                    )
+                except Exception:
+                    connection.rollback()
+                    raise
+                else:
+                    connection.commit()
+                    Screen.print(f"\n{Fore.LIGHTGREEN_EX}Schema was upgraded to version {migration.version}: "
+                                 f"{migration.description}")
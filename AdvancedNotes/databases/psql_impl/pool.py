@@ -0,0 +1,83 @@
+""" Thread-safe pool of the PostgreSQL connections with checkout timeouts and health checks """
+
+import time
+import threading
+
+from contextlib import contextmanager
+
+from psycopg2 import OperationalError, InterfaceError
+from psycopg2.pool import ThreadedConnectionPool
+
+from .psql_exceptions import PoolTimeout
+from .config import PSQL_HOST, PSQL_PORT, PSQL_USER, PSQL_PASSWORD, PSQL_DATA_BASE_NAME, \
+    PSQL_POOL_MIN_SIZE, PSQL_POOL_MAX_SIZE, PSQL_POOL_TIMEOUT, PSQL_POOL_HEALTH_CHECK_INTERVAL
+
+
+class PSQLConnectionPool:
+    def __init__(self, min_size: int = PSQL_POOL_MIN_SIZE, max_size: int = PSQL_POOL_MAX_SIZE,
+                 timeout: float = PSQL_POOL_TIMEOUT, **connection_parameters):
+        self.__pool = ThreadedConnectionPool(
+            min_size,
+            max_size,
+            host=PSQL_HOST,
+            port=PSQL_PORT,
+            user=PSQL_USER,
+            password=PSQL_PASSWORD,
+            database=PSQL_DATA_BASE_NAME,
+            **connection_parameters
+        )
+        # ThreadedConnectionPool raises PoolError when it's exhausted, the semaphore makes callers wait instead
+        self.__slots = threading.BoundedSemaphore(max_size)
+        self.__timeout = timeout
+        # Connection -> time of the last checkin, discarded connections are removed,
+        # so a new connection is always checked on its first checkout
+        self.__last_used = {}
+
+    def getconn(self):
+        if not self.__slots.acquire(timeout=self.__timeout):
+            raise PoolTimeout(f"No free database connection in {self.__timeout} seconds")
+        try:
+            connection = self.__pool.getconn()
+            if not self.__is_healthy(connection):
+                self.__last_used.pop(connection, None)
+                self.__pool.putconn(connection, close=True)
+                connection = self.__pool.getconn()
+        except Exception:
+            self.__slots.release()
+            raise
+        return connection
+
+    def putconn(self, connection) -> None:
+        """ Returns connection to the pool. Broken connections are closed and replaced on the next checkout """
+        if connection.closed:
+            self.__last_used.pop(connection, None)
+        else:
+            self.__last_used[connection] = time.monotonic()
+        self.__pool.putconn(connection, close=bool(connection.closed))
+        self.__slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.getconn()
+        try:
+            yield connection
+        finally:
+            self.putconn(connection)
+
+    def closeall(self) -> None:
+        self.__pool.closeall()
+        self.__last_used.clear()
+
+    def __is_healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+        # Recently used connections are trusted, so the hot path doesn't pay for an extra round trip
+        if time.monotonic() - self.__last_used.get(connection, 0) < PSQL_POOL_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except (OperationalError, InterfaceError):
+            return False
+        return True
@@ -1,3 +1,10 @@
 class TablesDoesNotExists(Exception):
     pass
 
+
+class UnsupportedSchemaVersion(Exception):
+    pass
+
+
+class PoolTimeout(Exception):
+    pass
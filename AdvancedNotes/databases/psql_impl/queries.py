@@ -0,0 +1,227 @@
+"""
+Registry of the DataBasePSQLImp queries.
+Every query is prepared on the server once per connection, following calls skip the parse/plan work
+and pass parameters separately from the statement text
+"""
+
+from time import perf_counter
+
+from psycopg2.extensions import connection as psycopg2_connection, cursor as psycopg2_cursor
+
+from ..note import HIGHLIGHT_START, HIGHLIGHT_STOP
+from ..metrics import Metrics
+from .slow_query_log import SlowQueryLog
+
+
+class Query:
+    def __init__(self, statement: str, parameter_types: tuple[str, ...] = ()):
+        self.statement = statement
+        self.parameter_types = parameter_types
+
+
+QUERIES = {
+    "get_grouped_notes": Query(
+        "SELECT title, ARRAY("
+        "SELECT title FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id=groups.id)"
+        ") FROM groups"
+    ),
+    "get_attached_group_notes": Query(
+        "SELECT title FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id=$1)", ("varchar",)
+    ),
+    "get_all_groups": Query("SELECT title FROM groups"),
+    # Keyset pagination, $1 is the title of the last/first shown row
+    "get_groups_page": Query(
+        "SELECT title FROM groups WHERE title > $1 ORDER BY title LIMIT $2", ("varchar", "integer")
+    ),
+    "get_groups_page_backward": Query(
+        "SELECT title FROM groups WHERE title < $1 ORDER BY title DESC LIMIT $2", ("varchar", "integer")
+    ),
+    # Empty groups are joined with a NULL note, which is sorted as an empty title
+    "get_grouped_notes_page": Query(
+        "SELECT groups.title, notes.title FROM groups "
+        "LEFT JOIN groups_notes ON groups_notes.group_id = groups.id "
+        "LEFT JOIN notes ON notes.id = groups_notes.note_id "
+        "WHERE (groups.title, COALESCE(notes.title, '')) > ($1, $2) "
+        "ORDER BY groups.title, COALESCE(notes.title, '') LIMIT $3",
+        ("varchar", "varchar", "integer")
+    ),
+    "get_grouped_notes_page_backward": Query(
+        "SELECT groups.title, notes.title FROM groups "
+        "LEFT JOIN groups_notes ON groups_notes.group_id = groups.id "
+        "LEFT JOIN notes ON notes.id = groups_notes.note_id "
+        "WHERE (groups.title, COALESCE(notes.title, '')) < ($1, $2) "
+        "ORDER BY groups.title DESC, COALESCE(notes.title, '') DESC LIMIT $3",
+        ("varchar", "varchar", "integer")
+    ),
+    "get_all_notes": Query("SELECT title FROM notes"),
+    "get_all_notes_dates": Query(
+        "SELECT notes.title, groups_notes.group_id, notes.last_change_date "
+        "FROM notes LEFT JOIN groups_notes ON groups_notes.note_id = notes.id"
+    ),
+    "check_group": Query("SELECT COUNT(*) FROM groups WHERE id=$1", ("varchar",)),
+    "check_note": Query(
+        "SELECT id, text, creation_date, last_change_date FROM notes WHERE title=$1", ("varchar",)
+    ),
+    # Length and number of lines are counted on the server side, so the text never leaves it
+    "get_note_info": Query(
+        "SELECT notes.id, groups_notes.group_id, creation_date, last_change_date, "
+        "char_length(COALESCE(text, '')), "
+        "char_length(COALESCE(text, '')) - char_length(replace(COALESCE(text, ''), E'\\n', '')) + 1 "
+        "FROM notes LEFT JOIN groups_notes ON groups_notes.note_id = notes.id WHERE notes.title=$1",
+        ("varchar",)
+    ),
+    "get_note_text": Query("SELECT text FROM notes WHERE title=$1", ("varchar",)),
+    "create_group": Query("INSERT INTO groups(id, title) VALUES($1, $1)", ("varchar",)),
+    "update_group": Query("UPDATE groups SET id=$1, title=$1 WHERE id=$2", ("varchar", "varchar")),
+    "delete_group_notes": Query(
+        "DELETE FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id=$1)", ("varchar",)
+    ),
+    "delete_group": Query("DELETE FROM groups WHERE id=$1", ("varchar",)),
+    "create_note": Query(
+        "INSERT INTO notes (id, title, text, creation_date, last_change_date) VALUES($1, $1, $2, $3, $3)",
+        ("varchar", "text", "timestamp")
+    ),
+    "attach_note": Query("INSERT INTO groups_notes (group_id, note_id) VALUES($1, $2)", ("varchar", "varchar")),
+    "update_note_title": Query(
+        "UPDATE notes SET id=$1, title=$1, last_change_date=$2 WHERE title=$3", ("varchar", "timestamp", "varchar")
+    ),
+    "update_note_text": Query(
+        "UPDATE notes SET text=$1, last_change_date=$2 WHERE title=$3", ("text", "timestamp", "varchar")
+    ),
+    "delete_note": Query("DELETE FROM notes WHERE title=$1", ("varchar",)),
+    # Locks the note, so concurrent text updates can't take the same revision number
+    "lock_note_revisions": Query(
+        "SELECT id, last_change_date, (SELECT MAX(revision) FROM note_revisions WHERE note_id = notes.id) "
+        "FROM notes WHERE title=$1 FOR UPDATE",
+        ("varchar",)
+    ),
+    "create_note_revision": Query(
+        "INSERT INTO note_revisions (note_id, revision, creation_date, snapshot, length, data) "
+        "VALUES($1, $2, $3, $4, $5, $6)",
+        ("varchar", "integer", "timestamp", "boolean", "integer", "text")
+    ),
+    "get_note_history": Query(
+        "SELECT revision, creation_date, snapshot, length, char_length(data) FROM note_revisions "
+        "WHERE note_id=$1 ORDER BY revision",
+        ("varchar",)
+    ),
+    # Rows from the nearest snapshot up to the requested revision, see databases.revisions
+    "get_revision_chain": Query(
+        "SELECT revision, snapshot, data FROM note_revisions WHERE note_id=$1 AND revision <= $2 AND revision >= ("
+        "SELECT MAX(revision) FROM note_revisions WHERE note_id=$1 AND revision <= $2 AND snapshot"
+        ") ORDER BY revision",
+        ("varchar", "integer")
+    ),
+    # Only the ranked page of notes gets its text read and headline built
+    "search_notes": Query(
+        "SELECT found.title, groups_notes.group_id, found.rank, "
+        "ts_headline('simple', found.text, websearch_to_tsquery('simple', $1), $3) "
+        "FROM ("
+        "SELECT id, title, text, ts_rank(search_vector, query) AS rank "
+        "FROM notes, websearch_to_tsquery('simple', $1) query "
+        "WHERE search_vector @@ query ORDER BY rank DESC LIMIT $2"
+        ") found LEFT JOIN groups_notes ON groups_notes.note_id = found.id "
+        "ORDER BY found.rank DESC",
+        ("text", "integer", "text")
+    ),
+
+    # Bulk import moves rows from the import_notes staging table, see IMPORT_TABLE
+    "import_notes_skip": Query(
+        "WITH staged AS ("
+        "SELECT DISTINCT ON (id) group_id, id, text, creation_date, last_change_date FROM import_notes "
+        "ORDER BY id, position"
+        "), inserted AS ("
+        "INSERT INTO notes (id, title, text, creation_date, last_change_date) "
+        "SELECT id, id, text, creation_date, last_change_date FROM staged "
+        "ON CONFLICT (id) DO NOTHING RETURNING id"
+        ") "
+        "INSERT INTO groups_notes (group_id, note_id) "
+        "SELECT staged.group_id, staged.id FROM staged JOIN inserted USING (id)"
+    ),
+    "import_notes_overwrite": Query(
+        "WITH staged AS ("
+        "SELECT DISTINCT ON (id) group_id, id, text, creation_date, last_change_date FROM import_notes "
+        "ORDER BY id, position DESC"
+        "), upserted AS ("
+        "INSERT INTO notes (id, title, text, creation_date, last_change_date) "
+        "SELECT id, id, text, creation_date, last_change_date FROM staged "
+        "ON CONFLICT (id) DO UPDATE SET text=EXCLUDED.text, last_change_date=EXCLUDED.last_change_date RETURNING id"
+        "), detached AS ("
+        "DELETE FROM groups_notes WHERE note_id IN (SELECT id FROM upserted)"
+        ") "
+        "INSERT INTO groups_notes (group_id, note_id) "
+        "SELECT staged.group_id, staged.id FROM staged JOIN upserted USING (id)"
+    ),
+}
+
+# Utility statements can't be prepared, they are executed as is
+IMPORT_TABLE = (
+    "CREATE TEMP TABLE IF NOT EXISTS import_notes("
+    "position integer,"
+    "group_id varchar(30),"
+    "id varchar(30),"
+    "text text,"
+    "creation_date timestamp,"
+    "last_change_date timestamp"
+    ") ON COMMIT DELETE ROWS"
+)
+CLEAR_IMPORT_TABLE = "DELETE FROM import_notes"
+IMPORT_COLUMNS = ("position", "group_id", "id", "text", "creation_date", "last_change_date")
+
+
+class MeasuredCursor(psycopg2_cursor):
+    """ Cursor which reports every statement sent to the server to the :class:`Metrics` """
+    def execute(self, query, variables=None):
+        Metrics.round_trip()
+        return super().execute(query, variables)
+
+    def executemany(self, query, variables_list):
+        Metrics.round_trip()
+        return super().executemany(query, variables_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        Metrics.round_trip()
+        return super().copy_expert(sql, file, size)
+
+
+class PreparedConnection(psycopg2_connection):
+    """ Connection which remembers statements prepared in its session """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.cursor_factory = MeasuredCursor
+
+
+class PreparedStatements:
+    @staticmethod
+    def execute(cursor, name: str, parameters: tuple = ()) -> None:
+        """
+        Executes a registered query. The connection of the cursor has to be a :class:`PreparedConnection`.
+        Prepared statements outlive transactions, so a rollback doesn't require preparing them again
+        """
+        query = QUERIES[name]
+        if name not in cursor.connection.prepared:
+            types = f"({', '.join(query.parameter_types)})" if query.parameter_types else ""
+            cursor.execute(f"PREPARE {name}{types} AS {query.statement}")
+            cursor.connection.prepared.add(name)
+
+        start = perf_counter()
+        if parameters:
+            cursor.execute(f"EXECUTE {name}({', '.join(['%s'] * len(parameters))})", parameters)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+
+        if SlowQueryLog.is_slow(milliseconds := (perf_counter() - start) * 1000):
+            SlowQueryLog.record(cursor, name, query.statement, parameters, milliseconds)
+
+
+# Server-side (named) cursors can only be declared for plain queries, not for prepared statements
+EXPORT_NOTES = (
+    "SELECT groups_notes.group_id, notes.title, notes.text, notes.creation_date, notes.last_change_date "
+    "FROM notes JOIN groups_notes ON groups_notes.note_id = notes.id"
+)
+
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    f"MaxFragments=2, MaxWords=15, MinWords=5, FragmentDelimiter=\" ... \""
+)
@@ -0,0 +1,88 @@
+"""
+Rows of the QUERIES shared by the psycopg2 and asyncpg implementations,
+so both engines differ only in the way they send the queries
+"""
+
+from datetime import datetime
+
+from ..note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from ..revisions import Revisions
+
+
+class Rows:
+    @staticmethod
+    def to_note(note_title: str, row) -> Note:
+        """ :param row: Row of the 'check_note' query """
+        return Note(
+            note_id=note_title,
+            title=note_title,
+            text=row[1],
+            creation_date=row[2],
+            last_change_date=row[3]
+        )
+
+    @staticmethod
+    def to_note_info(note_title: str, row) -> NoteInfo:
+        """ :param row: Row of the 'get_note_info' query """
+        return NoteInfo(
+            note_id=row[0],
+            title=note_title,
+            group_title=row[1],
+            creation_date=row[2],
+            last_change_date=row[3],
+            length=row[4],
+            lines=row[5]
+        )
+
+    @staticmethod
+    def to_note_record(row) -> NoteRecord:
+        """ :param row: Row of the EXPORT_NOTES query """
+        group_title, title, text, creation_date, last_change_date = row
+        return NoteRecord(
+            group_title=group_title,
+            title=title,
+            text=text or "",
+            creation_date=creation_date,
+            last_change_date=last_change_date
+        )
+
+    @staticmethod
+    def to_note_revisions(rows) -> list[NoteRevision]:
+        return [
+            NoteRevision(revision=revision, creation_date=creation_date, snapshot=snapshot, length=length, size=size)
+            for revision, creation_date, snapshot, length, size in rows
+        ]
+
+    @staticmethod
+    def to_search_results(rows) -> list[SearchResult]:
+        return [
+            SearchResult(title=title, group_title=group_title, rank=rank, headline=headline)
+            for title, group_title, rank, headline in rows
+        ]
+
+    @staticmethod
+    def first_revision(note_id: str, last_change_date: datetime, text: str) -> tuple:
+        """ :return: Parameters of the 'create_note_revision' query with the snapshot of the current text """
+        return note_id, 1, last_change_date, True, len(text), text
+
+    @staticmethod
+    def next_revision(note_id: str, last_revision: int, old_text: str, new_text: str) -> tuple | None:
+        """ :return: Parameters of the 'create_note_revision' query, None when the text hasn't changed """
+        if new_text == old_text:
+            return None
+        snapshot, data = Revisions.encode(last_revision + 1, old_text, new_text)
+        return note_id, last_revision + 1, datetime.now(), snapshot, len(new_text), data
+
+    @staticmethod
+    def revision_text(chain, revision: int) -> str | None:
+        """ :param chain: Rows of the 'get_revision_chain' query """
+        if chain and chain[-1][0] == revision:
+            return Revisions.rebuild([(snapshot, data) for _, snapshot, data in chain])
+
+    @staticmethod
+    def import_records(notes: list[NoteRecord]) -> list[tuple]:
+        """ :return: Rows of the import_notes staging table in the IMPORT_COLUMNS order """
+        return [
+            (position, note.group_title, note.title, note.text, note.creation_date, note.last_change_date)
+            for position, note in enumerate(notes)
+        ]
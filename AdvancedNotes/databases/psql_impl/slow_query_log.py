@@ -0,0 +1,107 @@
+"""
+Opt-in log of the slow PostgreSQL queries.
+Every query over the PSQL_SLOW_QUERY_THRESHOLD is written to the rotating PSQL_SLOW_QUERY_LOG file
+as a JSON line with its statement, parameters, duration, row count and optionally its execution plan
+"""
+
+import re
+import json
+import logging
+
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from psycopg2 import Error
+
+from .config import PSQL_SLOW_QUERY_LOG, PSQL_SLOW_QUERY_THRESHOLD, PSQL_SLOW_QUERY_EXPLAIN, \
+    PSQL_SLOW_QUERY_LOG_SIZE, PSQL_SLOW_QUERY_LOG_BACKUPS
+
+SEQUENTIAL_SCAN = re.compile(r"Seq Scan on (\w+)")
+# Only the plain queries are analyzed, replaying a write would fail on the rows it has just written
+READ_STATEMENT = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+
+class SlowQueryLog:
+    logger: logging.Logger | None = None
+    threshold: float = PSQL_SLOW_QUERY_THRESHOLD
+    explain: bool = PSQL_SLOW_QUERY_EXPLAIN
+
+    @staticmethod
+    def configure() -> None:
+        """ Enables the log when its file is set by the PSQL_SLOW_QUERY_LOG variable """
+        if PSQL_SLOW_QUERY_LOG:
+            SlowQueryLog.enable(PSQL_SLOW_QUERY_LOG)
+
+    @staticmethod
+    def enable(path: str, threshold: float = PSQL_SLOW_QUERY_THRESHOLD, explain: bool = PSQL_SLOW_QUERY_EXPLAIN,
+               max_bytes: int = PSQL_SLOW_QUERY_LOG_SIZE, backup_count: int = PSQL_SLOW_QUERY_LOG_BACKUPS) -> None:
+        """
+        :param path: Log file, it's rotated after max_bytes keeping backup_count previous files
+        :param threshold: Queries running this number of milliseconds or longer are logged
+        :param explain: Capture plans of the logged queries
+        """
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("mynotes.psql.slow_queries")
+        logger.setLevel(logging.INFO)
+        # Entries go only to the file, never to the terminal
+        logger.propagate = False
+        for old_handler in logger.handlers:
+            old_handler.close()
+        logger.handlers = [handler]
+
+        SlowQueryLog.logger = logger
+        SlowQueryLog.threshold = threshold
+        SlowQueryLog.explain = explain
+
+    @staticmethod
+    def disable() -> None:
+        if SlowQueryLog.logger:
+            for handler in SlowQueryLog.logger.handlers:
+                handler.close()
+            SlowQueryLog.logger.handlers = []
+        SlowQueryLog.logger = None
+
+    @staticmethod
+    def is_slow(milliseconds: float) -> bool:
+        return SlowQueryLog.logger is not None and milliseconds >= SlowQueryLog.threshold
+
+    @staticmethod
+    def record(cursor, name: str, statement: str, parameters: tuple, milliseconds: float) -> None:
+        """ Logs the prepared query just executed by the cursor """
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "query": name,
+            "statement": statement,
+            "parameters": parameters,
+            "duration_ms": round(milliseconds, 3),
+            "rows": cursor.rowcount
+        }
+        if SlowQueryLog.explain:
+            entry["plan"] = SlowQueryLog.plan(cursor, name, parameters, bool(READ_STATEMENT.match(statement)))
+            if isinstance(entry["plan"], list):
+                entry["sequential_scans"] = sorted({
+                    table for line in entry["plan"] for table in SEQUENTIAL_SCAN.findall(line)
+                })
+        SlowQueryLog.logger.info(json.dumps(entry, default=str, ensure_ascii=False))
+
+    @staticmethod
+    def plan(cursor, name: str, parameters: tuple, analyze: bool) -> list[str] | str:
+        """
+        ANALYZE runs the query again, so it's done under a savepoint which undoes its changes.
+        A separate cursor of the same transaction keeps the results of the original query
+
+        :param analyze: Run the query to take its actual timings, writes get the estimated plan only
+        """
+        options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+        arguments = f"({', '.join(['%s'] * len(parameters))})" if parameters else ""
+        with cursor.connection.cursor() as explain_cursor:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute(f"EXPLAIN ({options}) EXECUTE {name}{arguments}", parameters or None)
+                plan = [row[0] for row in explain_cursor.fetchall()]
+            except Error as error:
+                plan = f"EXPLAIN failed: {error}".strip()
+            explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
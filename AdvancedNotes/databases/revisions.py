@@ -0,0 +1,62 @@
+"""
+Delta-compressed storage of the note revisions.
+Every revision keeps only the line-based difference with the previous one,
+every REVISION_SNAPSHOT_INTERVAL-th revision keeps the whole text,
+so rebuilding any revision applies at most REVISION_SNAPSHOT_INTERVAL - 1 deltas
+
+Delta is a JSON list of operations applied to the lines of the previous revision:
+[start, end] copies its lines[start:end], a string is inserted as is
+"""
+
+import json
+
+from difflib import SequenceMatcher
+
+from settings.config import REVISION_SNAPSHOT_INTERVAL
+
+
+class Revisions:
+    @staticmethod
+    def is_snapshot(revision: int) -> bool:
+        """ Revisions are numbered from 1, the first one is always a snapshot """
+        return not (revision - 1) % REVISION_SNAPSHOT_INTERVAL
+
+    @staticmethod
+    def delta(old_text: str, new_text: str) -> str:
+        old_lines = old_text.splitlines(keepends=True)
+        new_lines = new_text.splitlines(keepends=True)
+        operations = []
+        # Autojunk would treat frequent lines (e.g. empty ones) as changed in notes longer than 200 lines
+        matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == "equal":
+                operations.append([old_start, old_end])
+            elif new_start != new_end:
+                operations.append("".join(new_lines[new_start:new_end]))
+        return json.dumps(operations, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def apply(old_text: str, delta: str) -> str:
+        old_lines = old_text.splitlines(keepends=True)
+        return "".join(
+            operation if isinstance(operation, str) else "".join(old_lines[operation[0]:operation[1]])
+            for operation in json.loads(delta)
+        )
+
+    @staticmethod
+    def encode(revision: int, old_text: str, new_text: str) -> tuple[bool, str]:
+        """ :return: Whether the revision is a snapshot and its stored data """
+        if Revisions.is_snapshot(revision):
+            return True, new_text
+        return False, Revisions.delta(old_text, new_text)
+
+    @staticmethod
+    def rebuild(chain: list[tuple[bool, str]]) -> str:
+        """
+        :param chain: Stored (snapshot, data) pairs ordered by revision, starting with a snapshot
+        :return: Text of the last revision of the chain
+        """
+        text = ""
+        for snapshot, data in chain:
+            text = data if snapshot else Revisions.apply(text, data)
+        return text
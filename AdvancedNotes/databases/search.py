@@ -0,0 +1,32 @@
+""" Search headlines for the backends which don't build them on the server side """
+
+import re
+
+from .note import HIGHLIGHT_START, HIGHLIGHT_STOP
+
+
+class Headline:
+    @staticmethod
+    def terms(query: str) -> list[str]:
+        """ :return: lowercase words of the query without the search syntax (quotes, negations) """
+        return [term for term in re.findall(r"[^\W_]+", query.lower()) if f"-{term}" not in query.lower()]
+
+    @staticmethod
+    def build(text: str, query: str, max_words: int = 15) -> str:
+        """
+        :return: Fragment of the text around the first matched word with every matched word wrapped
+        into the highlight markers
+        """
+        words = text.split()
+        terms = Headline.terms(query)
+
+        def is_match(word: str) -> bool:
+            return any(term in word.lower() for term in terms)
+
+        first_match = next((index for index, word in enumerate(words) if is_match(word)), 0)
+        start = max(first_match - max_words // 3, 0)
+        fragment = [
+            f"{HIGHLIGHT_START}{word}{HIGHLIGHT_STOP}" if is_match(word) else word
+            for word in words[start:start + max_words]
+        ]
+        return f"{'... ' if start else ''}{' '.join(fragment)}{' ...' if start + max_words < len(words) else ''}"
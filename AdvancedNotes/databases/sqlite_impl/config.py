@@ -0,0 +1,12 @@
+"""
+Uploading following constants to the database access via venv variables
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Database file, it's created on the first launch (optional)
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "mynotes.db")
+# Seconds to wait for a write lock held by another connection (optional)
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", 5))
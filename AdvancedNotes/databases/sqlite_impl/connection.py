@@ -0,0 +1,82 @@
+""" Opening of the configured SQLite connections and the schema check """
+
+import sqlite3
+
+from datetime import datetime
+
+from colorama import Fore
+
+from screen import Screen
+
+from .migrations import SQLiteMigrator, LATEST_VERSION
+from ..metrics import Metrics
+from .config import SQLITE_PATH, SQLITE_BUSY_TIMEOUT
+
+# Dates are stored as ISO 8601 texts and read back by the declared 'timestamp' column type
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("timestamp", lambda value: datetime.fromisoformat(value.decode()))
+
+
+class MeasuredCursor(sqlite3.Cursor):
+    """
+    Cursor which reports every executed query to the :class:`Metrics`.
+    Embedded database has no network round trips, so the queries are counted instead
+    """
+    def execute(self, sql, parameters=()):
+        Metrics.round_trip()
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        Metrics.round_trip()
+        return super().executemany(sql, seq_of_parameters)
+
+
+class MeasuredConnection(sqlite3.Connection):
+    """ Its cursors are measured, transaction control statements executed on the connection itself aren't """
+    def cursor(self, factory=MeasuredCursor):
+        return super().cursor(factory)
+
+
+class SQLiteConnection:
+    @staticmethod
+    def connect(path: str = SQLITE_PATH) -> sqlite3.Connection:
+        """
+        Opens a connection in the autocommit mode, DataBaseSQLiteImp opens transactions explicitly.
+        WAL journal lets readers work alongside the writer, NORMAL synchronous mode is durable with it
+        and skips the fsync on every commit
+        """
+        connection = sqlite3.connect(
+            path,
+            timeout=SQLITE_BUSY_TIMEOUT,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False,
+            factory=MeasuredConnection
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # Foreign keys (and so the cascades) are off by default in every new connection
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @staticmethod
+    def check_connection(path: str = SQLITE_PATH) -> sqlite3.Connection | None:
+        try:
+            connection = SQLiteConnection.connect(path)
+            if SQLiteConnection.is_versioned(connection) and \
+                    (version := SQLiteMigrator.current_version(connection)) > LATEST_VERSION:
+                Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Database schema version {version} is newer than supported "
+                             f"version {LATEST_VERSION}, update the program")
+                connection.close()
+                return None
+            SQLiteMigrator.upgrade(connection)
+        except sqlite3.Error as error:
+            Screen.print(f"\n{Fore.LIGHTYELLOW_EX}Couldn't open the database file '{path}': {error}")
+        else:
+            return connection
+
+    @staticmethod
+    def is_versioned(connection: sqlite3.Connection) -> bool:
+        return connection.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='schema_version'"
+        ).fetchone()[0] > 0
@@ -0,0 +1,119 @@
+""" Versioned schema migrations for the SQLite database, the schema mirrors the PostgreSQL one """
+
+from colorama import Fore
+
+from screen import Screen
+
+
+class Migration:
+    def __init__(self, version: int, description: str, statements: list[str]):
+        self.version = version
+        self.description = description
+        self.statements = statements
+
+
+# Ordered migration steps. Applied migrations must never be changed, append a new one instead
+MIGRATIONS = [
+    Migration(1, "Initial tables", [
+        "CREATE TABLE IF NOT EXISTS groups("
+        "id varchar(30) primary key, "
+        "title varchar(30)"
+        ")",
+        # SQLite can renumber implicit rowids on VACUUM, the full-text index is bound to the explicit one
+        "CREATE TABLE IF NOT EXISTS notes("
+        "search_id integer primary key,"
+        "id varchar(30) unique not null,"
+        "title varchar(30),"
+        "text text,"
+        "creation_date timestamp,"
+        "last_change_date timestamp"
+        ")",
+        "CREATE TABLE IF NOT EXISTS groups_notes("
+        "group_id varchar(30) references groups(id) ON UPDATE CASCADE ON DELETE CASCADE,"
+        "note_id varchar(30) references notes(id) ON UPDATE CASCADE ON DELETE CASCADE"
+        ")",
+        "INSERT INTO groups(id, title) VALUES('Home', 'Home') ON CONFLICT DO NOTHING",
+    ]),
+    Migration(2, "Indexes for the title, keyset pagination and groups_notes lookups", [
+        "CREATE INDEX IF NOT EXISTS notes_title_idx ON notes(title)",
+        "CREATE INDEX IF NOT EXISTS groups_title_idx ON groups(title)",
+        "CREATE INDEX IF NOT EXISTS groups_notes_group_id_idx ON groups_notes(group_id)",
+        "CREATE INDEX IF NOT EXISTS groups_notes_note_id_idx ON groups_notes(note_id)",
+    ]),
+    Migration(3, "Full-text search index of the notes", [
+        # External content table, the texts are stored only once in the notes table
+        "CREATE VIRTUAL TABLE IF NOT EXISTS notes_search USING fts5("
+        "title, text, content='notes', content_rowid='search_id'"
+        ")",
+        "CREATE TRIGGER IF NOT EXISTS notes_search_insert AFTER INSERT ON notes BEGIN "
+        "INSERT INTO notes_search(rowid, title, text) VALUES (new.search_id, new.title, new.text); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS notes_search_delete AFTER DELETE ON notes BEGIN "
+        "INSERT INTO notes_search(notes_search, rowid, title, text) "
+        "VALUES ('delete', old.search_id, old.title, old.text); "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS notes_search_update AFTER UPDATE OF title, text ON notes BEGIN "
+        "INSERT INTO notes_search(notes_search, rowid, title, text) "
+        "VALUES ('delete', old.search_id, old.title, old.text); "
+        "INSERT INTO notes_search(rowid, title, text) VALUES (new.search_id, new.title, new.text); "
+        "END",
+        "INSERT INTO notes_search(notes_search) VALUES ('rebuild')",
+    ]),
+    Migration(4, "Delta-compressed revisions of the notes", [
+        "CREATE TABLE IF NOT EXISTS note_revisions("
+        "note_id varchar(30) references notes(id) ON UPDATE CASCADE ON DELETE CASCADE,"
+        "revision integer,"
+        "creation_date timestamp,"
+        "snapshot boolean,"
+        "length integer,"
+        "data text,"
+        "primary key (note_id, revision)"
+        ") WITHOUT ROWID",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class SQLiteMigrator:
+    @staticmethod
+    def create_version_table(connection) -> None:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version("
+            "version integer primary key,"
+            "description text,"
+            "applied_at timestamp DEFAULT CURRENT_TIMESTAMP"
+            ")"
+        )
+
+    @staticmethod
+    def current_version(connection) -> int:
+        return connection.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+    @staticmethod
+    def upgrade(connection) -> None:
+        """
+        Applies every pending migration in its own transaction,
+        so a failed step leaves the database at the previous version.
+        The connection has to be in the autocommit mode, transactions are opened explicitly
+        """
+        SQLiteMigrator.create_version_table(connection)
+
+        for migration in MIGRATIONS:
+            if migration.version <= SQLiteMigrator.current_version(connection):
+                continue
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in migration.statements:
+                    connection.execute(statement)
+                connection.execute(
+                    "INSERT INTO schema_version(version, description) VALUES(?, ?)",
+                    (migration.version, migration.description)
+                )
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            else:
+                connection.execute("COMMIT")
+                Screen.print(f"\n{Fore.LIGHTGREEN_EX}Schema was upgraded to version {migration.version}: "
+                             f"{migration.description}")
@@ -0,0 +1,127 @@
+"""
+Registry of the DataBaseSQLiteImp queries.
+sqlite3 keeps compiled statements in the per-connection cache keyed by the statement text,
+so every query is parsed once per connection
+"""
+
+QUERIES = {
+    "get_grouped_notes": (
+        "SELECT groups.title, json_group_array(notes.title) FILTER (WHERE notes.id IS NOT NULL) FROM groups "
+        "LEFT JOIN groups_notes ON groups_notes.group_id = groups.id "
+        "LEFT JOIN notes ON notes.id = groups_notes.note_id "
+        "GROUP BY groups.id"
+    ),
+    "get_attached_group_notes": (
+        "SELECT title FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id=?1)"
+    ),
+    "get_all_groups": "SELECT title FROM groups",
+    # Keyset pagination, ?1 is the title of the last/first shown row
+    "get_groups_page": "SELECT title FROM groups WHERE title > ?1 ORDER BY title LIMIT ?2",
+    "get_groups_page_backward": "SELECT title FROM groups WHERE title < ?1 ORDER BY title DESC LIMIT ?2",
+    # Empty groups are joined with a NULL note, which is sorted as an empty title
+    "get_grouped_notes_page": (
+        "SELECT groups.title, notes.title FROM groups "
+        "LEFT JOIN groups_notes ON groups_notes.group_id = groups.id "
+        "LEFT JOIN notes ON notes.id = groups_notes.note_id "
+        "WHERE (groups.title, COALESCE(notes.title, '')) > (?1, ?2) "
+        "ORDER BY groups.title, COALESCE(notes.title, '') LIMIT ?3"
+    ),
+    "get_grouped_notes_page_backward": (
+        "SELECT groups.title, notes.title FROM groups "
+        "LEFT JOIN groups_notes ON groups_notes.group_id = groups.id "
+        "LEFT JOIN notes ON notes.id = groups_notes.note_id "
+        "WHERE (groups.title, COALESCE(notes.title, '')) < (?1, ?2) "
+        "ORDER BY groups.title DESC, COALESCE(notes.title, '') DESC LIMIT ?3"
+    ),
+    "get_all_notes": "SELECT title FROM notes",
+    "get_all_notes_dates": (
+        "SELECT notes.title, groups_notes.group_id, notes.last_change_date "
+        "FROM notes LEFT JOIN groups_notes ON groups_notes.note_id = notes.id"
+    ),
+    "check_group": "SELECT COUNT(*) FROM groups WHERE id=?1",
+    "check_note": "SELECT id, text, creation_date, last_change_date FROM notes WHERE title=?1",
+    # Length and number of lines are counted by the engine, so the text isn't copied into Python
+    "get_note_info": (
+        "SELECT notes.id, groups_notes.group_id, creation_date, last_change_date, "
+        "length(COALESCE(text, '')), "
+        "length(COALESCE(text, '')) - length(replace(COALESCE(text, ''), char(10), '')) + 1 "
+        "FROM notes LEFT JOIN groups_notes ON groups_notes.note_id = notes.id WHERE notes.title=?1"
+    ),
+    "get_note_text": "SELECT text FROM notes WHERE title=?1",
+    "create_group": "INSERT INTO groups(id, title) VALUES(?1, ?1)",
+    "update_group": "UPDATE groups SET id=?1, title=?1 WHERE id=?2",
+    "delete_group_notes": "DELETE FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id=?1)",
+    "delete_group": "DELETE FROM groups WHERE id=?1",
+    "create_note": (
+        "INSERT INTO notes (id, title, text, creation_date, last_change_date) VALUES(?1, ?1, ?2, ?3, ?3)"
+    ),
+    "attach_note": "INSERT INTO groups_notes (group_id, note_id) VALUES(?1, ?2)",
+    "update_note_title": "UPDATE notes SET id=?1, title=?1, last_change_date=?2 WHERE title=?3",
+    "update_note_text": "UPDATE notes SET text=?1, last_change_date=?2 WHERE title=?3",
+    "delete_note": "DELETE FROM notes WHERE title=?1",
+    # Text updates run in the IMMEDIATE transactions, so no other writer can take the same revision number
+    "get_last_revision": (
+        "SELECT id, last_change_date, (SELECT MAX(revision) FROM note_revisions WHERE note_id = notes.id) "
+        "FROM notes WHERE title=?1"
+    ),
+    "create_note_revision": (
+        "INSERT INTO note_revisions (note_id, revision, creation_date, snapshot, length, data) "
+        "VALUES(?1, ?2, ?3, ?4, ?5, ?6)"
+    ),
+    "get_note_history": (
+        "SELECT revision, creation_date, snapshot, length, length(data) FROM note_revisions "
+        "WHERE note_id=?1 ORDER BY revision"
+    ),
+    # Rows from the nearest snapshot up to the requested revision, see databases.revisions
+    "get_revision_chain": (
+        "SELECT revision, snapshot, data FROM note_revisions WHERE note_id=?1 AND revision <= ?2 AND revision >= ("
+        "SELECT MAX(revision) FROM note_revisions WHERE note_id=?1 AND revision <= ?2 AND snapshot"
+        ") ORDER BY revision"
+    ),
+    # Title matches are weighted higher than the text ones, bm25() is negative, so the best match is the lowest
+    "search_notes": (
+        "SELECT notes.title, groups_notes.group_id, -bm25(notes_search, 10.0, 1.0) AS rank, notes.text "
+        "FROM notes_search JOIN notes ON notes.search_id = notes_search.rowid "
+        "LEFT JOIN groups_notes ON groups_notes.note_id = notes.id "
+        "WHERE notes_search MATCH ?1 ORDER BY rank DESC LIMIT ?2"
+    ),
+
+    # Bulk import moves rows from the import_notes staging table, see IMPORT_TABLE
+    "stage_import_note": (
+        "INSERT INTO import_notes (position, group_id, id, text, creation_date, last_change_date) "
+        "VALUES(?1, ?2, ?3, ?4, ?5, ?6)"
+    ),
+    "import_notes_skip_duplicates": (
+        "DELETE FROM import_notes WHERE position NOT IN (SELECT MIN(position) FROM import_notes GROUP BY id) "
+        "OR id IN (SELECT id FROM notes)"
+    ),
+    "import_notes_overwrite_duplicates": (
+        "DELETE FROM import_notes WHERE position NOT IN (SELECT MAX(position) FROM import_notes GROUP BY id)"
+    ),
+    # WHERE clause resolves the parsing ambiguity of the upsert after a SELECT
+    "import_notes": (
+        "INSERT INTO notes (id, title, text, creation_date, last_change_date) "
+        "SELECT id, id, text, creation_date, last_change_date FROM import_notes WHERE true "
+        "ON CONFLICT (id) DO UPDATE SET text=excluded.text, last_change_date=excluded.last_change_date"
+    ),
+    "detach_import_notes": "DELETE FROM groups_notes WHERE note_id IN (SELECT id FROM import_notes)",
+    "attach_import_notes": "INSERT INTO groups_notes (group_id, note_id) SELECT group_id, id FROM import_notes",
+    "count_import_notes": "SELECT COUNT(*) FROM import_notes",
+    "clear_import_notes": "DELETE FROM import_notes",
+
+    "export_notes": (
+        "SELECT groups_notes.group_id, notes.title, notes.text, notes.creation_date, notes.last_change_date "
+        "FROM notes JOIN groups_notes ON groups_notes.note_id = notes.id"
+    ),
+}
+
+IMPORT_TABLE = (
+    "CREATE TEMP TABLE IF NOT EXISTS import_notes("
+    "position integer,"
+    "group_id varchar(30),"
+    "id varchar(30),"
+    "text text,"
+    "creation_date timestamp,"
+    "last_change_date timestamp"
+    ")"
+)
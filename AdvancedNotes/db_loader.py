@@ -1,49 +1,156 @@
 """
 You can choose database before launching program.
-choose_db() function checks existence of the chosen database
+choose_db() function checks existence of the chosen database.
+Modules of a backend (its driver and configuration) are imported only when the backend is chosen
 """
 
-import os
-
 from view import View
-from psql import DataBasePSQLImp
+from cache import DataBaseCache
 
 from databases.idatabase import DataBase
+from databases.metrics import Metrics
+from settings.config import ASYNC_ENGINE, METRICS
+
+DATABASES = ("mongo", "psql", "sqlite")
+# Environment variable with the database to load, so choose_db() doesn't ask for it
+DATABASE_VARIABLE = "MYNOTES_DB"
+# Returned by connect_db() when the PostgreSQL tables don't exist, confirm_schema() asks whether to create them
+SCHEMA_MISSING = "schema missing"
+
+
+def connect_mongo() -> tuple[DataBase, str] | None:
+    from databases.mongodb_impl.connection import MongoDBConnection
+
+    test_connection = MongoDBConnection()
+    # pymongo Database objects don't support truth value testing
+    if (connection := test_connection.check_connection()) is None:
+        return None
+    if ASYNC_ENGINE:
+        from async_adapter import AsyncDataBaseAdapter
+        from async_mongo import AsyncDataBaseMongoImp
+
+        database = AsyncDataBaseAdapter.adapt(AsyncDataBaseMongoImp())
+        AsyncDataBaseAdapter.run(AsyncDataBaseMongoImp.connect())
+    else:
+        from mongo import DataBaseMongoImp
+
+        database = DataBaseMongoImp()
+        database.set_connection(connection)
+    return database, "Successfully connected to MongoDB 'mynotes'"
+
+
+def connect_psql(create_schema: bool = False) -> tuple[DataBase, str] | str | None:
+    """
+    :param create_schema: Create the missing tables, otherwise SCHEMA_MISSING is returned
+
+    :return: Database and the status message, SCHEMA_MISSING or None on the connection errors
+    """
+    from databases.psql_impl.config import PSQL_USER, PSQL_DATA_BASE_NAME
+    from databases.psql_impl.connection import PSQLConnection
+    from databases.psql_impl.psql_exceptions import TablesDoesNotExists
+
+    test_connection = PSQLConnection()
+    if ASYNC_ENGINE:
+        from async_adapter import AsyncDataBaseAdapter
+        from async_psql import AsyncDataBasePSQLImp
+
+        # asyncpg opens its own connections, the psycopg2 one only checks and migrates the schema
+        try:
+            connection = test_connection.check_connection(create_schema=create_schema)
+        except TablesDoesNotExists:
+            return SCHEMA_MISSING
+        if not connection:
+            return None
+        connection.close()
+        database = AsyncDataBaseAdapter.adapt(AsyncDataBasePSQLImp())
+        AsyncDataBaseAdapter.run(AsyncDataBasePSQLImp.create_pool())
+    else:
+        from psql import DataBasePSQLImp
+        from databases.psql_impl.queries import PreparedConnection
+        from databases.psql_impl.slow_query_log import SlowQueryLog
+
+        try:
+            pool = test_connection.check_pool(create_schema, connection_factory=PreparedConnection)
+        except TablesDoesNotExists:
+            return SCHEMA_MISSING
+        if not pool:
+            return None
+        database = DataBasePSQLImp()
+        database.set_pool(pool)
+        SlowQueryLog.configure()
+    return database, f"Successfully connected to database '{PSQL_DATA_BASE_NAME}' as user: {PSQL_USER}"
+
+
+def connect_sqlite() -> tuple[DataBase, str] | None:
+    from sqlite import DataBaseSQLiteImp
+    from databases.sqlite_impl.config import SQLITE_PATH
+    from databases.sqlite_impl.connection import SQLiteConnection
+
+    # Embedded database has no network round trips to overlap, so ASYNC_ENGINE doesn't apply to it
+    if not (connection := SQLiteConnection.check_connection()):
+        return None
+    database = DataBaseSQLiteImp()
+    database.set_connection(connection)
+    return database, f"Successfully opened database file '{SQLITE_PATH}'"
+
+
+def wrap_db(connected: tuple[DataBase, str]) -> tuple[DataBase, str]:
+    """ :return: Database wrapped into the client-side cache and the status message """
+    database, message = connected
+    return DataBaseCache.cached(Metrics.instrumented(database) if METRICS else database), message
+
+
+def connect_db(name: str) -> tuple[DataBase, str] | str | None:
+    """
+    Connects the database without any output except the connection errors and questions,
+    so it can run in a background thread
 
-from databases.psql_impl.config import PSQL_USER, PSQL_DATA_BASE_NAME
+    :param name: One of the DATABASES
+    :return: Result of wrap_db(), SCHEMA_MISSING when the tables should be created by confirm_schema()
+    """
+    connect = {"mongo": connect_mongo, "psql": connect_psql, "sqlite": connect_sqlite}.get(name.lower())
+    if connect and (connected := connect()):
+        return connected if connected == SCHEMA_MISSING else wrap_db(connected)
 
-from databases.psql_impl.connection import PSQLConnection
-from databases.mongodb_impl.connection import MongoDBConnection
 
-from mongo import DataBaseMongoImp
+def confirm_schema(connected: tuple[DataBase, str] | str | None) -> tuple[DataBase, str] | None:
+    """
+    Asks whether to create the missing tables, so it has to run in the main thread
 
+    :param connected: Result of connect_db()
+    :return: Result of connect_db() with the created tables, None if the user refused
+    """
+    if connected != SCHEMA_MISSING:
+        return connected
+    View.print_text("DataBase tables do not exists or damaged\n"
+                    "Could I create or upgrade the schema to start work [Y/N]?\n"
+                    "Missing tables will be created, existing tables and notes are kept:")
+    View.show()
+    if input(">>> ").lower() != "y":
+        return None
+    if connected := connect_psql(create_schema=True):
+        return wrap_db(connected)
 
-def choose_db() -> DataBase:
-    print("How can I load your notes [mongo/psql]?")
-    match input(">>> ").lower():
-        case "mongo":
-            test_connection = MongoDBConnection()
-            if test_connection.check_connection() is not None:
-                database = DataBaseMongoImp()
-                database.set_connection(test_connection.check_connection())
-                os.system('cls' if os.name == 'nt' else 'clear')
-                View.print_status_message(f"Successfully connected to MongoDB 'mynotes'")
 
-                return database
+def show_connected(connected: tuple[DataBase, str] | None) -> DataBase | None:
+    """ :return: Database returned by connect_db() after its status message is shown """
+    if connected:
+        database, message = connected
+        View.clear_screen()
+        View.print_status_message(message)
+        return database
 
-        case "psql":
-            test_connection = PSQLConnection()
-            if connection := test_connection.check_connection():
-                database = DataBasePSQLImp()
-                database.set_connection(connection)
-                os.system('cls' if os.name == 'nt' else 'clear')
-                View.print_status_message(
-                    f"Successfully connected to database '{PSQL_DATA_BASE_NAME}' as user: {PSQL_USER}"
-                )
 
-                return database
-        case _:
-            View.print_error_message("Invalid input!")
+def choose_db(name: str | None = None) -> DataBase:
+    """ :param name: One of the DATABASES, it's asked for when it isn't given """
+    if name is None:
+        View.print_text(f"How can I load your notes [{'/'.join(DATABASES)}]?")
+        View.show()
+        name = input(">>> ")
+    if name.lower() not in DATABASES:
+        View.print_error_message("Invalid input!")
+        return None
+    return show_connected(confirm_schema(connect_db(name)))
 
 
 View()
@@ -0,0 +1,141 @@
+"""
+Streaming export of notes to a JSONL file, a Markdown directory tree or a compressed tarball.
+Notes are written one by one while the database cursor is read in batches, so memory usage stays constant
+
+Markdown tree and tarballs use the same layout, which can be imported back with the 'import' command:
+every group is a directory, every note is a '<title>.md' file inside it.
+Titles which give the same file name in a directory are told apart by a ' (<counter>)' suffix
+"""
+
+import io
+import os
+import json
+import tarfile
+
+from typing import Callable, Iterator
+
+from databases.idatabase import DataBase
+from databases.note import NoteRecord
+
+from settings.config import EXPORT_BATCH_SIZE
+
+EXPORT_FORMATS = ("jsonl", "markdown", "tar.gz", "tar.zst")
+# Characters which can't be used in file names on the supported platforms
+FORBIDDEN_CHARACTERS = str.maketrans({character: "_" for character in '<>:"/\\|?*'})
+
+
+class UniqueNames:
+    """ File names of a single directory, case-insensitive file systems are taken into account """
+    def __init__(self):
+        self.__taken = set()
+
+    def add(self, name: str) -> str:
+        """ :return: The name or the name with the first free ' (<counter>)' suffix """
+        unique, counter = name, 1
+        while unique.casefold() in self.__taken:
+            counter += 1
+            unique = f"{name} ({counter})"
+        self.__taken.add(unique.casefold())
+        return unique
+
+
+class NotesExporter:
+    @staticmethod
+    def file_name(title: str) -> str:
+        name = title.translate(FORBIDDEN_CHARACTERS).strip()
+        # Names of the dots only ('.', '..') would point to the export directory or outside of it
+        return name if name.strip(".") else "_"
+
+    @staticmethod
+    def note_paths(notes: Iterator[NoteRecord]) -> Iterator[tuple[NoteRecord, str]]:
+        """ :return: Notes with their unique '<group>/<title>.md' paths relative to the export root """
+        groups = UniqueNames()
+        # Group title -> directory name and names of its notes
+        directories: dict[str, tuple[str, UniqueNames]] = {}
+        for note in notes:
+            if (directory := directories.get(note.group_title)) is None:
+                directory = directories[note.group_title] = (
+                    groups.add(NotesExporter.file_name(note.group_title)), UniqueNames()
+                )
+            group_name, note_names = directory
+            yield note, f"{group_name}/{note_names.add(NotesExporter.file_name(note.title))}.md"
+
+    @staticmethod
+    def export(database: DataBase, path: str, export_format: str, batch_size: int = EXPORT_BATCH_SIZE,
+               progress: Callable[[int], None] | None = None) -> int:
+        """
+        :param database: Database to export notes from
+        :param path: Output file or directory (for the 'markdown' format)
+        :param export_format: One of the EXPORT_FORMATS
+        :param batch_size: Number of rows fetched from the database server at once
+        :param progress: Called after every batch_size written notes with the number of exported notes
+
+        :return: Number of exported notes
+        """
+        writer = {
+            "jsonl": NotesExporter.write_jsonl,
+            "markdown": NotesExporter.write_markdown,
+            "tar.gz": NotesExporter.write_tar_gz,
+            "tar.zst": NotesExporter.write_tar_zst
+        }[export_format]
+
+        exported = 0
+
+        def counted(notes: Iterator[NoteRecord]) -> Iterator[NoteRecord]:
+            nonlocal exported
+            for note in notes:
+                yield note
+                exported += 1
+                if progress and not exported % batch_size:
+                    progress(exported)
+
+        writer(counted(database.export_notes(batch_size)), path)
+        return exported
+
+    @staticmethod
+    def write_jsonl(notes: Iterator[NoteRecord], path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for note in notes:
+                file.write(json.dumps({
+                    "group": note.group_title,
+                    "title": note.title,
+                    "text": note.text,
+                    "creation_date": note.creation_date.isoformat(),
+                    "last_change_date": note.last_change_date.isoformat()
+                }, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def write_markdown(notes: Iterator[NoteRecord], path: str) -> None:
+        for note, note_name in NotesExporter.note_paths(notes):
+            note_path = os.path.join(path, *note_name.split("/"))
+            os.makedirs(os.path.dirname(note_path), exist_ok=True)
+            with open(note_path, "w", encoding="utf-8") as file:
+                file.write(note.text)
+            os.utime(note_path, (timestamp := note.last_change_date.timestamp(), timestamp))
+
+    @staticmethod
+    def write_tar(notes: Iterator[NoteRecord], archive: tarfile.TarFile) -> None:
+        """ Adds every note as a separate member, only one note body is held in memory at once """
+        for note, note_name in NotesExporter.note_paths(notes):
+            data = note.text.encode("utf-8")
+            member = tarfile.TarInfo(note_name)
+            member.size = len(data)
+            member.mtime = int(note.last_change_date.timestamp())
+            archive.addfile(member, io.BytesIO(data))
+
+    @staticmethod
+    def write_tar_gz(notes: Iterator[NoteRecord], path: str) -> None:
+        with tarfile.open(path, "w:gz") as archive:
+            NotesExporter.write_tar(notes, archive)
+
+    @staticmethod
+    def write_tar_zst(notes: Iterator[NoteRecord], path: str) -> None:
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("'tar.zst' export requires the zstandard package")
+
+        with open(path, "wb") as file, zstandard.ZstdCompressor().stream_writer(file) as compressor:
+            # Stream mode ('w|') writes the archive sequentially without seeking
+            with tarfile.open(fileobj=compressor, mode="w|") as archive:
+                NotesExporter.write_tar(notes, archive)
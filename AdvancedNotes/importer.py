@@ -0,0 +1,143 @@
+"""
+Bulk import of notes from JSONL files and Markdown directories.
+Notes are read lazily and loaded in batches through DataBase.import_notes()
+
+JSONL: one note per line with "group", "title", "text", "creation_date" and "last_change_date" keys.
+Only "title" is required, notes without a group are imported into the 'Home' group
+Markdown: every subdirectory is a group, every *.md file inside it is a note titled by the file name.
+Files in the root directory are imported into the 'Home' group
+"""
+
+import os
+import json
+
+from datetime import datetime
+from typing import Callable, Iterator
+
+from databases.idatabase import DataBase
+from databases.note import NoteRecord
+
+from settings.config import IMPORT_BATCH_SIZE
+
+# Title length limit of the database schema
+TITLE_LENGTH = 30
+DEFAULT_GROUP = "Home"
+CONFLICT_OPTIONS = ("skip", "overwrite", "rename")
+
+
+class NotesImportError(Exception):
+    """ Raised when the database failed to import a batch, the import stops at it """
+
+
+class NotesImporter:
+    @staticmethod
+    def read(path: str) -> Iterator[NoteRecord]:
+        return NotesImporter.read_markdown(path) if os.path.isdir(path) else NotesImporter.read_jsonl(path)
+
+    @staticmethod
+    def read_jsonl(path: str) -> Iterator[NoteRecord]:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                now = datetime.now()
+                yield NoteRecord(
+                    group_title=(record.get("group") or DEFAULT_GROUP)[:TITLE_LENGTH],
+                    title=record["title"][:TITLE_LENGTH],
+                    text=record.get("text", ""),
+                    creation_date=record.get("creation_date") or now,
+                    last_change_date=record.get("last_change_date") or now
+                )
+
+    @staticmethod
+    def read_markdown(path: str) -> Iterator[NoteRecord]:
+        for directory, _, file_names in os.walk(path):
+            relative_path = os.path.relpath(directory, path)
+            # Nested directories belong to the group of their top level directory
+            group_title = DEFAULT_GROUP if relative_path == "." else relative_path.split(os.sep)[0]
+            for file_name in sorted(file_names):
+                if not file_name.endswith(".md"):
+                    continue
+                file_path = os.path.join(directory, file_name)
+                with open(file_path, encoding="utf-8") as file:
+                    text = file.read()
+                modification_date = datetime.fromtimestamp(os.path.getmtime(file_path))
+                yield NoteRecord(
+                    group_title=group_title[:TITLE_LENGTH],
+                    title=file_name[:-len(".md")][:TITLE_LENGTH],
+                    text=text,
+                    creation_date=modification_date,
+                    last_change_date=modification_date
+                )
+
+    @staticmethod
+    def free_title(title: str, taken_titles: set[str]) -> str:
+        """ :return: title with the smallest free ' (n)' suffix which fits in the title length limit """
+        number = 2
+        while (new_title := f"{title[:TITLE_LENGTH - len(suffix := f' ({number})')]}{suffix}") in taken_titles:
+            number += 1
+        return new_title
+
+    @staticmethod
+    def import_path(database: DataBase, path: str, on_conflict: str = "skip", batch_size: int = IMPORT_BATCH_SIZE,
+                    progress: Callable[[int, int], None] | None = None) -> tuple[int, int]:
+        """
+        :param database: Database to import notes in
+        :param path: JSONL file or Markdown directory
+        :param on_conflict: 'skip', 'overwrite' or 'rename' notes with already existing titles
+        :param batch_size: Number of notes loaded with a single DataBase.import_notes() call
+        :param progress: Called after every batch with the numbers of imported and processed notes
+
+        :return: Numbers of imported and processed notes
+        :raise NotesImportError: When a batch wasn't imported, the previous batches stay imported
+        """
+        groups = set(database.get_all_groups() or [])
+        # Titles given by the import and titles found taken in the database
+        taken_titles = set()
+        imported = processed = 0
+        batch = []
+
+        def rename_taken() -> None:
+            """
+            Gives the batch notes free titles. Titles of the batch are checked in the database by a bulk call,
+            renamed notes are checked again until every title is free
+            """
+            pending = [(note, note.title) for note in batch]
+            while pending:
+                for note, title in pending:
+                    if note.title in taken_titles:
+                        note.title = NotesImporter.free_title(title, taken_titles)
+                    taken_titles.add(note.title)
+                found = database.check_notes([note.title for note, _ in pending]) or []
+                pending = [(note, title) for (note, title), note_data in zip(pending, found) if note_data]
+
+        def flush() -> None:
+            nonlocal imported
+            if on_conflict == "rename":
+                rename_taken()
+            for group_title in {note.group_title for note in batch} - groups:
+                database.create_group(group_title)
+                groups.add(group_title)
+            # Renamed titles are free already, 'skip' just protects against concurrent writers
+            batch_imported = database.import_notes(batch, "skip" if on_conflict == "rename" else on_conflict)
+            # Backends print their errors and return None instead of the number of the imported notes
+            if batch_imported is None:
+                raise NotesImportError(
+                    f"batch of {len(batch)} notes from '{batch[0].title}' to '{batch[-1].title}' wasn't imported, "
+                    f"{imported} of {processed - len(batch)} notes before it were imported"
+                )
+            imported += batch_imported
+            batch.clear()
+            if progress:
+                progress(imported, processed)
+
+        for note in NotesImporter.read(path):
+            batch.append(note)
+            processed += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        return imported, processed
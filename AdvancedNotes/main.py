@@ -10,38 +10,66 @@ Navigation in autocompletion and text redactor with keyboard arrows.
 Also, u can easily switch between the other database realisations
 """
 
+# Imported first, the program starts when it's imported
+from startup import StartupReport, in_background
+
 import os
-import pyperclip
+import sys
+import argparse
+
+from concurrent.futures import Future
+
+from itertools import groupby
 
 from view import View
-from custom_input import CustomInput
-from databases.note import Note
-from db_loader import choose_db
+from screen import Screen
+from batch import BatchInput, BatchError, read_lines, EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE, EXIT_NO_DATABASE
+from databases.note import NoteInfo
+from databases.idatabase import DataBase
+from databases.metrics import Metrics
+from db_loader import choose_db, connect_db, confirm_schema, show_connected, DATABASES, DATABASE_VARIABLE, \
+    SCHEMA_MISSING
+from importer import NotesImporter, NotesImportError, CONFLICT_OPTIONS
+from exporter import NotesExporter, EXPORT_FORMATS
 
 from settings.commands import MAIN_COMMANDS, GROUPS_COMMANDS, NOTES_COMMANDS
-from settings.colors import TEXT_COLOR, STATUS_COLOR
-from settings.config import LINE_SYMBOL
+from settings.colors import STATUS_COLOR
+from settings.config import IMPORT_CONFLICT, SEARCH_LIMIT, PAGE_SIZE, METRICS
+
+# Words followed by the arguments, which can be the command words as well
+ARGUMENT_COMMAND_WORDS = {"select", "create", "delete", "jump", "search", "diff", "restore", "import", "export", "dump"}
+# Words of the commands, the rest of the input (titles, paths, revisions) isn't a part of the command name
+COMMAND_WORDS = {
+    "help", "cls", "quit", "stats", "reset", "groups", "notes", "next", "prev", "group", "note", "edit", "title",
+    "text", "read", "info", "copy", "history", *ARGUMENT_COMMAND_WORDS
+}
 
 
 class App:
     __attached_group = None
     __attached_note = None
 
+    # Shown pages of the listings, their first and last rows are the keys of the neighbouring pages
+    __groups_page = []
+    __notes_page = []
+
+    # Loading of the completed titles started along with the first prompt
+    __warm_up: Future | None = None
+
     @staticmethod
     def _screen_cleaner(function):
         """ Cosmetic decorator. Cleans app screen before and after using a text editor """
         def wrapper(*args):
-            os.system('cls' if os.name == 'nt' else 'clear')
+            View.clear_screen()
             if status_message := function(*args):
-                os.system('cls' if os.name == 'nt' else 'clear')
+                View.clear_screen()
                 View.print_status_message(status_message)
         return wrapper
 
     @staticmethod
     def _delete_confirmation(function):
         def wrapper(title):
-            View.print_error_message(f"\nAre you sure to delete this [Y/N]?{TEXT_COLOR}")
-            match input(LINE_SYMBOL).lower():
+            match input_handler.confirmation_input("\nAre you sure to delete this [Y/N]?").lower():
                 case "y":
                     function(title)
                 case "n":
@@ -78,7 +106,7 @@ class App:
         def wrapper(note_title):
             if not database.get_attached_group_notes(group_title := App.get_attached_group()):
                 View.print_error_message(f"Group: '{group_title}' is empty")
-            elif not (database.check_note(note_title)):
+            elif not database.get_note_info(note_title):
                 View.print_error_message(f"Note title: '{note_title}' doesn't exists")
             else:
                 function(note_title)
@@ -96,7 +124,7 @@ class App:
     @staticmethod
     def _note_title_duplication(function):
         def wrapper(note_title):
-            if database.check_note(note_title):
+            if database.get_note_info(note_title):
                 View.print_error_message(f"Note title: '{note_title}' already exists")
             else:
                 function(note_title)
@@ -105,11 +133,11 @@ class App:
     @staticmethod
     def _title_input(function):
         def wrapper():
-            os.system('cls' if os.name == 'nt' else 'clear')
+            View.clear_screen()
             if new_title := input_handler.text_editor(multiline=False):
                 function(new_title)
             else:
-                os.system('cls' if os.name == 'nt' else 'clear')
+                View.clear_screen()
                 View.print_error_message("title shouldn't be empty")
 
         return wrapper
@@ -125,13 +153,22 @@ class App:
 
     @staticmethod
     def _note_not_selected(function):
-        def wrapper():
+        def wrapper(*args):
             if App.get_attached_note():
-                function()
+                function(*args)
             else:
                 View.print_error_message(f"Note doesn't selected")
         return wrapper
 
+    @staticmethod
+    def _revision_number(function):
+        def wrapper(*revisions):
+            if all(revision.isdigit() and int(revision) > 0 for revision in revisions):
+                function(*map(int, revisions))
+            else:
+                View.print_error_message("Revision should be a positive number")
+        return wrapper
+
     @staticmethod
     def _get_note(function):
         def wrapper(*args):
@@ -142,94 +179,263 @@ class App:
     @staticmethod
     def mainloop() -> int:
         View.print_text("\nWelcome to MyNotes!\nEnter 'help' option to show context menu")
+        App.warm_up()
         while True:
             try:
                 View.print_attached_group_and_note(App.get_attached_group(), App.get_attached_note())
-                command = input_handler.command_input(database.get_all_groups(),
-                                                      database.get_attached_group_notes(App.get_attached_group()))
-                match command.split():
-
-                    # Main menu commands
-                    case "help", :
-                        View.print_table("Main commands:", MAIN_COMMANDS["commands"], MAIN_COMMANDS["descriptions"])
-                    case "cls", :
-                        os.system('cls' if os.name == 'nt' else 'clear')
-                    case "help", "groups":
-                        View.print_table("Groups commands:", GROUPS_COMMANDS["commands"],
-                                         GROUPS_COMMANDS["descriptions"])
-                    case "help", "notes":
-                        View.print_table("Notes commands:", NOTES_COMMANDS["commands"], NOTES_COMMANDS["descriptions"])
-                    case "quit", :
-                        return 0
-
-                    # Groups navigation commands
-                    case "groups", :
-                        View.print_table_with_pointer("Groups", database.get_all_groups(), App.get_attached_group())
-                    case "group", "select", *group_title:
-                        App.group_select(" ".join(group_title))
-
-                    # Groups editing commands
-                    case "group", "create", *group_title:
-                        App.group_create(" ".join(group_title))
-
-                    case "group", "edit", "title":
-                        App.group_edit_title()
+                command = input_handler.command_input()
+                # Commands change the completed titles, so they wait until the titles are loaded
+                App.wait_warm_up()
+                if (status := App.execute(command)) is not None:
+                    return status
 
-                    case "group", "delete", *group_title:
-                        App.group_delete(" ".join(group_title))
-
-                    # Notes navigation commands
-                    case "notes", :
-                        View.print_table_with_pointer("Notes", database.get_grouped_notes(),
-                                                      note.title if (note := App.get_attached_note()) else "")
-
-                    case "note", "select", *note_title:
-                        App.note_select(" ".join(note_title))
-
-                    case "note", "read":
-                        App.note_read()
-
-                    case "note", "info":
-                        App.note_info()
+            except KeyboardInterrupt:
+                View.print_error_message("Ctrl+C hotkey was intercepted. Use 'quit' option to close the program!")
 
-                    case "note", "copy":
-                        App.note_copy()
+    @staticmethod
+    def run_batch() -> int:
+        """
+        Runs the commands of the batch input in a single transaction.
+        On the transactional databases the first failed command rolls back the whole batch,
+        so a script is applied completely or not at all. Other databases keep the commands applied before it
+
+        :return: Exit code of the program
+        """
+        applied = 0
+        try:
+            with database.transaction():
+                for command in input_handler.commands():
+                    line_number, errors = input_handler.line_number, View.errors
+                    try:
+                        status = App.execute(command)
+                    # Database errors are raised inside the transaction, so it's rolled back
+                    except Exception as error:
+                        raise BatchError(f"Line {line_number}: '{command}' failed: {error}") from error
+                    if View.errors > errors:
+                        raise BatchError(f"Line {line_number}: '{command}' failed")
+                    applied += 1
+                    if status is not None:
+                        break
+        except BatchError as error:
+            View.print_error_message(f"{error}, {App.batch_outcome(applied)}")
+            return EXIT_FAILURE
+        # Errors of the commands are wrapped into BatchError, so OSError comes from reading the batch file
+        except OSError as error:
+            View.print_error_message(f"Batch file can't be read: {error}, {App.batch_outcome(applied)}")
+            return EXIT_USAGE
+        # Errors of the batch file and of the transaction commit
+        except Exception as error:
+            View.print_error_message(f"Batch was interrupted: {error}, {App.batch_outcome(applied)}")
+            return EXIT_FAILURE
+        return EXIT_SUCCESS
 
-                    # Notes editing commands
-                    case "note", "create", *note_title:
-                        App.note_create(" ".join(note_title))
+    @staticmethod
+    def batch_outcome(applied: int) -> str:
+        """ :return: What happened to the commands of the interrupted batch """
+        if database.is_transactional():
+            return "the batch was rolled back"
+        return f"{applied} command{' was' if applied == 1 else 's were'} applied before the failure"
 
-                    case "note", "edit", "text":
-                        App.note_edit_text()
+    @staticmethod
+    def execute(command: str) -> int | None:
+        """ Dispatches the command of the interactive or the batch mode, :return: Exit code after the 'quit' command """
+        with Metrics.command(App.command_name(command)):
+            match command.split():
+
+                # Main menu commands
+                case "help", :
+                    View.print_table("Main commands:", MAIN_COMMANDS["commands"], MAIN_COMMANDS["descriptions"])
+                case "cls", :
+                    View.clear_screen()
+                case "help", "groups":
+                    View.print_table("Groups commands:", GROUPS_COMMANDS["commands"],
+                                     GROUPS_COMMANDS["descriptions"])
+                case "help", "notes":
+                    View.print_table("Notes commands:", NOTES_COMMANDS["commands"],
+                                     NOTES_COMMANDS["descriptions"])
+                case "quit", :
+                    return 0
+
+                # Statistics commands
+                case "stats", :
+                    App.stats()
+                case "stats", "dump", *path:
+                    App.stats_dump(" ".join(path))
+                case "stats", "reset":
+                    Metrics.reset()
+                    View.print_status_message("Statistics were reset")
+
+                # Groups navigation commands
+                case "groups", :
+                    App.groups_list()
+                case "groups", ("next" | "prev") as direction:
+                    App.groups_list(direction)
+                case "group", "select", *group_title:
+                    App.group_select(" ".join(group_title))
+
+                # Groups editing commands
+                case "group", "create", *group_title:
+                    App.group_create(" ".join(group_title))
+
+                case "group", "edit", "title":
+                    App.group_edit_title()
+
+                case "group", "delete", *group_title:
+                    App.group_delete(" ".join(group_title))
+
+                # Notes navigation commands
+                case "notes", :
+                    App.notes_list()
+                case "notes", ("next" | "prev") as direction:
+                    App.notes_list(direction)
+
+                case "note", "select", *note_title:
+                    App.note_select(" ".join(note_title))
+
+                case "jump", *title:
+                    App.jump(" ".join(title))
+
+                case "note", "read":
+                    App.note_read()
+
+                case "note", "info":
+                    App.note_info()
+
+                case "note", "copy":
+                    App.note_copy()
+
+                case "note", "search", *query:
+                    App.note_search(" ".join(query))
+
+                # Notes editing commands
+                case "note", "create", *note_title:
+                    App.note_create(" ".join(note_title))
+
+                case "note", "edit", "text":
+                    App.note_edit_text()
+
+                case "note", "edit", "title":
+                    App.note_edit_title()
+
+                case "note", "delete":
+                    App.note_delete()
+
+                # Revision history commands
+                case "note", "history":
+                    App.note_history()
+
+                case "note", "diff", *revisions if len(revisions) <= 2:
+                    App.note_diff(*revisions)
+
+                case "note", "restore", revision:
+                    App.note_restore(revision)
+
+                # Import commands
+                case "import", on_conflict, *path if on_conflict in CONFLICT_OPTIONS:
+                    App.notes_import(" ".join(path), on_conflict)
+
+                case "import", *path:
+                    App.notes_import(" ".join(path), IMPORT_CONFLICT)
+
+                # Export commands
+                case "export", export_format, *path if export_format in EXPORT_FORMATS:
+                    App.notes_export(" ".join(path), export_format)
 
-                    case "note", "edit", "title":
-                        App.note_edit_title()
+                case _:
+                    View.print_error_message("Wrong command, try again")
 
-                    case "note", "delete":
-                        App.note_delete()
+    @staticmethod
+    def warm_up() -> Future:
+        """ Loads the completed titles in a background thread, its queries fill the client-side cache as well """
+        App.__warm_up = in_background(StartupReport.measured("warm-up", App.__reload_completion))
+        return App.__warm_up
 
-                    case _:
-                        View.print_error_message("Wrong command, try again")
+    @staticmethod
+    def wait_warm_up() -> None:
+        """ Waits for the warm_up() once, the titles are loaded in the foreground when it failed """
+        if (warm_up := App.__warm_up) is None:
+            return
+        App.__warm_up = None
+        if (error := warm_up.exception()) is not None:
+            View.print_error_message(f"Titles weren't loaded in the background: {error}")
+            App.__reload_completion()
 
-            except KeyboardInterrupt:
-                View.print_error_message("Ctrl+C hotkey was intercepted. Use 'quit' option to close the program!")
+    @staticmethod
+    def command_name(command: str) -> str:
+        """ :return: Command without its arguments, statistics are grouped by it """
+        words = []
+        for word in command.split():
+            if word not in COMMAND_WORDS:
+                break
+            words.append(word)
+            if word in ARGUMENT_COMMAND_WORDS:
+                break
+        return " ".join(words) or "unknown"
 
     @staticmethod
     def __set_attached_group(group_title: str | None) -> None:
         App.__attached_group = group_title
+        # Autocompletion of the 'note select' command suggests notes of the attached group
+        input_handler.set_attached_group(group_title)
 
     @staticmethod
     def get_attached_group() -> str:
         return App.__attached_group
 
     @staticmethod
-    def __set_attached_note(note: Note | None) -> None:
+    def __set_attached_note(note: NoteInfo | None) -> None:
         App.__attached_note = note
 
     @staticmethod
-    def get_attached_note() -> Note | None:
+    def get_attached_note() -> NoteInfo | None:
         return App.__attached_note
 
+    @staticmethod
+    def __reload_completion() -> None:
+        """ Loads every completed title again, single changes are applied by the corresponding commands """
+        input_handler.set_titles(database.get_all_groups(), database.get_all_notes_dates())
+
+    @staticmethod
+    def groups_list(direction: str | None = None) -> None:
+        """ Shows the first, next or previous page of groups """
+        page = App.__groups_page
+        match direction:
+            case "next":
+                titles = database.get_groups_page(page[-1] if page else None, PAGE_SIZE, False)
+            case "prev":
+                titles = database.get_groups_page(page[0] if page else None, PAGE_SIZE, True)
+            case _:
+                titles = database.get_groups_page(None, PAGE_SIZE, False)
+
+        if not titles:
+            View.print_error_message("There are no more groups" if direction else "There are no groups")
+            return
+        App.__groups_page = titles
+        View.print_table_with_pointer("Groups", titles, App.get_attached_group())
+
+    @staticmethod
+    def notes_list(direction: str | None = None) -> None:
+        """ Shows the first, next or previous page of notes grouped by their groups """
+        page = App.__notes_page
+        match direction:
+            case "next":
+                rows = database.get_grouped_notes_page(page[-1] if page else None, PAGE_SIZE, False)
+            case "prev":
+                rows = database.get_grouped_notes_page(page[0] if page else None, PAGE_SIZE, True)
+            case _:
+                rows = database.get_grouped_notes_page(None, PAGE_SIZE, False)
+
+        if not rows:
+            View.print_error_message("There are no more notes" if direction else "There are no groups")
+            return
+        App.__notes_page = rows
+        grouped_notes = [
+            (group_title, [note_title for _, note_title in group_rows if note_title])
+            for group_title, group_rows in groupby(rows, key=lambda row: row[0])
+        ]
+        View.print_table_with_pointer("Notes", DataBase.paint_grouped_notes(grouped_notes),
+                                      note.title if (note := App.get_attached_note()) else "")
+
     @staticmethod
     @_empty_title
     @_wrong_group_title
@@ -244,6 +450,7 @@ class App:
         database.create_group(group_title)
         App.__set_attached_group(group_title)
         App.__set_attached_note(None)
+        input_handler.add_group(group_title)
         View.print_status_message(f"\nNew group: {group_title} was successfully created")
 
     @staticmethod
@@ -253,6 +460,7 @@ class App:
     @_screen_cleaner
     def group_edit_title(new_group_title: str) -> str:
         database.update_group(App.get_attached_group(), new_group_title)
+        input_handler.rename_group(App.get_attached_group(), new_group_title)
         App.__set_attached_group(new_group_title)
         return f"\nGroup title was successfully changed to '{new_group_title}'"
 
@@ -263,6 +471,7 @@ class App:
     def group_delete(group_title: str) -> None:
         database.delete_group(group_title)
         App.__set_attached_group(None)
+        input_handler.remove_group(group_title)
         View.print_status_message(f"\nGroup: '{group_title}' was successfully deleted")
 
     @staticmethod
@@ -270,27 +479,49 @@ class App:
     @_group_not_selected
     @_wrong_note_title
     def note_select(note_title: str) -> None:
-        App.__set_attached_note(database.check_note(note_title))
+        # Only metadata is kept, the text is loaded by the commands which need it
+        App.__set_attached_note(database.get_note_info(note_title))
+
+    @staticmethod
+    @_empty_title
+    def jump(title: str) -> None:
+        """ Selects a note of any group together with its group, or a group if there is no such note """
+        if note := database.get_note_info(title):
+            App.__set_attached_group(note.group_title)
+            App.__set_attached_note(note)
+        elif database.check_group(title):
+            App.group_select(title)
+        else:
+            View.print_error_message(f"There is no note or group titled: '{title}'")
 
     @staticmethod
     @_note_not_selected
     @_get_note
-    def note_read(note: Note) -> None:
-        View.print_note(note.title, note.text)
+    def note_read(note: NoteInfo) -> None:
+        View.print_note(note.title, database.get_note_text(note.note_id) or "")
 
     @staticmethod
     @_note_not_selected
     @_get_note
-    def note_info(note: Note) -> None:
+    def note_info(note: NoteInfo) -> None:
         View.print_note_info(note)
 
     @staticmethod
     @_note_not_selected
     @_get_note
-    def note_copy(note: Note) -> None:
+    def note_copy(note: NoteInfo) -> None:
         """ Copies text of the attached note in the system clipboard """
+        # Clipboard backends are looked up on import, so it's deferred to the first copy
+        import pyperclip
+
         View.print_text(f"\n{STATUS_COLOR}Note's text was copied in the global clipboard!!!")
-        pyperclip.copy(note.text)
+        pyperclip.copy(database.get_note_text(note.note_id) or "")
+
+    @staticmethod
+    @_empty_title
+    def note_search(query: str) -> None:
+        """ Searches notes of all groups by words of their titles and texts """
+        View.print_search_results(query, database.search_notes(query, SEARCH_LIMIT) or [])
 
     @staticmethod
     @_empty_title
@@ -300,6 +531,7 @@ class App:
     def note_create(note_title) -> str:
         note_text = input_handler.text_editor()
         database.create_note(App.get_attached_group(), note_title, note_text)
+        input_handler.add_note(note_title, App.get_attached_group())
         App.note_select(note_title)
         return f"Note: '{note_title}' was successfully created!"
 
@@ -307,10 +539,11 @@ class App:
     @_note_not_selected
     @_get_note
     # @_screen_cleaner
-    def note_edit_text(note: Note) -> str:
-        new_text = input_handler.text_editor(buffered_text=note.text)
+    def note_edit_text(note: NoteInfo) -> str:
+        new_text = input_handler.text_editor(buffered_text=database.get_note_text(note.note_id) or "")
         database.update_note(note.note_id, new_text, "text")
-        App.__set_attached_note(database.check_note(note.note_id))
+        input_handler.touch_note(note.title)
+        App.__set_attached_note(database.get_note_info(note.note_id))
         return "Note text was successfully changed!"
 
     @staticmethod
@@ -319,9 +552,10 @@ class App:
     @_note_title_duplication
     @_get_note
     @_screen_cleaner
-    def note_edit_title(new_note_title: str, note: Note) -> str:
+    def note_edit_title(new_note_title: str, note: NoteInfo) -> str:
         database.update_note(note.note_id, new_note_title, "title")
-        App.__set_attached_note(database.check_note(new_note_title))
+        input_handler.rename_note(note.title, new_note_title)
+        App.__set_attached_note(database.get_note_info(new_note_title))
         return "Note title was successfully changed!"
 
     @staticmethod
@@ -329,15 +563,182 @@ class App:
     @_get_note
     @_empty_title
     @_delete_confirmation
-    def note_delete(note: Note) -> None:
+    def note_delete(note: NoteInfo) -> None:
         database.delete_note(note.note_id)
+        input_handler.remove_note(note.title)
         App.__set_attached_note(None)
         View.print_status_message(f"Note: '{note.title}' was successfully deleted!")
 
+    @staticmethod
+    @_note_not_selected
+    @_get_note
+    def note_history(note: NoteInfo) -> None:
+        if revisions := database.get_note_history(note.note_id):
+            View.print_note_history(f"Revisions of '{note.title}':", revisions)
+        else:
+            View.print_error_message(f"Note: '{note.title}' has no revisions yet")
+
+    @staticmethod
+    @_note_not_selected
+    @_revision_number
+    @_get_note
+    def note_diff(*args) -> None:
+        """
+        Shows changes of the last edit without revisions,
+        changes since the revision with one revision and changes between two revisions
+        """
+        *revisions, note = args
+        if not revisions:
+            if len(history := database.get_note_history(note.note_id) or []) < 2:
+                View.print_error_message(f"Note: '{note.title}' has no changes yet")
+                return
+            revisions = [history[-2].revision, history[-1].revision]
+
+        texts = []
+        for revision in revisions:
+            if (text := database.get_note_revision(note.note_id, revision)) is None:
+                View.print_error_message(f"Revision: {revision} doesn't exists")
+                return
+            texts.append(text)
+        if len(revisions) == 1:
+            texts.append(database.get_note_text(note.note_id) or "")
+
+        labels = [f"revision {revision}" for revision in revisions] + ["current"]
+        View.print_diff(labels[0], labels[1], texts[0], texts[1])
+
+    @staticmethod
+    @_note_not_selected
+    @_revision_number
+    @_get_note
+    def note_restore(revision: int, note: NoteInfo) -> None:
+        """ Restored text is saved as a new revision, so the restore itself can be reverted """
+        if (text := database.get_note_revision(note.note_id, revision)) is None:
+            View.print_error_message(f"Revision: {revision} doesn't exists")
+            return
+        database.update_note(note.note_id, text, "text")
+        input_handler.touch_note(note.title)
+        App.__set_attached_note(database.get_note_info(note.note_id))
+        View.print_status_message(f"Note: '{note.title}' was restored to the revision {revision}")
+
+    @staticmethod
+    def notes_import(path: str, on_conflict: str) -> None:
+        """ Imports notes from a JSONL file or a directory of Markdown files """
+        if not os.path.exists(path):
+            View.print_error_message(f"Path: '{path}' doesn't exists")
+            return
+        try:
+            imported, processed = NotesImporter.import_path(database, path, on_conflict,
+                                                            progress=View.print_import_progress)
+        except NotesImportError as error:
+            View.print_error_message(f"\nImport was interrupted: {error}")
+        except (OSError, ValueError, KeyError) as error:
+            View.print_error_message(f"\nImport was interrupted: {error!r}")
+        else:
+            View.print_status_message(f"\n{imported} of {processed} notes were successfully imported")
+        # Interrupted import may have loaded some batches as well
+        App.__reload_completion()
+
+    @staticmethod
+    def notes_export(path: str, export_format: str) -> None:
+        """ Exports every note to a JSONL file, a Markdown directory tree or a compressed tarball """
+        if not path:
+            View.print_error_message("Path shouldn't be empty")
+            return
+        try:
+            exported = NotesExporter.export(database, path, export_format, progress=View.print_export_progress)
+        # Database errors of the streaming cursors aren't handled by the transaction decorators
+        except Exception as error:
+            View.print_error_message(f"\nExport was interrupted: {error}")
+        else:
+            View.print_status_message(f"\n{exported} notes were successfully exported to '{path}'")
+
+    @staticmethod
+    def stats() -> None:
+        """ Shows the database load and latencies of every database method and command since the launch """
+        if not METRICS:
+            View.print_error_message("Statistics are disabled by the 'METRICS' setting")
+            return
+        metrics = Metrics.to_dict()
+        View.print_metrics("Database methods:", metrics["methods"])
+        View.print_metrics("Commands:", metrics["commands"])
+
+    @staticmethod
+    def stats_dump(path: str) -> None:
+        if not path:
+            View.print_error_message("Path shouldn't be empty")
+            return
+        try:
+            Metrics.dump(path)
+        except OSError as error:
+            View.print_error_message(f"Statistics weren't written: {error}")
+        else:
+            View.print_status_message(f"Statistics were written to '{path}'")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MyNotes console notes manager")
+    parser.add_argument("--db", choices=DATABASES, default=os.environ.get(DATABASE_VARIABLE),
+                        help=f"database to load without asking for it, defaults to the {DATABASE_VARIABLE} variable")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print the durations of the startup stages and the loaded database drivers and exit, "
+                             "per module import times are shown by 'python -X importtime'")
+    parser.add_argument("--batch", action="append", default=[], metavar="FILE",
+                        help="run the commands of the file ('-' for stdin) without the prompt, can be repeated")
+    parser.add_argument("commands", nargs="*", metavar="COMMAND",
+                        help="commands run without the prompt after the batch files, e.g. 'group create Work'")
+    arguments = parser.parse_args()
+    # Default value from the environment isn't checked by the parser
+    if arguments.db is not None:
+        arguments.db = arguments.db.lower()
+        if arguments.db not in DATABASES:
+            parser.error(f"{DATABASE_VARIABLE} should be one of: {', '.join(DATABASES)}")
+    if (arguments.batch or arguments.commands) and arguments.db is None:
+        parser.error(f"batch mode needs the database set by the --db option or the {DATABASE_VARIABLE} variable")
+    # Files are read lazily, so unreadable ones are reported before the batch starts
+    for path in arguments.batch:
+        if path != "-" and not (os.path.isfile(path) and os.access(path, os.R_OK)):
+            parser.error(f"batch file '{path}' doesn't exist or can't be read")
+    return arguments
+
 
 if __name__ == "__main__":
-    if database := choose_db():
-        App()
-        View()
-        input_handler = CustomInput()
-        App.mainloop()
+    arguments = parse_arguments()
+    interface_start = StartupReport.stage("imports")
+    # Connection handshake of the chosen database runs while the interface is initialized
+    connecting = in_background(StartupReport.measured("connection", connect_db), arguments.db) if arguments.db else None
+
+    App()
+    View()
+    if arguments.batch or arguments.commands:
+        # There is no prompt, so the output of every command is kept
+        Screen.clearing = False
+        BatchInput.set_lines(read_lines(arguments.batch, arguments.commands))
+        input_handler = BatchInput()
+        if (connected := connecting.result()) is None:
+            sys.exit(EXIT_NO_DATABASE)
+        if connected == SCHEMA_MISSING:
+            # Lines of the batch aren't answers, the tables are created by an interactive run
+            View.print_error_message("DataBase tables do not exists or damaged, run the program without the batch "
+                                     "to create them")
+            sys.exit(EXIT_NO_DATABASE)
+        database, _ = connected
+        sys.exit(App.run_batch())
+
+    # Prompt and completion aren't loaded in the batch mode
+    from custom_input import CustomInput
+
+    input_handler = CustomInput()
+    input_handler.get_completer()
+    StartupReport.stage("interface", interface_start)
+
+    if not (database := (show_connected(confirm_schema(connecting.result())) if connecting else choose_db())):
+        sys.exit(EXIT_NO_DATABASE)
+    if arguments.startup_report:
+        # Same steps as the mainloop() before its first prompt
+        App.warm_up()
+        StartupReport.stage("first prompt")
+        App.wait_warm_up()
+        View.print_startup_report("Startup (milliseconds):", StartupReport.to_rows())
+        View.print_text(f"Loaded database drivers: {', '.join(StartupReport.loaded_drivers()) or 'none'}")
+    else:
+        sys.exit(App.mainloop())
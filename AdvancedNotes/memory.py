@@ -0,0 +1,270 @@
+"""
+In-process database implementation.
+Keeps groups, notes and revisions in dictionaries, so nothing survives the process.
+Has the same semantics as the server implementations and is used by the benchmarks for fast runs
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterator
+
+from databases.idatabase import DataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.revisions import Revisions
+from databases.search import Headline
+
+
+class DataBaseMemoryImp(DataBase):
+    # Group title -> titles of its notes
+    groups: dict[str, set[str]] = {}
+    # Note title -> {"group_id", "text", "creation_date", "last_change_date"}
+    notes: dict[str, dict] = {}
+    # Note title -> (revision, creation date, snapshot, length, stored data) ordered by revision
+    revisions: dict[str, list[tuple[int, datetime, bool, int, str]]] = {}
+
+    @staticmethod
+    def reset() -> None:
+        """ Drops every note and group, except the default 'Home' group """
+        DataBaseMemoryImp.groups = {"Home": set()}
+        DataBaseMemoryImp.notes = {}
+        DataBaseMemoryImp.revisions = {}
+
+    @staticmethod
+    def __grouped_rows(start: tuple[str, str], backward: bool) -> Iterator[tuple[str, str]]:
+        """ (group title, note title) rows after/before the start row, empty groups have an empty note title """
+        group_titles = sorted(DataBaseMemoryImp.groups)
+        if backward:
+            groups = reversed(group_titles[:bisect_right(group_titles, start[0])])
+        else:
+            groups = group_titles[bisect_left(group_titles, start[0]):]
+        for group_title in groups:
+            note_titles = sorted(DataBaseMemoryImp.groups[group_title]) or [""]
+            for note_title in reversed(note_titles) if backward else note_titles:
+                if ((group_title, note_title) < start) if backward else ((group_title, note_title) > start):
+                    yield group_title, note_title
+
+    @staticmethod
+    def get_grouped_notes() -> list[str]:
+        return DataBaseMemoryImp.paint_grouped_notes([
+            (group_title, sorted(note_titles)) for group_title, note_titles in sorted(DataBaseMemoryImp.groups.items())
+        ])
+
+    @staticmethod
+    def get_attached_group_notes(group_title: str) -> list[str]:
+        if note_titles := DataBaseMemoryImp.groups.get(group_title):
+            return list(note_titles)
+
+    @staticmethod
+    def get_all_groups() -> list[str]:
+        return list(DataBaseMemoryImp.groups)
+
+    @staticmethod
+    def get_groups_page(key: str | None, page_size: int, backward: bool) -> list[str]:
+        if backward and key is None:
+            return []
+        group_titles = sorted(DataBaseMemoryImp.groups)
+        if backward:
+            end = bisect_left(group_titles, key)
+            return group_titles[max(end - page_size, 0):end]
+        start = bisect_right(group_titles, key or "")
+        return group_titles[start:start + page_size]
+
+    @staticmethod
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int,
+                               backward: bool) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        group_title, note_title = key or ("", "")
+        rows = []
+        for row_group_title, row_note_title in DataBaseMemoryImp.__grouped_rows((group_title, note_title or ""),
+                                                                                backward):
+            rows.append((row_group_title, row_note_title or None))
+            if len(rows) == page_size:
+                break
+        return rows[::-1] if backward else rows
+
+    @staticmethod
+    def get_all_notes() -> list[str]:
+        return list(DataBaseMemoryImp.notes)
+
+    @staticmethod
+    def get_all_notes_dates() -> list[tuple[str, str | None, datetime]]:
+        return [
+            (note_title, note_data["group_id"], note_data["last_change_date"])
+            for note_title, note_data in DataBaseMemoryImp.notes.items()
+        ]
+
+    @staticmethod
+    def check_group(group_title: str) -> int | None:
+        if group_title in DataBaseMemoryImp.groups:
+            return 1
+
+    @staticmethod
+    def check_note(note_title: str) -> Note | None:
+        if note_data := DataBaseMemoryImp.notes.get(note_title):
+            return Note(
+                note_id=note_title,
+                title=note_title,
+                text=note_data["text"],
+                creation_date=note_data["creation_date"],
+                last_change_date=note_data["last_change_date"]
+            )
+
+    @staticmethod
+    def check_notes(note_titles: list[str]) -> list[Note | None]:
+        return [DataBaseMemoryImp.check_note(note_title) for note_title in note_titles]
+
+    @staticmethod
+    def get_note_info(note_title: str) -> NoteInfo | None:
+        if note_data := DataBaseMemoryImp.notes.get(note_title):
+            return NoteInfo(
+                note_id=note_title,
+                title=note_title,
+                group_title=note_data["group_id"],
+                creation_date=note_data["creation_date"],
+                last_change_date=note_data["last_change_date"],
+                length=len(note_data["text"]),
+                lines=note_data["text"].count("\n") + 1
+            )
+
+    @staticmethod
+    def get_note_text(note_title: str) -> str | None:
+        if note_data := DataBaseMemoryImp.notes.get(note_title):
+            return note_data["text"]
+
+    @staticmethod
+    def create_group(group_title: str) -> None:
+        DataBaseMemoryImp.groups.setdefault(group_title, set())
+
+    @staticmethod
+    def update_group(group_title: str, new_group_title: str) -> None:
+        if (note_titles := DataBaseMemoryImp.groups.pop(group_title, None)) is None:
+            return
+        DataBaseMemoryImp.groups[new_group_title] = note_titles
+        for note_title in note_titles:
+            DataBaseMemoryImp.notes[note_title]["group_id"] = new_group_title
+
+    @staticmethod
+    def delete_group(group_title: str) -> None:
+        for note_title in DataBaseMemoryImp.groups.pop(group_title, set()):
+            DataBaseMemoryImp.notes.pop(note_title, None)
+            DataBaseMemoryImp.revisions.pop(note_title, None)
+
+    @staticmethod
+    def create_note(group_title: str, note_title: str, note_text: str) -> None:
+        now = datetime.now()
+        DataBaseMemoryImp.notes[note_title] = {
+            "group_id": group_title, "text": note_text, "creation_date": now, "last_change_date": now
+        }
+        DataBaseMemoryImp.groups.setdefault(group_title, set()).add(note_title)
+
+    @staticmethod
+    def update_note(note_title: str, text: str, option: str) -> None:
+        if (note_data := DataBaseMemoryImp.notes.get(note_title)) is None:
+            return
+        if option == "title":
+            DataBaseMemoryImp.notes[text] = DataBaseMemoryImp.notes.pop(note_title)
+            if (revisions := DataBaseMemoryImp.revisions.pop(note_title, None)) is not None:
+                DataBaseMemoryImp.revisions[text] = revisions
+            group_notes = DataBaseMemoryImp.groups[note_data["group_id"]]
+            group_notes.discard(note_title)
+            group_notes.add(text)
+        else:
+            DataBaseMemoryImp.__save_revision(note_title, note_data, text)
+            note_data["text"] = text
+        note_data["last_change_date"] = datetime.now()
+
+    @staticmethod
+    def __save_revision(note_title: str, note_data: dict, new_text: str) -> None:
+        """ Records the new text as the next revision, the first update records the current text as well """
+        revisions = DataBaseMemoryImp.revisions.setdefault(note_title, [])
+        old_text = note_data["text"]
+        if not revisions:
+            revisions.append((1, note_data["last_change_date"], True, len(old_text), old_text))
+        if new_text != old_text:
+            revision = revisions[-1][0] + 1
+            snapshot, data = Revisions.encode(revision, old_text, new_text)
+            revisions.append((revision, datetime.now(), snapshot, len(new_text), data))
+
+    @staticmethod
+    def delete_note(note_title: str) -> None:
+        if note_data := DataBaseMemoryImp.notes.pop(note_title, None):
+            DataBaseMemoryImp.groups[note_data["group_id"]].discard(note_title)
+            DataBaseMemoryImp.revisions.pop(note_title, None)
+
+    @staticmethod
+    def get_note_history(note_title: str) -> list[NoteRevision]:
+        return [
+            NoteRevision(revision=revision, creation_date=creation_date, snapshot=snapshot, length=length,
+                         size=len(data))
+            for revision, creation_date, snapshot, length, data in DataBaseMemoryImp.revisions.get(note_title, [])
+        ]
+
+    @staticmethod
+    def get_note_revision(note_title: str, revision: int) -> str | None:
+        revisions = DataBaseMemoryImp.revisions.get(note_title, [])
+        if not 0 < revision <= len(revisions):
+            return None
+        chain = revisions[:revision]
+        start = max(index for index, (_, _, snapshot, _, _) in enumerate(chain) if snapshot)
+        return Revisions.rebuild([(snapshot, data) for _, _, snapshot, _, data in chain[start:]])
+
+    @staticmethod
+    def search_notes(query: str, limit: int) -> list[SearchResult]:
+        """ Every query word has to be found, title matches are weighted higher than the text ones """
+        if not (terms := Headline.terms(query)):
+            return []
+        found = []
+        for note_title, note_data in DataBaseMemoryImp.notes.items():
+            title, text = note_title.lower(), note_data["text"].lower()
+            if all(term in title or term in text for term in terms):
+                rank = sum(10 * title.count(term) + text.count(term) for term in terms)
+                found.append((rank, note_title, note_data))
+        found.sort(key=lambda result: result[0], reverse=True)
+        return [
+            SearchResult(
+                title=note_title,
+                group_title=note_data["group_id"],
+                rank=rank,
+                headline=Headline.build(note_data["text"], query)
+            ) for rank, note_title, note_data in found[:limit]
+        ]
+
+    @staticmethod
+    def import_notes(notes: list[NoteRecord], on_conflict: str) -> int:
+        imported = {}
+        for note in notes:
+            # The first duplicate in the batch wins when skipping, the last one when overwriting
+            if on_conflict != "overwrite" and (note.title in DataBaseMemoryImp.notes or note.title in imported):
+                continue
+            imported[note.title] = note
+
+        for note in imported.values():
+            if note_data := DataBaseMemoryImp.notes.get(note.title):
+                DataBaseMemoryImp.groups[note_data["group_id"]].discard(note.title)
+                note_data.update(group_id=note.group_title, text=note.text, last_change_date=note.last_change_date)
+            else:
+                DataBaseMemoryImp.notes[note.title] = {
+                    "group_id": note.group_title,
+                    "text": note.text,
+                    "creation_date": note.creation_date,
+                    "last_change_date": note.last_change_date
+                }
+            DataBaseMemoryImp.groups.setdefault(note.group_title, set()).add(note.title)
+        return len(imported)
+
+    @staticmethod
+    def export_notes(batch_size: int) -> Iterator[NoteRecord]:
+        # Snapshot of the titles, so the notes can be changed while they are exported
+        for note_title in list(DataBaseMemoryImp.notes):
+            if note_data := DataBaseMemoryImp.notes.get(note_title):
+                yield NoteRecord(
+                    group_title=note_data["group_id"],
+                    title=note_title,
+                    text=note_data["text"],
+                    creation_date=note_data["creation_date"],
+                    last_change_date=note_data["last_change_date"]
+                )
+
+
+DataBaseMemoryImp.reset()
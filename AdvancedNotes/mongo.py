@@ -4,16 +4,23 @@ current psql version - 15.0
 """
 
 from datetime import datetime
+from typing import Iterator
 from pymongo.collection import Collection
+from pymongo.client_session import ClientSession
+from pymongo.errors import PyMongoError
 
-from databases.idatabase import DataBase
-from databases.note import Note
+from view import View
 
-from settings.colors import GROUP_COLOR, TEXT_COLOR, ERROR_COLOR
+from databases.idatabase import DataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.mongodb_impl.pipelines import Pipelines
+from databases.mongodb_impl.documents import Documents, SEARCH_PROJECTION, SEARCH_SORT, CHAIN_PROJECTION
+from databases.mongodb_impl.connection import MongoDBConnection
 
 
 class DataBaseMongoImp(DataBase):
     connection: Collection = None
+    transactions: bool = False
 
     @staticmethod
     def _get_groups_collection(function):
@@ -31,24 +38,42 @@ class DataBaseMongoImp(DataBase):
 
         return wrapper
 
+    @staticmethod
+    def _get_revisions_collection(function):
+        def wrapper(*args):
+            collection = DataBaseMongoImp.connection["note_revisions"]
+            return function(*args, collection)
+
+        return wrapper
+
+    @staticmethod
+    def _make_transaction(function):
+        """
+        Decorator for the writes to several collections. Passes a session with a started transaction,
+        so notes never point to a missing group and the write concern is waited for once at the commit.
+        Transient transaction errors are retried by with_transaction().
+        Standalone servers don't support transactions, there the session is None and the writes go one by one
+        """
+
+        def wrapper(*args):
+            if not DataBaseMongoImp.transactions:
+                return function(*args, None)
+            with DataBaseMongoImp.connection.client.start_session() as session:
+                return session.with_transaction(lambda transaction_session: function(*args, transaction_session))
+        return wrapper
+
     @staticmethod
     def set_connection(connection) -> None:
         DataBaseMongoImp.connection = connection
+        DataBaseMongoImp.transactions = MongoDBConnection.supports_transactions(connection.client)
 
     @staticmethod
-    def get_grouped_notes() -> list[str]:
-        column = []
-        for group_title in DataBaseMongoImp.get_all_groups():
-            # Painting group name
-            column.append(f"{GROUP_COLOR}Group: {group_title}{TEXT_COLOR}")
-            # if group is empty
-            if note_titles := DataBaseMongoImp.get_attached_group_notes(group_title):
-                for index, title in enumerate(note_titles, start=1):
-                    column.append(f"{index}. {title}")
-            else:
-                column.append(ERROR_COLOR + "empty group" + TEXT_COLOR)
-            column.append("")
-        return column[:-1]
+    @_get_groups_collection
+    def get_grouped_notes(collection: Collection) -> list[str]:
+        grouped_notes = collection.aggregate(Pipelines.grouped_notes())
+        return DataBaseMongoImp.paint_grouped_notes(
+            [(group["_id"], group["notes"]) for group in grouped_notes]
+        )
 
     @staticmethod
     @_get_notes_collection
@@ -60,11 +85,40 @@ class DataBaseMongoImp(DataBase):
     def get_all_groups(collection: Collection) -> list[str]:
         return collection.distinct("title")
 
+    @staticmethod
+    @_get_groups_collection
+    def get_groups_page(key: str | None, page_size: int, backward: bool, collection: Collection) -> list[str]:
+        if backward and key is None:
+            return []
+        groups = collection.find(
+            {"title": {"$lt" if backward else "$gt": key or ""}}, {"_id": 0, "title": 1}
+        ).sort("title", -1 if backward else 1).limit(page_size)
+        titles = [group["title"] for group in groups]
+        return titles[::-1] if backward else titles
+
+    @staticmethod
+    @_get_groups_collection
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool,
+                               collection: Collection) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        pipeline = Pipelines.grouped_notes_page(key, page_size, backward)
+        rows = [(row["group"], row["note"] or None) for row in collection.aggregate(pipeline)]
+        return rows[::-1] if backward else rows
+
     @staticmethod
     @_get_notes_collection
     def get_all_notes(collection: Collection) -> list[str]:
         return collection.distinct("title")
 
+    @staticmethod
+    @_get_notes_collection
+    def get_all_notes_dates(collection: Collection) -> list[tuple[str, str | None, datetime]]:
+        return [
+            (note_data["title"], note_data.get("group_id"), note_data["last_change_date"])
+            for note_data in collection.find({}, {"_id": 0, "title": 1, "group_id": 1, "last_change_date": 1})
+        ]
+
     @staticmethod
     @_get_groups_collection
     def check_group(group_title: str, collection: Collection) -> int | None:
@@ -75,13 +129,29 @@ class DataBaseMongoImp(DataBase):
     @_get_notes_collection
     def check_note(note_title: str, collection: Collection) -> Note | None:
         if note_data := collection.find_one({"id": note_title}):
-            return Note(
-                note_id=note_title,
-                title=note_title,
-                text=note_data["text"],
-                creation_date=note_data["creation_date"],
-                last_change_date=note_data["last_change_date"]
-            )
+            return Documents.to_note(note_title, note_data)
+
+    @staticmethod
+    @_get_notes_collection
+    def check_notes(note_titles: list[str], collection: Collection) -> list[Note | None]:
+        """ Every title is looked up by a single query """
+        found = {note_data["id"]: note_data for note_data in collection.find({"id": {"$in": note_titles}})}
+        return [
+            Documents.to_note(note_title, found[note_title]) if note_title in found else None
+            for note_title in note_titles
+        ]
+
+    @staticmethod
+    @_get_notes_collection
+    def get_note_info(note_title: str, collection: Collection) -> NoteInfo | None:
+        if note_data := next(collection.aggregate(Pipelines.note_info(note_title)), None):
+            return Documents.to_note_info(note_title, note_data)
+
+    @staticmethod
+    @_get_notes_collection
+    def get_note_text(note_title: str, collection: Collection) -> str | None:
+        if note_data := collection.find_one({"id": note_title}, {"_id": 0, "text": 1}):
+            return note_data.get("text", "")
 
     @staticmethod
     @_get_groups_collection
@@ -91,40 +161,132 @@ class DataBaseMongoImp(DataBase):
     @staticmethod
     @_get_groups_collection
     @_get_notes_collection
-    def update_group(group_title: str, new_group_title: str, groups: Collection, notes: Collection) -> None:
-        groups.update_one({"id": group_title}, {"$set": {"title": new_group_title, "id": new_group_title}})
-        notes.update_many({"group_id": group_title}, {"$set": {"group_id": new_group_title}})
+    @_make_transaction
+    def update_group(group_title: str, new_group_title: str, groups: Collection, notes: Collection,
+                     session: ClientSession | None) -> None:
+        groups.update_one({"id": group_title}, {"$set": {"title": new_group_title, "id": new_group_title}},
+                          session=session)
+        notes.update_many({"group_id": group_title}, {"$set": {"group_id": new_group_title}}, session=session)
 
     @staticmethod
     @_get_groups_collection
     @_get_notes_collection
-    def delete_group(group_title: str, groups: Collection, notes: Collection) -> None:
-        groups.delete_one({"id": group_title})
-        notes.delete_many({"group_id": group_title})
+    @_get_revisions_collection
+    @_make_transaction
+    def delete_group(group_title: str, groups: Collection, notes: Collection, revisions: Collection,
+                     session: ClientSession | None) -> None:
+        note_ids = notes.distinct("id", {"group_id": group_title}, session=session)
+        groups.delete_one({"id": group_title}, session=session)
+        notes.delete_many({"group_id": group_title}, session=session)
+        revisions.delete_many({"note_id": {"$in": note_ids}}, session=session)
 
     @staticmethod
     @_get_notes_collection
     def create_note(group_title: str, note_title: str, note_text: str, collection: Collection) -> None:
-        collection.insert_one(
-            {
-                "id": note_title,
-                "group_id": group_title,
-                "title": note_title,
-                "text": note_text,
-                "creation_date": datetime.now(),
-                "last_change_date": datetime.now()
-            }
-        )
+        collection.insert_one(Documents.note(group_title, note_title, note_text))
 
     @staticmethod
     @_get_notes_collection
-    def update_note(note_title: str, text: str, option: str, collection: Collection) -> None:
+    @_get_revisions_collection
+    @_make_transaction
+    def update_note(note_title: str, text: str, option: str, notes: Collection, revisions: Collection,
+                    session: ClientSession | None) -> None:
         if option == "title":
-            collection.update_one({"id": note_title}, {"$set": {"title": text, "id": text}})
+            notes.update_one({"id": note_title}, {"$set": {"title": text, "id": text}}, session=session)
+            revisions.update_many({"note_id": note_title}, {"$set": {"note_id": text}}, session=session)
+        else:
+            DataBaseMongoImp.__save_revision(note_title, text, notes, revisions, session)
+            notes.update_one({"id": note_title}, {"$set": {"text": text, "last_change_date": datetime.now()}},
+                             session=session)
+
+    @staticmethod
+    def __rebuild_revision(note_id: str, revision: int, revisions: Collection,
+                           session: ClientSession | None = None) -> str | None:
+        snapshot = revisions.find_one(Documents.snapshot_filter(note_id, revision), {"_id": 0, "revision": 1},
+                                      sort=[("revision", -1)], session=session)
+        if not snapshot:
+            return None
+        chain = revisions.find(Documents.chain_filter(note_id, snapshot["revision"], revision), CHAIN_PROJECTION,
+                               session=session).sort("revision", 1)
+        return Documents.revision_text(list(chain), revision)
+
+    @staticmethod
+    def __save_revision(note_title: str, new_text: str, notes: Collection, revisions: Collection,
+                        session: ClientSession | None) -> None:
+        """
+        Records the new text as the next revision, the first update records the current text as well.
+        New revisions are inserted with a single insert_many call
+        """
+        documents = []
+        last = revisions.find_one({"note_id": note_title}, {"_id": 0, "revision": 1}, sort=[("revision", -1)],
+                                  session=session)
+        if last is None:
+            if not (note_data := notes.find_one({"id": note_title}, {"_id": 0, "text": 1, "last_change_date": 1},
+                                                session=session)):
+                return
+            documents.append(first := Documents.first_revision(note_title, note_data))
+            last_revision, old_text = first["revision"], first["data"]
         else:
-            collection.update_one({"id": note_title}, {"$set": {"text": text}})
+            last_revision = last["revision"]
+            old_text = DataBaseMongoImp.__rebuild_revision(note_title, last_revision, revisions, session)
+
+        if revision := Documents.next_revision(note_title, last_revision, old_text, new_text):
+            documents.append(revision)
+        if documents:
+            revisions.insert_many(documents, ordered=True, session=session)
+
+    @staticmethod
+    @_get_notes_collection
+    @_get_revisions_collection
+    @_make_transaction
+    def delete_note(note_title: str, notes: Collection, revisions: Collection, session: ClientSession | None) -> None:
+        notes.delete_one({"id": note_title}, session=session)
+        revisions.delete_many({"note_id": note_title}, session=session)
+
+    @staticmethod
+    @_get_revisions_collection
+    def get_note_history(note_title: str, collection: Collection) -> list[NoteRevision]:
+        return Documents.to_note_revisions(list(collection.aggregate(Pipelines.note_history(note_title))))
+
+    @staticmethod
+    @_get_revisions_collection
+    def get_note_revision(note_title: str, revision: int, collection: Collection) -> str | None:
+        return DataBaseMongoImp.__rebuild_revision(note_title, revision, collection)
+
+    @staticmethod
+    @_get_notes_collection
+    def search_notes(query: str, limit: int, collection: Collection) -> list[SearchResult]:
+        found = collection.find({"$text": {"$search": query}}, SEARCH_PROJECTION).sort(SEARCH_SORT).limit(limit)
+        return Documents.to_search_results(list(found), query)
 
     @staticmethod
     @_get_notes_collection
-    def delete_note(note_title: str, collection: Collection) -> None:
-        collection.delete_one({"id": note_title})
+    def import_notes(notes: list[NoteRecord], on_conflict: str, collection: Collection) -> int:
+        """
+        Loads the batch with a single ordered insert_many or bulk_write call.
+        Errors are printed like the other backends do, so the importer stops at the failed batch
+        """
+        try:
+            if on_conflict == "overwrite":
+                if not (requests := Documents.upserts(notes)):
+                    return 0
+                result = collection.bulk_write(requests, ordered=True)
+                return result.matched_count + result.upserted_count
+
+            # Title inserted by a concurrent writer after the check fails the insert on the unique id index
+            existing = set(collection.distinct("id", {"id": {"$in": [note.title for note in notes]}}))
+            if documents := Documents.new_notes(notes, existing):
+                collection.insert_many(documents, ordered=True)
+            return len(documents)
+        except PyMongoError as error:
+            view.print_error_message(str(error))
+            return None
+
+    @staticmethod
+    @_get_notes_collection
+    def export_notes(batch_size: int, collection: Collection) -> Iterator[NoteRecord]:
+        for note_data in collection.find({}, {"_id": 0}, batch_size=batch_size):
+            yield Documents.to_note_record(note_data)
+
+
+view = View()
@@ -3,89 +3,135 @@ PostgreSQL database implementation
 current psql version - 15.0
 """
 
+import csv
+import io
+import threading
+
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterator
+
+from psycopg2 import OperationalError, InterfaceError
 
 from view import View
 from databases.idatabase import DataBase
-from databases.note import Note
-
-from settings.colors import GROUP_COLOR, TEXT_COLOR, ERROR_COLOR
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.psql_impl.pool import PSQLConnectionPool
+from databases.psql_impl.rows import Rows
+from databases.psql_impl.queries import PreparedStatements, IMPORT_TABLE, CLEAR_IMPORT_TABLE, IMPORT_COLUMNS, \
+    EXPORT_NOTES, HEADLINE_OPTIONS
 
 
 class DataBasePSQLImp(DataBase):
-    connection = None
+    pool: PSQLConnectionPool = None
+    # Connection of the transaction opened by transaction() in the current thread
+    local = threading.local()
 
     @staticmethod
-    def _update_foreign_keys(function):
+    def _make_transaction(function):
         """
-        1. Delete all foreign keys in the following tables
-        2. Make a transaction
-        3. Create constraints again
+        Decorator for the safety transactions.
+        Every call checks out its own pooled connection, so methods can be called from several threads.
+        A call failed on a broken connection is repeated once on a fresh one.
+        Inside transaction() calls use its connection, they are committed or rolled back together
+        and their errors are raised instead of being printed
         """
-        def wrapper(*args):
-            with DataBasePSQLImp.connection.cursor() as cursor:
-                try:
-                    cursor.execute("ALTER TABLE groups_notes DROP CONSTRAINT groups_notes_group_id_fkey")
-                    cursor.execute("ALTER TABLE groups_notes DROP CONSTRAINT groups_notes_note_id_fkey")
-
-                    function(*args)
-
-                    cursor.execute(
-                        "ALTER TABLE groups_notes ADD CONSTRAINT groups_notes_group_id_fkey FOREIGN KEY (group_id) "
-                        "REFERENCES groups(id)"
-                    )
-                    cursor.execute(
-                        "ALTER TABLE groups_notes ADD CONSTRAINT groups_notes_note_id_fkey FOREIGN KEY (note_id) "
-                        "REFERENCES notes(id)"
-                    )
-
-                except Exception as error:
-                    DataBasePSQLImp.connection.rollback()
-                    view.print_error_message(str(error))
 
+        def wrapper(*args):
+            if (connection := DataBasePSQLImp.transaction_connection()) is not None:
+                # Errors are raised to transaction(), which rolls back the calls made before as well
+                with connection.cursor() as cursor:
+                    return function(*args, cursor)
+            for attempt in range(2):
+                with DataBasePSQLImp.pool.connection() as connection:
+                    executed = False
+                    try:
+                        with connection.cursor() as cursor:
+                            result = function(*args, cursor)
+                        executed = True
+                        connection.commit()
+                    except (OperationalError, InterfaceError) as error:
+                        # Outcome of a commit on a broken connection is unknown, so only executions are repeated
+                        if connection.closed and not attempt and not executed:
+                            continue
+                        if not connection.closed:
+                            connection.rollback()
+                        view.print_error_message(str(error))
+                    except Exception as error:
+                        connection.rollback()
+                        view.print_error_message(str(error))
+                    else:
+                        return result
+                    return None
         return wrapper
 
     @staticmethod
-    def _make_transaction(function):
-        """ Decorator for the safety transactions """
+    def _stream_transaction(function):
+        """
+        Generator counterpart of the _make_transaction decorator.
+        Passes a server-side cursor, the pooled connection is held until the rows are consumed
+        """
 
         def wrapper(*args):
-            with DataBasePSQLImp.connection.cursor() as cursor:
+            # Rows changed earlier in the transaction are visible only to its own connection
+            if (connection := DataBasePSQLImp.transaction_connection()) is not None:
+                with connection.cursor(name=function.__name__) as cursor:
+                    yield from function(*args, cursor)
+                return
+            with DataBasePSQLImp.pool.connection() as connection:
                 try:
-                    result = function(*args, cursor)
-                except Exception as error:
-                    DataBasePSQLImp.connection.rollback()
-                    view.print_error_message(str(error))
-                else:
-                    DataBasePSQLImp.connection.commit()
-                    return result
+                    with connection.cursor(name=function.__name__) as cursor:
+                        yield from function(*args, cursor)
+                finally:
+                    # Transaction is read-only, rollback just closes it along with the cursor
+                    if not connection.closed:
+                        connection.rollback()
         return wrapper
 
     @staticmethod
-    def set_connection(connection) -> None:
-        DataBasePSQLImp.connection = connection
+    def set_pool(pool: PSQLConnectionPool) -> None:
+        DataBasePSQLImp.pool = pool
 
     @staticmethod
-    def get_grouped_notes() -> list[str]:
-        column = []
-        for group_title in DataBasePSQLImp.get_all_groups():
-            # Painting group name
-            column.append(f"{GROUP_COLOR}Group: {group_title}{TEXT_COLOR}")
-            # if group is empty
-            if note_titles := DataBasePSQLImp.get_attached_group_notes(group_title):
-                for index, title in enumerate(note_titles, start=1):
-                    column.append(f"{index}. {title}")
+    def transaction_connection():
+        return getattr(DataBasePSQLImp.local, "connection", None)
+
+    @staticmethod
+    def is_transactional() -> bool:
+        return True
+
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[None]:
+        """ Holds a pooled connection, so the calls of the current thread share its transaction """
+        if DataBasePSQLImp.transaction_connection() is not None:
+            # Nested transaction is a part of the outer one
+            yield
+            return
+        with DataBasePSQLImp.pool.connection() as connection:
+            DataBasePSQLImp.local.connection = connection
+            try:
+                yield
+            except BaseException:
+                if not connection.closed:
+                    connection.rollback()
+                raise
             else:
-                column.append(ERROR_COLOR + "empty group" + TEXT_COLOR)
-            column.append("")
-        return column[:-1]
+                connection.commit()
+            finally:
+                DataBasePSQLImp.local.connection = None
+
+    @staticmethod
+    @_make_transaction
+    def get_grouped_notes(cursor) -> list[str]:
+        """ Fetches every group with titles of its notes in a single query, empty groups get an empty array """
+        PreparedStatements.execute(cursor, "get_grouped_notes")
+        return DataBasePSQLImp.paint_grouped_notes(cursor.fetchall())
 
     @staticmethod
     @_make_transaction
     def get_attached_group_notes(group_title: str, cursor) -> list[str]:
-        cursor.execute(
-            f"SELECT title FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id='{group_title}')"
-        )
+        PreparedStatements.execute(cursor, "get_attached_group_notes", (group_title,))
 
         if note_titles := cursor.fetchall():
             return [title[0] for title in note_titles]
@@ -93,91 +139,190 @@ class DataBasePSQLImp(DataBase):
     @staticmethod
     @_make_transaction
     def get_all_groups(cursor) -> list[str]:
-        cursor.execute("SELECT title FROM groups")
+        PreparedStatements.execute(cursor, "get_all_groups")
         return [title[0] for title in cursor.fetchall()]
 
+    @staticmethod
+    @_make_transaction
+    def get_all_notes_dates(cursor) -> list[tuple[str, str | None, datetime]]:
+        PreparedStatements.execute(cursor, "get_all_notes_dates")
+        return cursor.fetchall()
+
+    @staticmethod
+    @_make_transaction
+    def get_groups_page(key: str | None, page_size: int, backward: bool, cursor) -> list[str]:
+        if backward and key is None:
+            return []
+        PreparedStatements.execute(
+            cursor, "get_groups_page_backward" if backward else "get_groups_page", (key or "", page_size)
+        )
+        titles = [title[0] for title in cursor.fetchall()]
+        return titles[::-1] if backward else titles
+
+    @staticmethod
+    @_make_transaction
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool,
+                               cursor) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        group_title, note_title = key or ("", "")
+        PreparedStatements.execute(
+            cursor,
+            "get_grouped_notes_page_backward" if backward else "get_grouped_notes_page",
+            (group_title, note_title or "", page_size)
+        )
+        rows = [(group_title, note_title) for group_title, note_title in cursor.fetchall()]
+        return rows[::-1] if backward else rows
+
     @staticmethod
     @_make_transaction
     def get_all_notes(cursor) -> list[str]:
-        cursor.execute("SELECT title FROM notes")
+        PreparedStatements.execute(cursor, "get_all_notes")
         return [title[0] for title in cursor.fetchall()]
 
     @staticmethod
     @_make_transaction
     def check_group(group_title: str, cursor) -> int | None:
-        cursor.execute(f"SELECT COUNT(*) from groups WHERE id='{group_title}'")
+        PreparedStatements.execute(cursor, "check_group", (group_title,))
         if cursor.fetchall()[0][0]:
             return 1
 
     @staticmethod
     @_make_transaction
     def check_note(note_title: str, cursor) -> Note | None:
-        cursor.execute(f"SELECT id, text, creation_date, last_change_date from notes WHERE title='{note_title}'")
-        if note_data := cursor.fetchall():
-            return Note(
-                note_id=note_title,
-                title=note_title,
-                text=note_data[0][1],
-                creation_date=note_data[0][2],
-                last_change_date=note_data[0][3]
-            )
+        PreparedStatements.execute(cursor, "check_note", (note_title,))
+        if note_data := cursor.fetchone():
+            return Rows.to_note(note_title, note_data)
+
+    @staticmethod
+    @_make_transaction
+    def check_notes(note_titles: list[str], cursor) -> list[Note | None]:
+        """ Lookups run one by one on the same connection, the statement is prepared once """
+        notes = []
+        for note_title in note_titles:
+            PreparedStatements.execute(cursor, "check_note", (note_title,))
+            notes.append(Rows.to_note(note_title, note_data) if (note_data := cursor.fetchone()) else None)
+        return notes
+
+    @staticmethod
+    @_make_transaction
+    def get_note_info(note_title: str, cursor) -> NoteInfo | None:
+        PreparedStatements.execute(cursor, "get_note_info", (note_title,))
+        if note_data := cursor.fetchone():
+            return Rows.to_note_info(note_title, note_data)
+
+    @staticmethod
+    @_make_transaction
+    def get_note_text(note_title: str, cursor) -> str | None:
+        PreparedStatements.execute(cursor, "get_note_text", (note_title,))
+        if note_data := cursor.fetchone():
+            return note_data[0] or ""
 
     @staticmethod
     @_make_transaction
     def create_group(group_title: str, cursor) -> None:
-        cursor.execute(f"INSERT INTO groups(id, title) values(%s, %s)", (group_title, group_title))
+        PreparedStatements.execute(cursor, "create_group", (group_title,))
 
     @staticmethod
     @_make_transaction
-    @_update_foreign_keys
     def update_group(group_title: str, new_group_title: str, cursor) -> None:
-        cursor.execute(
-            f"UPDATE groups_notes SET group_id=%s WHERE group_id=%s", (new_group_title, group_title)
-        )
-        cursor.execute(
-            f"UPDATE groups SET id=%s, title=%s WHERE id=%s", (new_group_title, new_group_title, group_title)
-        )
+        # groups_notes rows follow the new id via ON UPDATE CASCADE
+        PreparedStatements.execute(cursor, "update_group", (new_group_title, group_title))
 
     @staticmethod
     @_make_transaction
-    @_update_foreign_keys
     def delete_group(group_title: str, cursor) -> None:
-        cursor.execute(
-            f"DELETE FROM notes WHERE id IN (SELECT note_id FROM groups_notes WHERE group_id='{group_title}')"
-        )
-        cursor.execute(f"DELETE FROM groups_notes WHERE group_id='{group_title}'")
-        cursor.execute(f"DELETE FROM groups WHERE id='{group_title}'")
+        # groups_notes rows are removed via ON DELETE CASCADE
+        PreparedStatements.execute(cursor, "delete_group_notes", (group_title,))
+        PreparedStatements.execute(cursor, "delete_group", (group_title,))
 
     @staticmethod
     @_make_transaction
     def create_note(group_title: str, note_title: str, note_text: str, cursor) -> None:
-        cursor.execute(
-            "INSERT INTO notes (id, title, text, creation_date, last_change_date) values(%s, %s, %s, %s, %s)",
-            (note_title, note_title, note_text, datetime.now(), datetime.now())
-        )
-
-        cursor.execute("INSERT INTO groups_notes (group_id, note_id) values(%s, %s)", (group_title, note_title))
+        PreparedStatements.execute(cursor, "create_note", (note_title, note_text, datetime.now()))
+        PreparedStatements.execute(cursor, "attach_note", (group_title, note_title))
 
     @staticmethod
     @_make_transaction
-    @_update_foreign_keys
     def update_note(note_title: str, text: str, option: str, cursor) -> None:
         if option == "title":
-            cursor.execute(
-                f"UPDATE notes SET id=%s, title=%s, last_change_date=%s WHERE title=%s",
-                (text, text, datetime.now(), note_title)
-            )
-            cursor.execute(f"UPDATE groups_notes SET note_id=%s WHERE note_id=%s", (text, note_title))
-            DataBasePSQLImp.connection.commit()
+            PreparedStatements.execute(cursor, "update_note_title", (text, datetime.now(), note_title))
         else:
-            cursor.execute(f"UPDATE notes SET text=%s WHERE title=%s", (text, note_title))
+            DataBasePSQLImp.__save_revision(note_title, text, cursor)
+            PreparedStatements.execute(cursor, "update_note_text", (text, datetime.now(), note_title))
+
+    @staticmethod
+    def __rebuild_revision(note_id: str, revision: int, cursor) -> str | None:
+        PreparedStatements.execute(cursor, "get_revision_chain", (note_id, revision))
+        return Rows.revision_text(cursor.fetchall(), revision)
+
+    @staticmethod
+    def __save_revision(note_title: str, new_text: str, cursor) -> None:
+        """ Records the new text as the next revision, the first update records the current text as well """
+        PreparedStatements.execute(cursor, "lock_note_revisions", (note_title,))
+        if not (note_data := cursor.fetchone()):
+            return
+        note_id, last_change_date, last_revision = note_data
+
+        if last_revision is None:
+            PreparedStatements.execute(cursor, "get_note_text", (note_title,))
+            old_text = cursor.fetchone()[0] or ""
+            last_revision = 1
+            PreparedStatements.execute(cursor, "create_note_revision",
+                                       Rows.first_revision(note_id, last_change_date, old_text))
+        else:
+            old_text = DataBasePSQLImp.__rebuild_revision(note_id, last_revision, cursor)
+
+        if revision := Rows.next_revision(note_id, last_revision, old_text, new_text):
+            PreparedStatements.execute(cursor, "create_note_revision", revision)
 
     @staticmethod
     @_make_transaction
-    @_update_foreign_keys
     def delete_note(note_title: str, cursor) -> None:
-        cursor.execute(f"DELETE FROM notes WHERE title='{note_title}'")
-        cursor.execute(f"DELETE FROM groups_notes WHERE note_id='{note_title}'")
+        PreparedStatements.execute(cursor, "delete_note", (note_title,))
+
+    @staticmethod
+    @_make_transaction
+    def get_note_history(note_title: str, cursor) -> list[NoteRevision]:
+        PreparedStatements.execute(cursor, "get_note_history", (note_title,))
+        return Rows.to_note_revisions(cursor.fetchall())
+
+    @staticmethod
+    @_make_transaction
+    def get_note_revision(note_title: str, revision: int, cursor) -> str | None:
+        return DataBasePSQLImp.__rebuild_revision(note_title, revision, cursor)
+
+    @staticmethod
+    @_make_transaction
+    def search_notes(query: str, limit: int, cursor) -> list[SearchResult]:
+        PreparedStatements.execute(cursor, "search_notes", (query, limit, HEADLINE_OPTIONS))
+        return Rows.to_search_results(cursor.fetchall())
+
+    @staticmethod
+    @_make_transaction
+    def import_notes(notes: list[NoteRecord], on_conflict: str, cursor) -> int:
+        """
+        Streams the batch into a temporary table via COPY FROM STDIN,
+        then moves it to the notes tables with a single statement
+        """
+        buffer = io.StringIO()
+        # Quoted empty strings are loaded as empty texts, not NULLs
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(Rows.import_records(notes))
+        buffer.seek(0)
+
+        # Rows of the previous batch stay in the staging table until the end of the transaction
+        cursor.execute(f"{IMPORT_TABLE}; {CLEAR_IMPORT_TABLE}")
+        cursor.copy_expert(f"COPY import_notes ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        PreparedStatements.execute(cursor, f"import_notes_{on_conflict}")
+        return cursor.rowcount
+
+    @staticmethod
+    @_stream_transaction
+    def export_notes(batch_size: int, cursor) -> Iterator[NoteRecord]:
+        cursor.itersize = batch_size
+        cursor.execute(EXPORT_NOTES)
+        for row in cursor:
+            yield Rows.to_note_record(row)
 
 
 view = View()
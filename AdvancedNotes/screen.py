@@ -0,0 +1,159 @@
+"""
+Buffered terminal output.
+Everything printed by a command is collected in one buffer and written to the terminal at once
+before the next input, the screen is cleared by the escape sequences instead of the 'clear' process.
+Tables are rendered line by line to the column widths of their first rows and the terminal width
+"""
+
+import re
+import sys
+import atexit
+import shutil
+import unicodedata
+
+from itertools import chain, islice
+from typing import Iterable, Iterator
+
+from settings.config import HORIZONTAL_TABLE_CHAR, JUNCTION_TABLE_CHER, SCREEN_BUFFER_SIZE, TABLE_SAMPLE_ROWS
+
+# Cursor to the top left corner, erase the screen and the scrollback
+CLEAR_SCREEN = "\033[H\033[2J\033[3J"
+ESCAPE_SEQUENCE = re.compile(r"\033\[[0-9;?]*[A-Za-z]")
+VERTICAL_TABLE_CHAR = "|"
+# Columns aren't narrowed below it to fit the terminal
+MIN_COLUMN_WIDTH = 8
+
+
+def char_width(char: str) -> int:
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def display_width(text: str) -> int:
+    """ :return: Number of the terminal columns taken by the text, color sequences take none """
+    text = ESCAPE_SEQUENCE.sub("", text)
+    return len(text) if text.isascii() else sum(char_width(char) for char in text)
+
+
+def wrap(line: str, width: int) -> list[str]:
+    """ :return: Parts of the line no wider than the width, color sequences are kept in their parts """
+    if display_width(line) <= width:
+        return [line]
+    parts, part, part_width, position = [], [], 0, 0
+    for sequence in chain(ESCAPE_SEQUENCE.finditer(line), (None,)):
+        end = sequence.start() if sequence else len(line)
+        for char in line[position:end]:
+            if part_width + (size := char_width(char)) > width:
+                parts.append("".join(part))
+                part, part_width = [], 0
+            part.append(char)
+            part_width += size
+        if sequence:
+            part.append(sequence.group())
+            position = sequence.end()
+    parts.append("".join(part))
+    return parts
+
+
+class Screen:
+    # Batch mode keeps the output of every command
+    clearing = True
+
+    __buffer: list[str] = []
+    __size = 0
+
+    @staticmethod
+    def write(text: str) -> None:
+        """ Buffers the text, very long outputs (large tables) are written in parts of SCREEN_BUFFER_SIZE """
+        Screen.__buffer.append(text)
+        Screen.__size += len(text)
+        if Screen.__size >= SCREEN_BUFFER_SIZE:
+            Screen.flush()
+
+    @staticmethod
+    def print(text: str = "", end: str = "\n") -> None:
+        Screen.write(text + end)
+
+    @staticmethod
+    def clear() -> None:
+        """ Buffered text isn't shown anymore, so it's dropped """
+        if not Screen.clearing:
+            return
+        Screen.__buffer = [CLEAR_SCREEN]
+        Screen.__size = len(CLEAR_SCREEN)
+
+    @staticmethod
+    def flush() -> None:
+        """ Writes the buffered screen in a single write call, it's done before every input """
+        if Screen.__buffer:
+            text = "".join(Screen.__buffer)
+            Screen.__buffer = []
+            Screen.__size = 0
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+
+# Output of the last command before the exit
+atexit.register(Screen.flush)
+
+
+class Table:
+    """
+    Table with the left aligned columns which takes its rows lazily.
+    Column widths are taken from the header and the first TABLE_SAMPLE_ROWS rows and narrowed to the terminal width,
+    longer lines of the cells are wrapped
+    """
+    def __init__(self, field_names: list[str], rows: Iterable[Iterable], width: int | None = None):
+        """ :param width: Maximal width of the table, the terminal width by default """
+        self.field_names = field_names
+        self.rows = iter(rows)
+        self.width = width or shutil.get_terminal_size().columns
+
+    @staticmethod
+    def cell_lines(cell) -> list[str]:
+        return str(cell).expandtabs().split("\n")
+
+    def column_widths(self, sample: list[list[list[str]]]) -> list[int]:
+        widths = [display_width(name) for name in self.field_names]
+        for row in sample:
+            for column, lines in enumerate(row):
+                widths[column] = max(widths[column], *(display_width(line) for line in lines))
+        # Borders and paddings take 3 columns for every column and the last border
+        available = self.width - 3 * len(widths) - 1
+        if sum(widths) <= available:
+            return widths
+        # The widest columns are narrowed to the largest common width with which the table fits
+        low, high = MIN_COLUMN_WIDTH, max(widths)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if sum(min(width, middle) for width in widths) <= available:
+                low = middle
+            else:
+                high = middle - 1
+        return [min(width, low) for width in widths]
+
+    @staticmethod
+    def row_lines(row: list[list[str]], widths: list[int]) -> Iterator[str]:
+        cells = [[part for line in lines for part in wrap(line, width)] for lines, width in zip(row, widths)]
+        for index in range(max(len(cell) for cell in cells)):
+            yield f"{VERTICAL_TABLE_CHAR} " + f" {VERTICAL_TABLE_CHAR} ".join(
+                (part := cell[index] if index < len(cell) else "") + " " * (width - display_width(part))
+                for cell, width in zip(cells, widths)
+            ) + f" {VERTICAL_TABLE_CHAR}"
+
+    def lines(self) -> Iterator[str]:
+        """ :return: Lines of the table, rows after the first TABLE_SAMPLE_ROWS ones are rendered when they're taken """
+        rows = ([Table.cell_lines(cell) for cell in row] for row in self.rows)
+        sample = list(islice(rows, TABLE_SAMPLE_ROWS))
+        widths = self.column_widths(sample)
+        border = JUNCTION_TABLE_CHER + JUNCTION_TABLE_CHER.join(
+            HORIZONTAL_TABLE_CHAR * (width + 2) for width in widths
+        ) + JUNCTION_TABLE_CHER
+
+        yield border
+        yield from Table.row_lines([[name] for name in self.field_names], widths)
+        yield border
+        for row in chain(sample, rows):
+            yield from Table.row_lines(row, widths)
+        yield border
@@ -10,6 +10,9 @@ MAIN_COMMANDS = {
         " help groups",
         " help notes",
         " settings (temporary disabled)",
+        " stats",
+        " stats dump 'path'",
+        " stats reset",
         " quit"
     ],
     "descriptions": [
@@ -18,6 +21,9 @@ MAIN_COMMANDS = {
         "Open groups navigation commands",
         "Open notes navigation commands",
         "Open program settings",
+        "Show calls, round trips and latencies of the database methods and commands",
+        "Write the statistics to a JSON file",
+        "Reset the statistics",
         "Exit the program"
     ]
 }
@@ -27,6 +33,7 @@ GROUPS_COMMANDS = {
     "commands": [
         " NAVIGATION COMMANDS:",
         " groups",
+        " groups next|prev",
         " group select 'group_name'",
         "",
         " EDITING COMMANDS:",
@@ -37,6 +44,7 @@ GROUPS_COMMANDS = {
     "descriptions": [
         "",
         "Show list of groups",
+        "Show the next/previous page of groups",
         "Select a group",
         "",
         "",
@@ -52,23 +60,43 @@ NOTES_COMMANDS = {
     "commands": [
         " NAVIGATION COMMANDS:",
         " note select 'note_title'",
+        " jump 'note_or_group_title'",
         " notes",
+        " notes next|prev",
         " note read",
         " note info",
+        " note search 'words'",
         "",
         " EDITING COMMANDS:",
         " note create 'new_note_title'",
         " note edit title",
         " note edit text",
         " note delete",
-        " note copy"
+        " note copy",
+        "",
+        " HISTORY COMMANDS:",
+        " note history",
+        " note diff",
+        " note diff 'revision'",
+        " note diff 'revision' 'revision'",
+        " note restore 'revision'",
+        "",
+        " IMPORT COMMANDS:",
+        " import 'path'",
+        " import skip|overwrite|rename 'path'",
+        "",
+        " EXPORT COMMANDS:",
+        " export jsonl|markdown|tar.gz|tar.zst 'path'"
     ],
     "descriptions": [
         "",
         "Select a note",
+        "Select a note of any group or a group, titles are completed fuzzily",
         "Show a list of notes",
+        "Show the next/previous page of notes",
         "Show text",
         "Show info",
+        "Search notes of all groups by title and text",
         "",
         "",
         "Create a note",
@@ -76,7 +104,20 @@ NOTES_COMMANDS = {
         "Edit note text",
         "Delete a note",
         "Copy selected note in the clipboard",
-        "Move note to the other group"
+        "",
+        "",
+        "Show revisions of the selected note",
+        "Show changes of the last edit",
+        "Show changes since the revision",
+        "Show changes between two revisions",
+        "Restore text of the revision",
+        "",
+        "",
+        "Import notes from a JSONL file or a Markdown directory",
+        "Import with the chosen handling of existing titles",
+        "",
+        "",
+        "Export all notes in the chosen format"
     ]
 }
 
@@ -9,8 +9,44 @@ COLORFUL_SYNTAX = True
 AUTO_COMPLETION = True
 TOOLBAR = True
 LINE_SYMBOL = ">>> "
+# Maximal number of symbols in a line of the note text and in a title
+TEXT_LINE_LIMIT = 100
+TITLE_LIMIT = 30
+
+# Autocompletion settings (maximum number of suggested titles)
+COMPLETION_LIMIT = 100
 
 # Table view settings
 HORIZONTAL_TABLE_CHAR = "="
 JUNCTION_TABLE_CHER = "O"
+# Number of the first rows which set the column widths, the following rows are wrapped to them
+TABLE_SAMPLE_ROWS = 200
+
+# Screen settings (number of buffered characters written to the terminal at once)
+SCREEN_BUFFER_SIZE = 65536
+
+
+# Client-side cache settings (maximum number of cached group listings and notes)
+CACHE_SIZE = 256
+
+# Database engine settings (asyncio engine requires asyncpg/motor packages)
+ASYNC_ENGINE = False
+
+# Bulk import settings (number of notes per batch and default handling of existing titles: skip/overwrite/rename)
+IMPORT_BATCH_SIZE = 5000
+IMPORT_CONFLICT = "skip"
+
+# Export settings (number of notes fetched from the database server at once)
+EXPORT_BATCH_SIZE = 1000
+
+# Full-text search settings (maximum number of shown results)
+SEARCH_LIMIT = 10
+
+# Listing settings (number of rows on a page of the 'groups'/'notes' commands)
+PAGE_SIZE = 30
+
+# Revision history settings (every n-th revision of a note keeps the whole text instead of the delta)
+REVISION_SNAPSHOT_INTERVAL = 20
 
+# Metrics settings (calls, round trips and latencies of every database method and command for the 'stats' command)
+METRICS = True
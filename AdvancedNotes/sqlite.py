@@ -0,0 +1,391 @@
+"""
+SQLite database implementation.
+Embedded database in a single file, has the same semantics as the PostgreSQL implementation
+"""
+
+import re
+import json
+import sqlite3
+import threading
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from view import View
+from databases.idatabase import DataBase
+from databases.note import Note, NoteInfo, NoteRecord, NoteRevision, SearchResult
+from databases.revisions import Revisions
+from databases.search import Headline
+from databases.sqlite_impl.config import SQLITE_PATH
+from databases.sqlite_impl.connection import SQLiteConnection
+from databases.sqlite_impl.queries import QUERIES, IMPORT_TABLE
+
+
+class DataBaseSQLiteImp(DataBase):
+    path: str = SQLITE_PATH
+    # sqlite3 connections can't be used by several threads at once, so every thread opens its own one
+    local = threading.local()
+
+    @staticmethod
+    def _make_transaction(function):
+        """
+        Decorator for the safety write transactions.
+        IMMEDIATE transactions take the write lock at once, so a read followed by a write can't be
+        interrupted by another writer
+        """
+
+        def wrapper(*args):
+            connection = DataBaseSQLiteImp.connection()
+            if DataBaseSQLiteImp.in_transaction():
+                # Errors are raised to transaction(), which rolls back the calls made before as well
+                return function(*args, connection.cursor())
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                result = function(*args, connection.cursor())
+                connection.execute("COMMIT")
+            except Exception as error:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+                view.print_error_message(str(error))
+            else:
+                return result
+        return wrapper
+
+    @staticmethod
+    def _read_transaction(function):
+        """ Read-only counterpart of the _make_transaction decorator, WAL readers don't wait for the writer """
+
+        def wrapper(*args):
+            connection = DataBaseSQLiteImp.connection()
+            if DataBaseSQLiteImp.in_transaction():
+                # Errors are raised to transaction(), which rolls back the calls made before as well
+                return function(*args, connection.cursor())
+            try:
+                connection.execute("BEGIN")
+                return function(*args, connection.cursor())
+            except Exception as error:
+                view.print_error_message(str(error))
+            finally:
+                if connection.in_transaction:
+                    connection.execute("COMMIT")
+        return wrapper
+
+    @staticmethod
+    def _stream_transaction(function):
+        """
+        Generator counterpart of the _read_transaction decorator.
+        Rows are read on a separate connection, so the other methods can be called until they are consumed
+        """
+
+        def wrapper(*args):
+            # Rows changed earlier in the transaction are visible only to its own connection
+            if DataBaseSQLiteImp.in_transaction():
+                yield from function(*args, DataBaseSQLiteImp.connection().cursor())
+                return
+            connection = SQLiteConnection.connect(DataBaseSQLiteImp.path)
+            try:
+                connection.execute("BEGIN")
+                yield from function(*args, connection.cursor())
+            finally:
+                connection.close()
+        return wrapper
+
+    @staticmethod
+    def set_connection(connection: sqlite3.Connection, path: str = SQLITE_PATH) -> None:
+        """ :param connection: Checked connection to the database file, it's used by the current thread """
+        DataBaseSQLiteImp.path = path
+        DataBaseSQLiteImp.local = threading.local()
+        DataBaseSQLiteImp.local.connection = connection
+
+    @staticmethod
+    def connection() -> sqlite3.Connection:
+        if (connection := getattr(DataBaseSQLiteImp.local, "connection", None)) is None:
+            connection = DataBaseSQLiteImp.local.connection = SQLiteConnection.connect(DataBaseSQLiteImp.path)
+        return connection
+
+    @staticmethod
+    def in_transaction() -> bool:
+        """ :return: Whether the current thread is inside transaction() """
+        return getattr(DataBaseSQLiteImp.local, "transaction", False)
+
+    @staticmethod
+    def is_transactional() -> bool:
+        return True
+
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[None]:
+        """ The write lock is taken at once and held until the end, so the calls don't wait for it one by one """
+        if DataBaseSQLiteImp.in_transaction():
+            # Nested transaction is a part of the outer one
+            yield
+            return
+        connection = DataBaseSQLiteImp.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        DataBaseSQLiteImp.local.transaction = True
+        try:
+            yield
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+        finally:
+            DataBaseSQLiteImp.local.transaction = False
+
+    @staticmethod
+    @_read_transaction
+    def get_grouped_notes(cursor) -> list[str]:
+        """ Fetches every group with titles of its notes in a single query, empty groups get an empty array """
+        cursor.execute(QUERIES["get_grouped_notes"])
+        return DataBaseSQLiteImp.paint_grouped_notes(
+            [(group_title, json.loads(note_titles)) for group_title, note_titles in cursor.fetchall()]
+        )
+
+    @staticmethod
+    @_read_transaction
+    def get_attached_group_notes(group_title: str, cursor) -> list[str]:
+        cursor.execute(QUERIES["get_attached_group_notes"], (group_title,))
+
+        if note_titles := cursor.fetchall():
+            return [title[0] for title in note_titles]
+
+    @staticmethod
+    @_read_transaction
+    def get_all_groups(cursor) -> list[str]:
+        cursor.execute(QUERIES["get_all_groups"])
+        return [title[0] for title in cursor.fetchall()]
+
+    @staticmethod
+    @_read_transaction
+    def get_all_notes_dates(cursor) -> list[tuple[str, str | None, datetime]]:
+        cursor.execute(QUERIES["get_all_notes_dates"])
+        return cursor.fetchall()
+
+    @staticmethod
+    @_read_transaction
+    def get_groups_page(key: str | None, page_size: int, backward: bool, cursor) -> list[str]:
+        if backward and key is None:
+            return []
+        cursor.execute(QUERIES["get_groups_page_backward" if backward else "get_groups_page"], (key or "", page_size))
+        titles = [title[0] for title in cursor.fetchall()]
+        return titles[::-1] if backward else titles
+
+    @staticmethod
+    @_read_transaction
+    def get_grouped_notes_page(key: tuple[str, str] | None, page_size: int, backward: bool,
+                               cursor) -> list[tuple[str, str | None]]:
+        if backward and key is None:
+            return []
+        group_title, note_title = key or ("", "")
+        cursor.execute(
+            QUERIES["get_grouped_notes_page_backward" if backward else "get_grouped_notes_page"],
+            (group_title, note_title or "", page_size)
+        )
+        rows = [(group_title, note_title) for group_title, note_title in cursor.fetchall()]
+        return rows[::-1] if backward else rows
+
+    @staticmethod
+    @_read_transaction
+    def get_all_notes(cursor) -> list[str]:
+        cursor.execute(QUERIES["get_all_notes"])
+        return [title[0] for title in cursor.fetchall()]
+
+    @staticmethod
+    @_read_transaction
+    def check_group(group_title: str, cursor) -> int | None:
+        cursor.execute(QUERIES["check_group"], (group_title,))
+        if cursor.fetchone()[0]:
+            return 1
+
+    @staticmethod
+    @_read_transaction
+    def check_note(note_title: str, cursor) -> Note | None:
+        cursor.execute(QUERIES["check_note"], (note_title,))
+        if note_data := cursor.fetchone():
+            return DataBaseSQLiteImp.__to_note(note_title, note_data)
+
+    @staticmethod
+    @_read_transaction
+    def check_notes(note_titles: list[str], cursor) -> list[Note | None]:
+        notes = []
+        for note_title in note_titles:
+            cursor.execute(QUERIES["check_note"], (note_title,))
+            note_data = cursor.fetchone()
+            notes.append(DataBaseSQLiteImp.__to_note(note_title, note_data) if note_data else None)
+        return notes
+
+    @staticmethod
+    def __to_note(note_title: str, note_data: tuple) -> Note:
+        return Note(
+            note_id=note_title,
+            title=note_title,
+            text=note_data[1],
+            creation_date=note_data[2],
+            last_change_date=note_data[3]
+        )
+
+    @staticmethod
+    @_read_transaction
+    def get_note_info(note_title: str, cursor) -> NoteInfo | None:
+        cursor.execute(QUERIES["get_note_info"], (note_title,))
+        if note_data := cursor.fetchone():
+            return NoteInfo(
+                note_id=note_data[0],
+                title=note_title,
+                group_title=note_data[1],
+                creation_date=note_data[2],
+                last_change_date=note_data[3],
+                length=note_data[4],
+                lines=note_data[5]
+            )
+
+    @staticmethod
+    @_read_transaction
+    def get_note_text(note_title: str, cursor) -> str | None:
+        cursor.execute(QUERIES["get_note_text"], (note_title,))
+        if note_data := cursor.fetchone():
+            return note_data[0] or ""
+
+    @staticmethod
+    @_make_transaction
+    def create_group(group_title: str, cursor) -> None:
+        cursor.execute(QUERIES["create_group"], (group_title,))
+
+    @staticmethod
+    @_make_transaction
+    def update_group(group_title: str, new_group_title: str, cursor) -> None:
+        # groups_notes rows follow the new id via ON UPDATE CASCADE
+        cursor.execute(QUERIES["update_group"], (new_group_title, group_title))
+
+    @staticmethod
+    @_make_transaction
+    def delete_group(group_title: str, cursor) -> None:
+        # groups_notes and note_revisions rows are removed via ON DELETE CASCADE
+        cursor.execute(QUERIES["delete_group_notes"], (group_title,))
+        cursor.execute(QUERIES["delete_group"], (group_title,))
+
+    @staticmethod
+    @_make_transaction
+    def create_note(group_title: str, note_title: str, note_text: str, cursor) -> None:
+        cursor.execute(QUERIES["create_note"], (note_title, note_text, datetime.now()))
+        cursor.execute(QUERIES["attach_note"], (group_title, note_title))
+
+    @staticmethod
+    @_make_transaction
+    def update_note(note_title: str, text: str, option: str, cursor) -> None:
+        if option == "title":
+            cursor.execute(QUERIES["update_note_title"], (text, datetime.now(), note_title))
+        else:
+            DataBaseSQLiteImp.__save_revision(note_title, text, cursor)
+            cursor.execute(QUERIES["update_note_text"], (text, datetime.now(), note_title))
+
+    @staticmethod
+    def __rebuild_revision(note_id: str, revision: int, cursor) -> str | None:
+        cursor.execute(QUERIES["get_revision_chain"], (note_id, revision))
+        chain = cursor.fetchall()
+        if chain and chain[-1][0] == revision:
+            return Revisions.rebuild([(bool(snapshot), data) for _, snapshot, data in chain])
+
+    @staticmethod
+    def __save_revision(note_title: str, new_text: str, cursor) -> None:
+        """ Records the new text as the next revision, the first update records the current text as well """
+        cursor.execute(QUERIES["get_last_revision"], (note_title,))
+        if not (note_data := cursor.fetchone()):
+            return
+        note_id, last_change_date, last_revision = note_data
+
+        if last_revision is None:
+            cursor.execute(QUERIES["get_note_text"], (note_title,))
+            old_text = cursor.fetchone()[0] or ""
+            last_revision = 1
+            cursor.execute(QUERIES["create_note_revision"],
+                           (note_id, last_revision, last_change_date, True, len(old_text), old_text))
+        else:
+            old_text = DataBaseSQLiteImp.__rebuild_revision(note_id, last_revision, cursor)
+
+        if new_text != old_text:
+            snapshot, data = Revisions.encode(last_revision + 1, old_text, new_text)
+            cursor.execute(QUERIES["create_note_revision"],
+                           (note_id, last_revision + 1, datetime.now(), snapshot, len(new_text), data))
+
+    @staticmethod
+    @_make_transaction
+    def delete_note(note_title: str, cursor) -> None:
+        cursor.execute(QUERIES["delete_note"], (note_title,))
+
+    @staticmethod
+    @_read_transaction
+    def get_note_history(note_title: str, cursor) -> list[NoteRevision]:
+        cursor.execute(QUERIES["get_note_history"], (note_title,))
+        return [
+            NoteRevision(revision=revision, creation_date=creation_date, snapshot=bool(snapshot), length=length,
+                         size=size)
+            for revision, creation_date, snapshot, length, size in cursor.fetchall()
+        ]
+
+    @staticmethod
+    @_read_transaction
+    def get_note_revision(note_title: str, revision: int, cursor) -> str | None:
+        return DataBaseSQLiteImp.__rebuild_revision(note_title, revision, cursor)
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """
+        Converts the web search syntax to the FTS5 query: every word is required, '-word' excludes notes.
+        Words are quoted, so the FTS5 operators and special characters in the query are matched literally
+        """
+        terms = " ".join(f'"{term}"' for term in Headline.terms(query))
+        excluded = "".join(f' NOT "{term}"' for term in re.findall(r"(?:^|\s)-([^\W_]+)", query.lower()))
+        return f"{terms}{excluded}" if terms else ""
+
+    @staticmethod
+    @_read_transaction
+    def search_notes(query: str, limit: int, cursor) -> list[SearchResult]:
+        if not (expression := DataBaseSQLiteImp.match_expression(query)):
+            return []
+        cursor.execute(QUERIES["search_notes"], (expression, limit))
+        return [
+            SearchResult(title=title, group_title=group_title, rank=rank, headline=Headline.build(text or "", query))
+            for title, group_title, rank, text in cursor.fetchall()
+        ]
+
+    @staticmethod
+    @_make_transaction
+    def import_notes(notes: list[NoteRecord], on_conflict: str, cursor) -> int:
+        """ Loads the batch into a temporary table, then moves it to the notes tables with a few statements """
+        cursor.execute(IMPORT_TABLE)
+        cursor.executemany(QUERIES["stage_import_note"], (
+            (position, note.group_title, note.title, note.text, note.creation_date, note.last_change_date)
+            for position, note in enumerate(notes)
+        ))
+        # The first duplicate in the batch wins when skipping, the last one when overwriting
+        cursor.execute(QUERIES[f"import_notes_{on_conflict}_duplicates"])
+        cursor.execute(QUERIES["count_import_notes"])
+        imported = cursor.fetchone()[0]
+
+        cursor.execute(QUERIES["import_notes"])
+        cursor.execute(QUERIES["detach_import_notes"])
+        cursor.execute(QUERIES["attach_import_notes"])
+        cursor.execute(QUERIES["clear_import_notes"])
+        return imported
+
+    @staticmethod
+    @_stream_transaction
+    def export_notes(batch_size: int, cursor) -> Iterator[NoteRecord]:
+        cursor.arraysize = batch_size
+        cursor.execute(QUERIES["export_notes"])
+        while rows := cursor.fetchmany():
+            for group_title, title, text, creation_date, last_change_date in rows:
+                yield NoteRecord(
+                    group_title=group_title,
+                    title=title,
+                    text=text or "",
+                    creation_date=creation_date,
+                    last_change_date=last_change_date
+                )
+
+
+view = View()
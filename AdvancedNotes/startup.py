@@ -0,0 +1,83 @@
+"""
+Cold start measurements. The module is imported by main.py before everything else,
+so the time of its import is the start of the program and the report includes the imports of the other modules.
+Per module import times are shown by 'python -X importtime main.py --startup-report'
+"""
+
+import sys
+import threading
+
+from concurrent.futures import Future
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+
+# Modules of the database drivers, only the driver of the chosen backend should be loaded
+DRIVER_MODULES = ("psycopg2", "asyncpg", "pymongo", "motor", "sqlite3")
+
+
+def in_background(function: Callable, *args) -> Future:
+    """
+    Calls the function in a daemon thread, so a hanging database doesn't keep the program from exiting
+
+    :return: Future of the result, its exception is raised by Future.result() in the waiting thread
+    """
+    future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(function(*args))
+            except BaseException as error:
+                future.set_exception(error)
+
+    threading.Thread(target=run, name=function.__name__, daemon=True).start()
+    return future
+
+
+class StartupReport:
+    started = perf_counter()
+    # (stage, milliseconds since the start of the stage, milliseconds since the start of the program)
+    stages: list[tuple[str, float, float]] = []
+
+    __lock = threading.Lock()
+
+    @staticmethod
+    def stage(name: str, start: float | None = None) -> float:
+        """
+        Records the end of the stage
+
+        :param start: perf_counter() value at the start of the stage, by default it starts with the program
+        :return: perf_counter() value at the end of the stage, which is the start of the next one
+        """
+        end = perf_counter()
+        with StartupReport.__lock:
+            StartupReport.stages.append((
+                name,
+                (end - (StartupReport.started if start is None else start)) * 1000,
+                (end - StartupReport.started) * 1000
+            ))
+        return end
+
+    @staticmethod
+    def measured(name: str, function: Callable) -> Callable:
+        """ Wraps the function, which records its stage after every call """
+        @wraps(function)
+        def wrapper(*args):
+            start = perf_counter()
+            try:
+                return function(*args)
+            finally:
+                StartupReport.stage(name, start)
+        return wrapper
+
+    @staticmethod
+    def loaded_drivers() -> list[str]:
+        return [name for name in DRIVER_MODULES if name in sys.modules]
+
+    @staticmethod
+    def to_rows() -> list[tuple[str, float, float]]:
+        """ :return: Stages in the order of their ends with the rounded milliseconds """
+        with StartupReport.__lock:
+            return [(name, round(duration, 1), round(end, 1)) for name, duration, end in
+                    sorted(StartupReport.stages, key=lambda stage: stage[2])]
@@ -0,0 +1,45 @@
+"""
+Tests run on the backends which need no server: the in-process one and SQLite with a temporary file.
+Modules of the program are imported the way main.py does, from the AdvancedNotes directory
+"""
+
+import os
+import sys
+
+from typing import Iterator
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from screen import Screen  # noqa: E402
+from databases.idatabase import DataBase  # noqa: E402
+
+BACKENDS = ("memory", "sqlite")
+
+
+@pytest.fixture(autouse=True)
+def screen():
+    """ Buffered output is written inside the test, so pytest captures it instead of the exit handler """
+    yield
+    Screen.flush()
+
+
+@pytest.fixture(params=BACKENDS)
+def database(request, tmp_path) -> Iterator[DataBase]:
+    """ Empty database with the default 'Home' group """
+    if request.param == "memory":
+        from memory import DataBaseMemoryImp
+
+        DataBaseMemoryImp.reset()
+        yield DataBaseMemoryImp()
+        return
+
+    from sqlite import DataBaseSQLiteImp
+    from databases.sqlite_impl.connection import SQLiteConnection
+
+    path = str(tmp_path / "notes.db")
+    connection = SQLiteConnection.check_connection(path)
+    DataBaseSQLiteImp.set_connection(connection, path)
+    yield DataBaseSQLiteImp()
+    connection.close()
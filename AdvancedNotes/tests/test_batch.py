@@ -0,0 +1,82 @@
+import os
+import sys
+import sqlite3
+import subprocess
+
+import pytest
+
+import main
+
+from batch import BatchInput, EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE, EXIT_NO_DATABASE
+from view import View
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def run(database_path: str, *arguments: str, stdin: str = "") -> subprocess.CompletedProcess:
+    environment = {**os.environ, "SQLITE_PATH": database_path}
+    environment.pop("MYNOTES_DB", None)
+    return subprocess.run([sys.executable, MAIN, *arguments], input=stdin, capture_output=True, text=True,
+                          env=environment, timeout=60)
+
+
+def group_titles(database_path: str) -> list[str]:
+    with sqlite3.connect(database_path) as connection:
+        return sorted(title for title, in connection.execute("SELECT title FROM groups"))
+
+
+def test_batch_applies_every_command(tmp_path):
+    database_path = str(tmp_path / "notes.db")
+    script = tmp_path / "script.txt"
+    script.write_text("# comment\n\ngroup create Work\ngroup select Work\nnote create plan\nfirst line\n..\n.\n",
+                      encoding="utf-8")
+
+    result = run(database_path, "--db", "sqlite", "--batch", str(script), "group create Ideas")
+    assert result.returncode == EXIT_SUCCESS, result.stdout
+    assert group_titles(database_path) == ["Home", "Ideas", "Work"]
+    with sqlite3.connect(database_path) as connection:
+        assert connection.execute("SELECT text FROM notes WHERE title='plan'").fetchone() == ("first line\n.",)
+
+
+def test_failed_command_rolls_back_the_batch(tmp_path):
+    database_path = str(tmp_path / "notes.db")
+
+    result = run(database_path, "--db", "sqlite", "--batch", "-", stdin="group create Work\ngroup create Work\n")
+    assert result.returncode == EXIT_FAILURE
+    assert "Line 2: 'group create Work' failed, the batch was rolled back" in result.stdout
+    assert group_titles(database_path) == ["Home"]
+
+
+def test_unreadable_batch_file_is_a_usage_error(tmp_path):
+    result = run(str(tmp_path / "notes.db"), "--db", "sqlite", "--batch", str(tmp_path / "missing.txt"))
+    assert result.returncode == EXIT_USAGE
+    assert "can't be read" in result.stderr
+
+
+def test_batch_needs_the_database_option(tmp_path):
+    assert run(str(tmp_path / "notes.db"), "groups").returncode == EXIT_USAGE
+
+
+def test_unavailable_database(tmp_path):
+    # Directory can't be opened as the database file
+    assert run(str(tmp_path), "--db", "sqlite", "groups").returncode == EXIT_NO_DATABASE
+
+
+@pytest.fixture
+def memory_app(monkeypatch):
+    from memory import DataBaseMemoryImp
+
+    DataBaseMemoryImp.reset()
+    monkeypatch.setattr(main, "database", DataBaseMemoryImp(), raising=False)
+    monkeypatch.setattr(main, "input_handler", BatchInput, raising=False)
+    View()
+    return DataBaseMemoryImp
+
+
+def test_non_transactional_batch_keeps_applied_commands(memory_app, capsys):
+    BatchInput.set_lines(["group create Work", "group create Ideas", "group create Work", "group create Late"])
+
+    assert main.App.run_batch() == EXIT_FAILURE
+    main.Screen.flush()
+    assert "Line 3: 'group create Work' failed, 2 commands were applied before the failure" in capsys.readouterr().out
+    assert sorted(memory_app.get_all_groups()) == ["Home", "Ideas", "Work"]
@@ -0,0 +1,92 @@
+import tarfile
+
+from datetime import datetime
+
+import pytest
+
+from exporter import NotesExporter, UniqueNames
+from importer import NotesImporter
+from databases.note import NoteRecord
+
+DATE = datetime(2024, 1, 2, 3, 4, 5)
+
+
+def record(group_title: str, title: str, text: str = "") -> NoteRecord:
+    return NoteRecord(group_title=group_title, title=title, text=text, creation_date=DATE, last_change_date=DATE)
+
+
+@pytest.mark.parametrize("title, name", [
+    ("plan", "plan"),
+    ("a/b\\c", "a_b_c"),
+    ('<>:"|?*', "_______"),
+    ("  padded  ", "padded"),
+    (".", "_"),
+    ("..", "_"),
+    ("...", "_"),
+    ("", "_"),
+    (".hidden", ".hidden")
+])
+def test_file_name(title, name):
+    assert NotesExporter.file_name(title) == name
+
+
+def test_unique_names_ignore_case():
+    names = UniqueNames()
+    assert [names.add(name) for name in ("Plan", "plan", "PLAN", "plan (2)", "other")] == [
+        "Plan", "plan (2)", "PLAN (3)", "plan (2) (2)", "other"
+    ]
+
+
+def test_note_paths_stay_inside_the_root_and_unique():
+    notes = [record("..", "../up"), record("..", "..."), record("a/b", "x"), record("a_b", "x"), record("a/b", "X")]
+    paths = [path for _, path in NotesExporter.note_paths(iter(notes))]
+
+    assert paths == ["_/.._up.md", "_/_.md", "a_b/x.md", "a_b (2)/x.md", "a_b/X (2).md"]
+    for path in paths:
+        assert ".." not in path.split("/")
+
+
+@pytest.fixture
+def notes(database):
+    database.create_group("Work")
+    database.create_note("Work", "plan", "first line\nsecond line")
+    database.create_note("Work", "a/b", "slash")
+    database.create_note("Home", "empty", "")
+    return database
+
+
+def exported_notes(database) -> set[tuple[str, str, str]]:
+    return {(note.group_title, note.title, note.text) for note in database.export_notes(100)}
+
+
+def test_jsonl_round_trip(notes, tmp_path):
+    path = str(tmp_path / "notes.jsonl")
+    assert NotesExporter.export(notes, path, "jsonl") == 3
+    expected = exported_notes(notes)
+
+    for note_title in ("plan", "a/b", "empty"):
+        notes.delete_note(note_title)
+    assert NotesImporter.import_path(notes, path, "skip") == (3, 3)
+    assert exported_notes(notes) == expected
+
+
+def test_markdown_round_trip_renames_existing(notes, tmp_path):
+    path = tmp_path / "markdown"
+    assert NotesExporter.export(notes, str(path), "markdown") == 3
+    assert (path / "Work" / "a_b.md").read_text(encoding="utf-8") == "slash"
+
+    assert NotesImporter.import_path(notes, str(path), "rename") == (3, 3)
+    assert {title for _, title, _ in exported_notes(notes)} == {
+        "plan", "a/b", "empty", "plan (2)", "a_b", "empty (2)"
+    }
+
+
+def test_tar_gz_members(notes, tmp_path):
+    path = str(tmp_path / "notes.tar.gz")
+    progress = []
+    assert NotesExporter.export(notes, path, "tar.gz", batch_size=2, progress=progress.append) == 3
+    assert progress == [2]
+
+    with tarfile.open(path, "r:gz") as archive:
+        members = {member.name: archive.extractfile(member).read().decode("utf-8") for member in archive}
+    assert members == {"Work/plan.md": "first line\nsecond line", "Work/a_b.md": "slash", "Home/empty.md": ""}
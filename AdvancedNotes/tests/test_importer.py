@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from importer import NotesImporter, NotesImportError, TITLE_LENGTH
+
+
+def write_jsonl(path, notes: list[dict]) -> str:
+    path.write_text("\n".join(json.dumps(note) for note in notes), encoding="utf-8")
+    return str(path)
+
+
+def texts(database) -> dict[str, str]:
+    return {note.title: note.text for note in database.export_notes(100)}
+
+
+@pytest.fixture
+def existing(database):
+    database.create_group("Work")
+    database.create_note("Work", "plan", "old plan")
+    return database
+
+
+def test_skip_keeps_existing_and_first_duplicate(existing, tmp_path):
+    path = write_jsonl(tmp_path / "notes.jsonl", [
+        {"group": "Work", "title": "plan", "text": "new plan"},
+        {"group": "Ideas", "title": "idea", "text": "first"},
+        {"group": "Ideas", "title": "idea", "text": "second"}
+    ])
+
+    assert NotesImporter.import_path(existing, path, "skip") == (1, 3)
+    assert texts(existing) == {"plan": "old plan", "idea": "first"}
+    assert existing.get_attached_group_notes("Ideas") == ["idea"]
+
+
+def test_overwrite_replaces_existing_and_keeps_last_duplicate(existing, tmp_path):
+    path = write_jsonl(tmp_path / "notes.jsonl", [
+        {"group": "Ideas", "title": "plan", "text": "first"},
+        {"group": "Ideas", "title": "plan", "text": "second"}
+    ])
+
+    imported, processed = NotesImporter.import_path(existing, path, "overwrite")
+    assert (imported, processed) == (1, 2)
+    assert texts(existing) == {"plan": "second"}
+    # Overwritten note is moved to the group of the imported one
+    assert existing.get_note_info("plan").group_title == "Ideas"
+    assert not existing.get_attached_group_notes("Work")
+
+
+def test_rename_gives_free_titles_across_batches(existing, tmp_path):
+    existing.create_note("Work", "plan (2)", "taken")
+    path = write_jsonl(tmp_path / "notes.jsonl", [
+        {"group": "Work", "title": "plan", "text": "first"},
+        {"group": "Work", "title": "plan", "text": "second"},
+        {"group": "Work", "title": "list", "text": "third"},
+        {"group": "Work", "title": "list", "text": "fourth"}
+    ])
+
+    # Batches of two make the duplicates of the first batch and the taken titles meet across batches
+    assert NotesImporter.import_path(existing, path, "rename", batch_size=2) == (4, 4)
+    assert texts(existing) == {
+        "plan": "old plan",
+        "plan (2)": "taken",
+        "plan (3)": "first",
+        "plan (4)": "second",
+        "list": "third",
+        "list (2)": "fourth"
+    }
+
+
+def test_renamed_titles_fit_the_length_limit(existing, tmp_path):
+    title = "x" * TITLE_LENGTH
+    existing.create_note("Work", title, "taken")
+    path = write_jsonl(tmp_path / "notes.jsonl", [{"group": "Work", "title": title}])
+
+    NotesImporter.import_path(existing, path, "rename")
+    assert f"{'x' * (TITLE_LENGTH - 4)} (2)" in texts(existing)
+
+
+def test_markdown_directory_groups(database, tmp_path):
+    (tmp_path / "Work").mkdir()
+    (tmp_path / "Work" / "plan.md").write_text("plan text", encoding="utf-8")
+    (tmp_path / "root.md").write_text("root text", encoding="utf-8")
+    (tmp_path / "skipped.txt").write_text("not a note", encoding="utf-8")
+
+    assert NotesImporter.import_path(database, str(tmp_path), "skip") == (2, 2)
+    assert database.get_note_info("plan").group_title == "Work"
+    assert database.get_note_info("root").group_title == "Home"
+
+
+def test_failed_batch_stops_the_import(database, tmp_path, monkeypatch):
+    path = write_jsonl(tmp_path / "notes.jsonl", [{"title": f"note {number}"} for number in range(5)])
+    import_notes = database.import_notes
+    calls = []
+
+    def failing_import(notes, on_conflict):
+        calls.append(len(notes))
+        # Backends print their errors and return None
+        return import_notes(notes, on_conflict) if len(calls) == 1 else None
+
+    monkeypatch.setattr(database, "import_notes", failing_import)
+    with pytest.raises(NotesImportError, match="2 of 2 notes before it were imported"):
+        NotesImporter.import_path(database, path, "skip", batch_size=2)
+    assert calls == [2, 2]
+
+
+def test_check_notes_keeps_the_order(existing):
+    from cache import DataBaseCache
+
+    for database in (existing, DataBaseCache.cached(existing)):
+        assert [note and note.title for note in database.check_notes(["missing", "plan", "missing"])] == [
+            None, "plan", None
+        ]
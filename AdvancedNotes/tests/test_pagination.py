@@ -0,0 +1,67 @@
+import pytest
+
+GROUPS = ["Home", "a", "b", "c", "d", "e"]
+
+
+@pytest.fixture
+def groups(database):
+    for group_title in GROUPS[1:]:
+        database.create_group(group_title)
+    return database
+
+
+@pytest.fixture
+def grouped_notes(database):
+    database.create_group("Work")
+    database.create_group("Empty")
+    for note_title in ("n1", "n2", "n3"):
+        database.create_note("Work", note_title, "")
+    database.create_note("Home", "h1", "")
+    return database
+
+
+def test_groups_pages_forward_and_backward(groups):
+    first = groups.get_groups_page(None, 2, False)
+    assert first == ["Home", "a"]
+    second = groups.get_groups_page(first[-1], 2, False)
+    assert second == ["b", "c"]
+    assert groups.get_groups_page(second[-1], 2, False) == ["d", "e"]
+    # The page after the last one is empty
+    assert groups.get_groups_page("e", 2, False) == []
+
+    assert groups.get_groups_page(second[0], 2, True) == first
+    # Backward page before the first row is empty, so is the backward page without a key
+    assert groups.get_groups_page(first[0], 2, True) == []
+    assert groups.get_groups_page(None, 2, True) == []
+
+
+def test_short_backward_page_keeps_the_order(groups):
+    assert groups.get_groups_page("b", 5, True) == ["Home", "a"]
+
+
+def test_groups_page_key_between_titles(groups):
+    # Key of a deleted row still splits the pages
+    assert groups.get_groups_page("bb", 2, False) == ["c", "d"]
+    assert groups.get_groups_page("bb", 2, True) == ["a", "b"]
+
+
+def test_grouped_notes_pages(grouped_notes):
+    rows = [("Empty", None), ("Home", "h1"), ("Work", "n1"), ("Work", "n2"), ("Work", "n3")]
+    assert grouped_notes.get_grouped_notes_page(None, 10, False) == rows
+
+    first = grouped_notes.get_grouped_notes_page(None, 2, False)
+    assert first == rows[:2]
+    second = grouped_notes.get_grouped_notes_page(first[-1], 2, False)
+    assert second == rows[2:4]
+    assert grouped_notes.get_grouped_notes_page(second[-1], 2, False) == rows[4:]
+    assert grouped_notes.get_grouped_notes_page(rows[-1], 2, False) == []
+
+    assert grouped_notes.get_grouped_notes_page(second[0], 2, True) == first
+    assert grouped_notes.get_grouped_notes_page(first[0], 2, True) == []
+    assert grouped_notes.get_grouped_notes_page(None, 2, True) == []
+
+
+def test_grouped_notes_page_splits_a_group(grouped_notes):
+    # Key inside a group continues with its next note, not with the next group
+    assert grouped_notes.get_grouped_notes_page(("Work", "n1"), 1, False) == [("Work", "n2")]
+    assert grouped_notes.get_grouped_notes_page(("Work", "n3"), 2, True) == [("Work", "n1"), ("Work", "n2")]
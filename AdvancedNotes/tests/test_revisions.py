@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from databases.revisions import Revisions
+from settings.config import REVISION_SNAPSHOT_INTERVAL
+
+LINES = ["", "first line", "second line", "third line", "- item", "  indented", "last line"]
+
+
+def random_text(generator: random.Random) -> str:
+    text = "\n".join(generator.choices(LINES, k=generator.randint(0, 12)))
+    # Texts with and without the trailing newline
+    return text + "\n" if generator.random() < 0.5 else text
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_delta_apply_round_trip(seed):
+    generator = random.Random(seed)
+    old_text = random_text(generator)
+    for _ in range(20):
+        new_text = random_text(generator)
+        assert Revisions.apply(old_text, Revisions.delta(old_text, new_text)) == new_text
+        old_text = new_text
+
+
+def test_every_interval_revision_is_a_snapshot():
+    snapshots = [revision for revision in range(1, 3 * REVISION_SNAPSHOT_INTERVAL + 2)
+                 if Revisions.is_snapshot(revision)]
+    assert snapshots == [1, REVISION_SNAPSHOT_INTERVAL + 1, 2 * REVISION_SNAPSHOT_INTERVAL + 1,
+                         3 * REVISION_SNAPSHOT_INTERVAL + 1]
+
+
+def test_encode_rebuild_across_the_snapshot_interval():
+    generator = random.Random(0)
+    texts = [random_text(generator) for _ in range(2 * REVISION_SNAPSHOT_INTERVAL + 5)]
+    stored = [Revisions.encode(1, "", texts[0])]
+    for revision, (old_text, new_text) in enumerate(zip(texts, texts[1:]), start=2):
+        stored.append(Revisions.encode(revision, old_text, new_text))
+
+    for revision, text in enumerate(texts, start=1):
+        # Chain from the nearest snapshot, the way the backends select it
+        start = max(number for number in range(1, revision + 1) if stored[number - 1][0])
+        assert revision - start < REVISION_SNAPSHOT_INTERVAL
+        assert Revisions.rebuild(stored[start - 1:revision]) == text
+
+
+def test_history_and_restore(database):
+    database.create_group("Work")
+    database.create_note("Work", "plan", "version 1")
+    texts = ["version 1"]
+    for number in range(2, REVISION_SNAPSHOT_INTERVAL + 4):
+        texts.append(f"version {number}\nline")
+        database.update_note("plan", texts[-1], "text")
+
+    history = database.get_note_history("plan")
+    assert [revision.revision for revision in history] == list(range(1, len(texts) + 1))
+    assert [revision.snapshot for revision in history] == [Revisions.is_snapshot(revision.revision)
+                                                           for revision in history]
+    for revision, text in enumerate(texts, start=1):
+        assert database.get_note_revision("plan", revision) == text
+    assert database.get_note_revision("plan", len(texts) + 1) is None
+
+    # Restoring is an update with the old text, so it's recorded as the next revision
+    database.update_note("plan", database.get_note_revision("plan", 2), "text")
+    assert database.get_note_text("plan") == texts[1]
+    assert len(database.get_note_history("plan")) == len(texts) + 1
+
+
+def test_unchanged_text_adds_no_revision(database):
+    database.create_note("Home", "plan", "text")
+    database.update_note("plan", "new text", "text")
+    database.update_note("plan", "new text", "text")
+    assert [revision.revision for revision in database.get_note_history("plan")] == [1, 2]
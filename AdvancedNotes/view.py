@@ -1,99 +1,180 @@
 """
 Class for printing tables and information.
-Supports color syntax of errors, event statuses, plain text and table's text
+Supports color syntax of errors, event statuses, plain text and table's text.
+Output is buffered by the :class:`Screen` and shown before the next input
 """
 
-from prettytable import PrettyTable
+from difflib import unified_diff
 
-from databases.note import Note
+from screen import Screen, Table
+from databases.metrics import Metrics
+from databases.note import NoteInfo, NoteRevision, SearchResult, HIGHLIGHT_START, HIGHLIGHT_STOP
 from settings.colors import TEXT_COLOR, STATUS_COLOR, ERROR_COLOR, GROUP_COLOR
-from settings.config import HORIZONTAL_TABLE_CHAR, JUNCTION_TABLE_CHER
 
 
 class View:
-    """ Table view settings """
-    __table = PrettyTable()
-    __table.horizontal_char = HORIZONTAL_TABLE_CHAR
-    __table.junction_char = JUNCTION_TABLE_CHER
-    __table.padding_width = 1
+    # Number of the shown error messages, the batch mode stops on the command which shows one.
+    # They're counted by the metrics as well, as the failures of the running database call and command
+    errors = 0
 
     @staticmethod
-    def _print_and_clear(function):
+    def _print_table(function):
         """
         Decorator for printing the tables:
-        1. Calls function changing the presentation of the :class:`View` table
+        1. Calls function building the :class:`Table` of the rows
         2. Prints "Menu" label if needed
-        3. Prints table
-        4. Clear the :class:`View` table parameters and content
+        3. Prints table line by line
         """
         def wrapper(*args):
-            function(*args)
+            table = function(*args)
 
             # print menu label
-            print(f"\n{args[0]}" if args[0].endswith(":") else "")
+            Screen.print(f"\n{args[0]}" if args[0].endswith(":") else "")
 
-            # print tabel
-            View.__table.align = "l"
-            print(View.__table, end="\n")
-
-            # clear table
-            View.__table.clear()
+            # print table
+            for line in table.lines():
+                Screen.print(line)
         return wrapper
 
+    @staticmethod
+    def clear_screen() -> None:
+        Screen.clear()
+
+    @staticmethod
+    def show() -> None:
+        """ Writes the buffered output to the terminal, it's called before every input """
+        Screen.flush()
+
     @staticmethod
     def print_status_message(message_text: str) -> None:
-        print(STATUS_COLOR + message_text)
+        Screen.print(STATUS_COLOR + message_text)
 
     @staticmethod
     def print_error_message(message_text: str) -> None:
-        print(ERROR_COLOR + message_text)
+        View.errors += 1
+        Metrics.error()
+        Screen.print(ERROR_COLOR + message_text)
 
     @staticmethod
     def print_text(message_text: str) -> None:
-        print(TEXT_COLOR + message_text)
+        Screen.print(TEXT_COLOR + message_text)
+
+    @staticmethod
+    def print_import_progress(imported: int, processed: int) -> None:
+        """ Rewrites the same terminal line after every imported batch """
+        Screen.print(f"{STATUS_COLOR}Imported: {imported} Processed: {processed}", end="\r")
+        Screen.flush()
+
+    @staticmethod
+    def print_export_progress(exported: int) -> None:
+        Screen.print(f"{STATUS_COLOR}Exported: {exported}", end="\r")
+        Screen.flush()
+
+    @staticmethod
+    def print_search_results(query: str, results: list[SearchResult]) -> None:
+        """ Prints ranked results with the matched words of the headlines highlighted """
+        if not results:
+            View.print_error_message(f"Nothing was found for: '{query}'")
+            return
+        for index, result in enumerate(results, start=1):
+            headline = result.headline.replace("\n", " ") \
+                .replace(HIGHLIGHT_START, STATUS_COLOR).replace(HIGHLIGHT_STOP, TEXT_COLOR)
+            Screen.print(
+                f"\n{TEXT_COLOR}{index}. {GROUP_COLOR}{result.title}{TEXT_COLOR} "
+                f"(group: {result.group_title}, rank: {result.rank:.3f})"
+                f"\n   {headline}"
+            )
 
     @staticmethod
-    def print_note_info(note: Note) -> None:
-        number_of_strings = note.text.count("\n") + 1
-        print(
+    def print_note_info(note: NoteInfo) -> None:
+        Screen.print(
             f"\n{GROUP_COLOR}Note:{TEXT_COLOR} '{note.title}'"
             f"\n{GROUP_COLOR}Creation date:{TEXT_COLOR} {note.creation_date:%d.%m.%Y %H:%M:%S}"
             f"\n{GROUP_COLOR}Last changes date:{TEXT_COLOR} {note.last_change_date:%d.%m.%Y %H:%M:%S}"
-            f"\n{GROUP_COLOR}Number of strings:{TEXT_COLOR} {number_of_strings}"
-            f"\n{GROUP_COLOR}Number of symbols:{TEXT_COLOR} {len(note.text)}"
+            f"\n{GROUP_COLOR}Number of strings:{TEXT_COLOR} {note.lines}"
+            f"\n{GROUP_COLOR}Number of symbols:{TEXT_COLOR} {note.length}"
         )
 
     @staticmethod
-    def print_attached_group_and_note(attached_group_name: str, attached_note: Note) -> None:
+    def print_diff(old_label: str, new_label: str, old_text: str, new_text: str) -> None:
+        """ Prints unified diff of the texts: added lines are green, removed ones are yellow """
+        diff = list(unified_diff(old_text.splitlines(), new_text.splitlines(), old_label, new_label, lineterm=""))
+        if not diff:
+            View.print_status_message("\nThere are no changes")
+            return
+        Screen.print()
+        for line in diff:
+            if line.startswith(("---", "+++", "@@")):
+                Screen.print(GROUP_COLOR + line)
+            elif line.startswith("+"):
+                Screen.print(STATUS_COLOR + line)
+            elif line.startswith("-"):
+                Screen.print(ERROR_COLOR + line)
+            else:
+                Screen.print(TEXT_COLOR + line)
+
+    @staticmethod
+    def print_attached_group_and_note(attached_group_name: str, attached_note: NoteInfo) -> None:
         if attached_group_name and attached_note:
             # if group of notes and note are attached
-            print(TEXT_COLOR + f"\nAttached group: {GROUP_COLOR + attached_group_name}" +
-                  TEXT_COLOR + f" Attached note: {GROUP_COLOR + attached_note.title}")
+            Screen.print(TEXT_COLOR + f"\nAttached group: {GROUP_COLOR + attached_group_name}" +
+                         TEXT_COLOR + f" Attached note: {GROUP_COLOR + attached_note.title}")
         elif attached_group_name:
             # if group of notes is attached
-            print(TEXT_COLOR + f"\nAttached group: {GROUP_COLOR + attached_group_name}")
+            Screen.print(TEXT_COLOR + f"\nAttached group: {GROUP_COLOR + attached_group_name}")
         else:
             # if nothing is attached
-            print(GROUP_COLOR + "\nNote's group doesn't selected")
+            Screen.print(GROUP_COLOR + "\nNote's group doesn't selected")
 
     @staticmethod
-    @_print_and_clear
-    def print_note(title: str, text: str) -> None:
+    @_print_table
+    def print_note(title: str, text: str) -> Table:
         """ A simple one-column table includes two rows: note title and text """
-        View.__table.add_column(title, [text.rstrip()])
+        return Table([title], [(text.rstrip(),)])
 
     @staticmethod
-    @_print_and_clear
-    def print_table(_: str, commands: list[str], descriptions: list[str]) -> None:
+    @_print_table
+    def print_table(_: str, commands: list[str], descriptions: list[str]) -> Table:
         """ The two-column table includes the names and descriptions of the commands """
-        View.__table.field_names = [" Command", "Description"]
-        for command, description in zip([GROUP_COLOR + row + TEXT_COLOR if row.isupper() else row for row in commands],
-                                        descriptions):
-            View.__table.add_row((command, description))
+        return Table([" Command", "Description"],
+                     zip([GROUP_COLOR + row + TEXT_COLOR if row.isupper() else row for row in commands], descriptions))
+
+    @staticmethod
+    @_print_table
+    def print_note_history(_: str, revisions: list[NoteRevision]) -> Table:
+        """ The table of the note revisions with the number of symbols stored for every of them """
+        return Table(["Revision", "Date", "Stored as", "Symbols", "Stored symbols"], (
+            (
+                revision.revision,
+                f"{revision.creation_date:%d.%m.%Y %H:%M:%S}",
+                "snapshot" if revision.snapshot else "delta",
+                revision.length,
+                revision.size
+            ) for revision in revisions
+        ))
 
     @staticmethod
-    @_print_and_clear
-    def print_table_with_pointer(title: str, text: list[str], pointer: str) -> None:
+    @_print_table
+    def print_metrics(_: str, stats: dict[str, dict]) -> Table:
+        """ The table of the calls, database load and latencies (in milliseconds) of every method or command """
+        return Table(["Name", "Calls", "DB calls", "Round trips", "Rows", "KB", "Errors",
+                      "Mean", "p50", "p95", "p99", "Max"], (
+            (
+                name, row["calls"], row["database_calls"], row["round_trips"], row["rows"],
+                round(row["bytes"] / 1024, 1), row["errors"],
+                row["mean_ms"], row["p50_ms"], row["p95_ms"], row["p99_ms"], row["max_ms"]
+            ) for name, row in stats.items()
+        ))
+
+    @staticmethod
+    @_print_table
+    def print_startup_report(_: str, stages: list[tuple[str, float, float]]) -> Table:
+        """ The table of the startup stages with their durations and ends since the start (in milliseconds) """
+        return Table(["Stage", "Duration", "Since start"], stages)
+
+    @staticmethod
+    @_print_table
+    def print_table_with_pointer(title: str, text: list[str], pointer: str) -> Table:
         """
         The two-column table includes column with titles and column with an arrow title pointer.
         Pointer arrow appears when it's positions is the same as the attached group/note
@@ -102,9 +183,8 @@ class View:
         :param text: The list of the titles
         :param pointer: The name of the attached note or group of notes
         """
-        View.__table.add_column(title, text)
-        View.__table.add_column(
-            "Selected",
-            [GROUP_COLOR + "<--".center(8, " ") + TEXT_COLOR if pointer and row[3:] == pointer else " " for row in text]
-        )
+        return Table([title, "Selected"], (
+            (row, GROUP_COLOR + "<--".center(8, " ") + TEXT_COLOR if pointer and row[3:] == pointer else " ")
+            for row in text
+        ))
 